@@ -0,0 +1,351 @@
+import argparse
+import base64
+import json
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Annotated
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError
+from starlette.background import BackgroundTask
+
+from cache import configure as configure_cache, load_cache_config
+from db import init_db
+from export import EXPORT_FORMATS, export_marks, xlsx_sheet_count
+from metrics import configure as configure_metrics, load_metrics_config
+from notify import start_listener, stop_listener
+from repos.groups import get_groups_page
+from repos.marks import get_marks_page, get_sheet_marks, save_marks_batch
+from repos.people import get_people_page, get_students, get_teachers
+from repos.reports import avg_marks_analysis, avg_marks_multi, avg_marks_series
+from repos.subjects import get_all_subjects
+from repos.user import check_credentials
+
+# путь к config.ini для каждого процесса uvicorn; воркеры наследуют окружение родителя
+CONFIG_ENV = "COURSE_DB_CONFIG"
+DEFAULT_CONFIG = "../config.ini"
+MAX_PAGE = 1000
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # у каждого воркера свои движки и кэш; кэши воркеров согласует notify.py
+    config_path = os.environ.get(CONFIG_ENV, DEFAULT_CONFIG)
+    init_db(config_path)
+    configure_cache(**load_cache_config(config_path))
+    configure_metrics(**load_metrics_config(config_path))
+    start_listener(config_path)
+    yield
+    stop_listener()
+
+
+app = FastAPI(title="Система деканата", lifespan=lifespan)
+security = HTTPBasic()
+logger = logging.getLogger("api")
+
+
+@app.exception_handler(ValueError)
+async def _value_error(request: Request, exc: ValueError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+# SQLSTATE: ограничения (класс 23) и RAISE EXCEPTION триггеров — конфликт с данными, 409;
+# некорректные значения от клиента (класс 22) — 400; отмена по statement_timeout, обрыв соединения,
+# нехватка ресурсов, конфликт сериализации — временное, 503; остальное (ошибки SQL) — 500
+CONFLICT_SQLSTATES = ("23", "P0001")
+BAD_INPUT_SQLSTATES = ("22",)
+UNAVAILABLE_SQLSTATES = ("08", "53", "57", "40001", "40P01")
+
+
+def _pg_error(orig) -> tuple[str, str]:
+    # код и текст ошибки сервера: psycopg — атрибуты, pg8000 — словарь полей ErrorResponse
+    sqlstate = getattr(orig, "sqlstate", None)
+    if sqlstate is not None:
+        return sqlstate, orig.diag.message_primary or str(orig)
+    fields = orig.args[0] if orig.args and isinstance(orig.args[0], dict) else {}
+    return fields.get("C", ""), fields.get("M", str(orig))
+
+
+@app.exception_handler(DBAPIError)
+async def _db_error(request: Request, exc: DBAPIError):
+    sqlstate, message = _pg_error(exc.orig)
+    if sqlstate.startswith(CONFLICT_SQLSTATES):
+        # ограничения и триггеры БД (оценка вне 2..5, удаление группы со студентами и т.п.)
+        return JSONResponse(status_code=409, content={"detail": message})
+    if sqlstate.startswith(BAD_INPUT_SQLSTATES):
+        return JSONResponse(status_code=400, content={"detail": message})
+    if (
+        sqlstate.startswith(UNAVAILABLE_SQLSTATES)
+        or exc.connection_invalidated
+        or (isinstance(exc, OperationalError) and not sqlstate)
+    ):
+        logger.warning("БД недоступна (%s): %s", sqlstate or "соединение", message)
+        return JSONResponse(status_code=503, content={"detail": "База данных временно недоступна"})
+    logger.error("Ошибка БД (%s)", sqlstate, exc_info=exc)
+    return JSONResponse(status_code=500, content={"detail": "Внутренняя ошибка базы данных"})
+
+
+@app.exception_handler(PoolTimeoutError)
+async def _pool_timeout(request: Request, exc: PoolTimeoutError):
+    # все соединения пула заняты дольше [pool] timeout
+    return JSONResponse(status_code=503, content={"detail": "База данных временно недоступна"})
+
+
+def current_user(credentials: Annotated[HTTPBasicCredentials, Depends(security)]) -> dict:
+    user = check_credentials(credentials.username, credentials.password)
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Неверный логин или пароль",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    return user
+
+
+def admin_user(user: Annotated[dict, Depends(current_user)]) -> dict:
+    # как в интерфейсе: изменять данные может только admin
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail=f"Нет прав для изменения данных (роль: {user['role']})")
+    return user
+
+
+User = Annotated[dict, Depends(current_user)]
+Admin = Annotated[dict, Depends(admin_user)]
+Limit = Annotated[int, Query(ge=1, le=MAX_PAGE)]
+
+
+def encode_cursor(cursor: tuple | None) -> str | None:
+    # курсор keyset-пагинации — непрозрачная строка; даты помечаются, чтобы вернуться датами
+    if cursor is None:
+        return None
+    items = [{"date": v.isoformat()} if isinstance(v, date) else v for v in cursor]
+    return base64.urlsafe_b64encode(json.dumps(items).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> tuple | None:
+    if not cursor:
+        return None
+    try:
+        items = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return tuple(date.fromisoformat(v["date"]) if isinstance(v, dict) else v for v in items)
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Некорректный cursor") from None
+
+
+def _page(result: dict) -> dict:
+    return {"rows": result["rows"], "next_cursor": encode_cursor(result["next_cursor"])}
+
+
+@app.get("/groups")
+def groups(
+    user: User,
+    cursor: str | None = None,
+    limit: Limit = 50,
+    descending: bool = False,
+    name: str | None = None,
+):
+    return _page(get_groups_page(decode_cursor(cursor), limit, descending, name))
+
+
+@app.get("/subjects")
+def subjects(user: User):
+    return get_all_subjects()
+
+
+@app.get("/people")
+def people(
+    user: User,
+    cursor: str | None = None,
+    limit: Limit = 50,
+    sort_by: str = "name",
+    descending: bool = False,
+    person_type: str | None = None,
+    group_id: int | None = None,
+    name: str | None = None,
+):
+    return _page(get_people_page(
+        decode_cursor(cursor), limit, sort_by, descending, person_type, group_id, name
+    ))
+
+
+@app.get("/students")
+def students(user: User):
+    return get_students()
+
+
+@app.get("/teachers")
+def teachers(user: User):
+    return get_teachers()
+
+
+@app.get("/marks")
+def marks(
+    user: User,
+    cursor: str | None = None,
+    limit: Limit = 50,
+    sort_by: str = "id",
+    descending: bool = False,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    value: int | None = None,
+):
+    return _page(get_marks_page(
+        decode_cursor(cursor), limit, sort_by, descending,
+        student_id, subject_id, teacher_id, group_id, date_from, date_to, value,
+    ))
+
+
+@app.get("/marks/sheet")
+def marks_sheet(user: User, group_id: int, subject_id: int, mark_date: date):
+    return get_sheet_marks(group_id, subject_id, mark_date)
+
+
+class MarkInsert(BaseModel):
+    student_id: int
+    subject_id: int
+    teacher_id: int
+    value: int
+    mark_date: date
+
+
+class MarkUpdate(BaseModel):
+    id: int
+    value: int
+    teacher_id: int
+
+
+class MarksBatch(BaseModel):
+    inserts: list[MarkInsert] = Field(default_factory=list)
+    updates: list[MarkUpdate] = Field(default_factory=list)
+    deletes: list[int] = Field(default_factory=list)
+    # день ведомости: UPDATE/DELETE читают одну секцию marks
+    mark_date: date | None = None
+
+
+@app.post("/marks/batch")
+def marks_batch(user: Admin, batch: MarksBatch):
+    # одна транзакция, как кнопка «Сохранить ведомость»
+    return save_marks_batch(
+        [m.model_dump() for m in batch.inserts],
+        [u.model_dump() for u in batch.updates],
+        batch.deletes,
+        mark_date=batch.mark_date,
+    )
+
+
+@app.get("/reports/avg")
+def report_avg(
+    user: User,
+    date_from: date,
+    date_to: date,
+    group_by: str = "group",
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    source: str = "rollup",
+):
+    return avg_marks_analysis(
+        date_from, date_to, group_id, student_id, subject_id, teacher_id, group_by, source
+    )
+
+
+@app.get("/reports/multi")
+def report_multi(
+    user: User,
+    date_from: date,
+    date_to: date,
+    dimensions: Annotated[list[str], Query()],
+    kind: str = "sets",
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    source: str = "rollup",
+):
+    # ключи результата — кортежи разрезов, в JSON их нет: список уровней
+    result = avg_marks_multi(
+        date_from, date_to, tuple(dimensions), kind,
+        group_id, student_id, subject_id, teacher_id, source,
+    )
+    return [{"dimensions": list(level), "rows": rows} for level, rows in result.items()]
+
+
+@app.get("/reports/series")
+def report_series(
+    user: User,
+    date_from: date,
+    date_to: date,
+    bucket: str = "auto",
+    window: int = 3,
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    source: str = "rollup",
+):
+    return avg_marks_series(
+        date_from, date_to, bucket, window, group_id, student_id, subject_id, teacher_id, source
+    )
+
+
+@app.get("/export/marks")
+def export(
+    user: User,
+    date_from: date,
+    date_to: date,
+    fmt: str = "csv",
+    group_id: int | None = None,
+    subject_id: int | None = None,
+):
+    # файл собирается на диске по частям и отдаётся оттуда же кусками, в памяти его нет целиком
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt must be one of: {', '.join(EXPORT_FORMATS)}")
+    mime, ext = EXPORT_FORMATS[fmt]
+
+    out = tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False)
+    try:
+        with out:
+            total = export_marks(fmt, out, date_from, date_to, group_id=group_id, subject_id=subject_id)
+    except Exception:
+        os.unlink(out.name)
+        raise
+
+    headers = {"X-Rows": str(total)}
+    if fmt == "xlsx":
+        headers["X-Sheets"] = str(xlsx_sheet_count(total))
+    return FileResponse(
+        out.name,
+        media_type=mime,
+        filename=f"marks_{date_from}_{date_to}.{ext}",
+        headers=headers,
+        background=BackgroundTask(os.unlink, out.name),
+    )
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="HTTP API деканата")
+    parser.add_argument("config", help="путь к config.ini")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="число процессов uvicorn")
+    args = parser.parse_args(argv)
+
+    os.environ[CONFIG_ENV] = args.config
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
 import sys
 import streamlit as st
 from db import init_db
+from cache import configure as configure_cache, load_cache_config
+from metrics import configure as configure_metrics, load_metrics_config
+from notify import start_listener
 
 if not sys.argv[1].endswith(".ini"):
     st.error("Не удалось подключиться к базе данных.")
     st.code("Запуск приложения возможен только из командной строки с указанием файла конфигурации.")
     st.stop()
 
+
+@st.cache_resource(show_spinner=False)
+def init_process(config_path: str) -> bool:
+    # Streamlit выполняет app.py на каждый rerun; движки, пулы, кэши и слушатель NOTIFY
+    # создаются один раз на процесс. Исключение не кэшируется — следующий rerun повторит попытку
+    init_db(config_path)
+    configure_cache(**load_cache_config(config_path))
+    configure_metrics(**load_metrics_config(config_path))
+    start_listener(config_path)
+    return True
+
+
 try:
-    init_db(sys.argv[1])
+    init_process(sys.argv[1])
 except Exception as e:
     st.set_page_config(page_title="Система деканата", layout="wide")
     st.error("Не удалось подключиться к базе данных.")
@@ -21,7 +36,11 @@ from pages.dir_groups import groups_page
 from pages.dir_of_subjects import subjects_page
 from pages.dir_people import people_page
 from pages.grade_book import grades_page
+from pages.grade_sheet import grade_sheet_page
 from pages.reports import reports_page
+from pages.data_import import import_page
+from pages.data_export import export_page
+from pages.admin_metrics import metrics_page
 
 
 st.set_page_config(page_title="Система деканата", layout="wide")
@@ -32,7 +51,11 @@ groups = st.Page(groups_page, title="Группы", icon="👥", url_path="group
 subjects = st.Page(subjects_page, title="Предметы", icon="📚", url_path="subjects")
 people = st.Page(people_page, title="Люди", icon="🧑‍🎓", url_path="people")
 grades = st.Page(grades_page, title="Оценки", icon="📝", url_path="grades")
+grade_sheet = st.Page(grade_sheet_page, title="Ведомость", icon="🗒️", url_path="grade-sheet")
 reports = st.Page(reports_page, title="Отчеты", icon="📊", url_path="reports")
+data_import = st.Page(import_page, title="Импорт", icon="📥", url_path="import")
+data_export = st.Page(export_page, title="Выгрузка", icon="📤", url_path="export")
+metrics = st.Page(metrics_page, title="Метрики запросов", icon="⏱️", url_path="metrics")
 
 pg = st.navigation({
     "Общее": [
@@ -45,10 +68,16 @@ pg = st.navigation({
     ],
     "Журнал": [
         grades,
+        grade_sheet,
     ],
     "Отчёты": [
         reports,
     ],
+    "Сервис": [
+        data_import,
+        data_export,
+        metrics,
+    ],
 })
 
 pg.run()
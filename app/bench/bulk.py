@@ -0,0 +1,138 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from bench.provision import throwaway_postgres
+from bench.seed import SCALES, seed
+from db import DRIVERS, get_engine, init_db
+from migrate import migrate
+
+# схема до и после перевода проверок в триггерах на EXISTS и statement-level (0007_set_based_checks)
+BEFORE_VERSION = "0006"
+AFTER_VERSION = "0007"
+BULK_MARKER = "Нагрузка"
+# сдвиг дат копий оценок: копии не смешиваются с оригиналами в тех же днях
+MARKS_SHIFT_DAYS = 3650
+
+INSERT_PEOPLE = """
+    INSERT INTO people (last_name, first_name, group_id, type)
+    SELECT :marker, 'Студент ' || i, (SELECT min(id) FROM groups), 'S'
+    FROM generate_series(1, :n) AS i
+"""
+INSERT_GROUPS = """
+    INSERT INTO groups (name)
+    SELECT :marker || '-' || i || '_2000'
+    FROM generate_series(1, :n) AS i
+"""
+INSERT_MARKS = """
+    INSERT INTO marks (student_id, subject_id, teacher_id, value, mark_date)
+    SELECT student_id, subject_id, teacher_id, value, mark_date + :shift
+    FROM (SELECT * FROM marks ORDER BY id LIMIT :n) m
+"""
+
+# операция: (подготовка или None, замеряемый оператор). Всё в транзакции с откатом,
+# поэтому каждый повтор и оба варианта схемы работают с одними и теми же данными
+OPERATIONS = {
+    "people: insert": (None, INSERT_PEOPLE),
+    "people: update": (
+        None,
+        "UPDATE people SET father_name = father_name "
+        "WHERE id IN (SELECT id FROM people WHERE type = 'S' ORDER BY id LIMIT :n)",
+    ),
+    "people: delete": (INSERT_PEOPLE, "DELETE FROM people WHERE last_name = :marker"),
+    "groups: delete": (INSERT_GROUPS, "DELETE FROM groups WHERE name LIKE :marker || '-%'"),
+    "marks: insert": (None, INSERT_MARKS),
+    "marks: update": (
+        None,
+        "UPDATE marks SET value = 6 - value WHERE id IN (SELECT id FROM marks ORDER BY id LIMIT :n)",
+    ),
+    "marks: delete": (
+        None,
+        "DELETE FROM marks WHERE id IN (SELECT id FROM marks ORDER BY id LIMIT :n)",
+    ),
+}
+
+
+def time_operation(setup: str | None, sql: str, rows: int, repeat: int) -> dict:
+    params = {"n": rows, "marker": BULK_MARKER, "shift": MARKS_SHIFT_DAYS}
+    timings = []
+    affected = 0
+    with get_engine().connect() as conn:
+        for _ in range(repeat + 1):
+            if setup:
+                conn.execute(text(setup), params)
+            started = time.perf_counter()
+            affected = conn.execute(text(sql), params).rowcount
+            timings.append(time.perf_counter() - started)
+            conn.rollback()
+
+    # первый прогон — прогрев кэша планов и буферов
+    median = statistics.median(timings[1:])
+    return {
+        "rows": affected,
+        "median_ms": median * 1000,
+        "rows_per_s": affected / median if median else 0.0,
+    }
+
+
+def run_bulk(rows: int, repeat: int) -> dict:
+    return {name: time_operation(setup, sql, rows, repeat) for name, (setup, sql) in OPERATIONS.items()}
+
+
+def compare_schemas(config_path: str, scale: dict, seed_value: int, rows: int, repeat: int,
+                    driver: str | None) -> dict:
+    init_db(config_path, driver=driver)
+    migrate(target=BEFORE_VERSION)
+    with get_engine().connect() as conn:
+        if conn.execute(text("SELECT count(*) FROM marks")).scalar():
+            raise RuntimeError("Нужна пустая база: сравнение засевает её само")
+    seeded = seed(scale, seed_value)
+
+    before = run_bulk(rows, repeat)
+    migrate(target=AFTER_VERSION)
+    after = run_bulk(rows, repeat)
+    return {"seeded": seeded, "rows": rows, "repeat": repeat, "before": before, "after": after}
+
+
+def print_comparison(report: dict) -> None:
+    print(f"{'операция':<20}{'строк':>8}{'до, строк/с':>14}{'после, строк/с':>17}{'ускорение':>12}")
+    for name, b in report["before"].items():
+        a = report["after"][name]
+        speedup = a["rows_per_s"] / b["rows_per_s"] if b["rows_per_s"] else 0.0
+        print(f"{name:<20}{a['rows']:>8}{b['rows_per_s']:>14.0f}{a['rows_per_s']:>17.0f}{speedup:>11.1f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Массовые вставки, изменения и удаления до и после set-based проверок в триггерах"
+    )
+    parser.add_argument("--config", help="пустая база вместо одноразовой (миграции не дальше "
+                                         f"{BEFORE_VERSION})")
+    parser.add_argument("--scale", choices=list(SCALES), default="large")
+    parser.add_argument("--rows", type=int, default=5_000, help="строк в одном массовом операторе")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--driver", choices=list(DRIVERS))
+    parser.add_argument("--json", help="записать результаты в файл")
+    args = parser.parse_args(argv)
+
+    scale = SCALES[args.scale]
+    if args.config:
+        report = compare_schemas(args.config, scale, args.seed, args.rows, args.repeat, args.driver)
+    else:
+        with throwaway_postgres(driver=args.driver or "pg8000") as config_path:
+            report = compare_schemas(config_path, scale, args.seed, args.rows, args.repeat, args.driver)
+
+    print_comparison(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import db
+from db import DRIVERS, get_pool_stats, init_db
+from repos.groups import get_all_groups
+from repos.marks import get_all_marks, get_marks_page
+from repos.people import get_all_people, get_students, get_teachers
+from repos.reports import avg_marks_analysis
+from repos.subjects import get_all_subjects
+
+
+def driver_workload() -> dict:
+    d_from, d_to = date(1900, 1, 1), date.today()
+    workload = {
+        "get_all_marks": get_all_marks,
+        "get_marks_page": lambda: get_marks_page(limit=200),
+        "get_all_people": get_all_people,
+        # кэш (cache.py) обходится, иначе мерили бы словарь в памяти
+        "get_students": get_students.__wrapped__,
+        "get_teachers": get_teachers.__wrapped__,
+        "get_all_groups": get_all_groups.__wrapped__,
+        "get_all_subjects": get_all_subjects.__wrapped__,
+    }
+    for mode in ("group", "student", "subject", "teacher", "year"):
+        workload[f"avg_marks_analysis({mode})"] = (
+            lambda mode=mode: avg_marks_analysis.__wrapped__(d_from, d_to, group_by=mode)
+        )
+    return workload
+
+
+def time_call(func, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        rows = len(result) if hasattr(result, "__len__") else None
+
+    # пик Python-памяти за вызов — отдельным прогоном: трассировка замедляет и исказила бы время.
+    # Сравнивает, например, списки dict с DataFrame колоночного режима (repos/columnar.py)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "peak_kb": peak / 1024,
+        "min_ms": min(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+
+def compare_drivers(config_path: str, drivers: list[str], repeat: int) -> dict:
+    results = {}
+    for driver in drivers:
+        init_db(config_path, driver=driver)
+        results[driver] = {
+            name: time_call(func, repeat) for name, func in driver_workload().items()
+        }
+        results[driver]["_pool"] = get_pool_stats()
+        db.engine.dispose()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Сравнение драйверов БД на запросах repos/*")
+    parser.add_argument("config", help="путь к config.ini")
+    parser.add_argument("--drivers", nargs="+", default=list(DRIVERS), choices=list(DRIVERS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="записать результаты в файл")
+    args = parser.parse_args(argv)
+
+    results = compare_drivers(args.config, args.drivers, args.repeat)
+
+    names = [n for n in results[args.drivers[0]] if not n.startswith("_")]
+    header = f"{'запрос':<32}" + "".join(f"{d + ', мс':>16}" for d in args.drivers)
+    print(header)
+    for name in names:
+        line = f"{name:<32}" + "".join(
+            f"{results[d][name]['median_ms']:>16.1f}" for d in args.drivers
+        )
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,469 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from unittest.mock import MagicMock
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+import db
+import metrics
+from bench.provision import throwaway_postgres
+from bench.seed import SCALES
+from bench.suite import prepare_database, sample_ids
+from cache import configure as configure_cache, load_cache_config
+from db import get_pool_stats, init_db
+from repos.groups import get_all_groups
+from repos.people import get_students, get_teachers
+from repos.reports import REPORT_DIMENSIONS
+from repos.subjects import get_all_subjects
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    "people": ("pages.dir_people", "people_page"),
+    "groups": ("pages.dir_groups", "groups_page"),
+    "grades": ("pages.grade_book", "grades_page"),
+    "grade_sheet": ("pages.grade_sheet", "grade_sheet_page"),
+    "reports": ("pages.reports", "reports_page"),
+}
+
+# доли сценариев в смеси; exam_week — сессия: много ввода оценок и ведомостей
+MIXES = {
+    "exam_week": {"browse": 0.3, "mark_entry": 0.45, "reports": 0.25},
+    "browsing": {"browse": 0.8, "mark_entry": 0.1, "reports": 0.1},
+    "reporting": {"browse": 0.2, "mark_entry": 0.0, "reports": 0.8},
+}
+WRITE_SCENARIOS = {"mark_entry"}
+
+# значения радио-кнопок страницы отчётов (pages/reports.py)
+REPORT_KINDS = {
+    "slice": ("Один разрез", "slice"),
+    "pivot": ("Сводная таблица", "pivot"),
+    "series": ("Динамика", "series"),
+}
+
+PAGE_TIMEOUT_S = 120
+POOL_SAMPLE_S = 0.1
+
+
+def _page_script(app_dir: str, module: str, func: str, username: str) -> None:
+    # исполняется AppTest в отдельном потоке; БД уже инициализирована в этом процессе
+    import importlib
+    import sys
+
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+
+    import streamlit as st
+
+    st.session_state.setdefault("user", {"id": 0, "username": username, "role": "admin"})
+    getattr(importlib.import_module(module), func)()
+
+
+@contextmanager
+def _shared_runtime():
+    # AppTest рассчитан на один прогон за раз: на время прогона ставит глобальный
+    # Runtime._instance и опцию global.appTest, а после — сбрасывает. Параллельные
+    # пользователи сбросили бы их друг другу посреди прогона, поэтому на всю нагрузку
+    # Runtime.instance() отдаёт один общий макет, а опция включена снаружи
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+
+    saved = Runtime.__dict__["instance"], Runtime.__dict__["exists"]
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance, Runtime.exists = saved
+
+
+def _by_label(widgets, label: str, form: bool | None = None):
+    for w in widgets:
+        if w.label == label and (form is None or bool(getattr(w, "form_id", "")) == form):
+            return w
+    return None
+
+
+def _by_key(widgets, key: str, prefix: bool = False):
+    for w in widgets:
+        if w.key is not None and (w.key.startswith(key) if prefix else w.key == key):
+            return w
+    return None
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records: list[dict] = []
+        self.error_samples: list[str] = []
+        self.scenario_failures = 0
+
+    def add(self, scenario: str, step: str, ms: float, error: str | None) -> None:
+        with self.lock:
+            self.records.append({"scenario": scenario, "step": step, "ms": ms, "ok": error is None})
+            if error is not None and len(self.error_samples) < 20:
+                self.error_samples.append(f"{scenario}/{step}: {error}")
+
+    def fail(self, scenario: str, exc: Exception) -> None:
+        with self.lock:
+            self.scenario_failures += 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append(f"{scenario}: {type(exc).__name__}: {exc}")
+
+
+class SimUser:
+    # один сотрудник: своя сессия на каждой странице, пауза «на подумать» между действиями
+    def __init__(self, index: int, refs: dict, recorder: Recorder, think_s: float, seed: int):
+        self.name = f"load{index:03d}"
+        self.refs = refs
+        self.recorder = recorder
+        self.think_s = think_s
+        self.rng = random.Random(seed + index)
+        self.apps: dict[str, AppTest] = {}
+
+    def page(self, name: str) -> AppTest:
+        at = self.apps.get(name)
+        if at is None:
+            module, func = PAGES[name]
+            at = AppTest.from_function(
+                _page_script, args=(APP_DIR, module, func, self.name), default_timeout=PAGE_TIMEOUT_S
+            )
+            self.apps[name] = at
+        return at
+
+    def run(self, scenario: str, step: str, at: AppTest) -> AppTest:
+        started = time.perf_counter()
+        error = None
+        try:
+            at.run()
+            if at.exception:
+                error = at.exception[0].message
+            elif at.error:
+                error = at.error[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.add(scenario, step, (time.perf_counter() - started) * 1000, error)
+
+        if self.think_s:
+            time.sleep(self.rng.expovariate(1 / self.think_s))
+        return at
+
+
+def scenario_browse(u: SimUser) -> None:
+    at = u.run("browse", "люди", u.page("people"))
+    name_filter = _by_key(at.text_input, "people_filter_name")
+    if name_filter is not None:
+        name_filter.set_value(u.rng.choice(u.refs["students"])["last_name"][:2])
+        at = u.run("browse", "люди: фильтр", at)
+    next_btn = _by_key(at.button, "people_pager_next")
+    if next_btn is not None and not next_btn.disabled:
+        next_btn.click()
+        u.run("browse", "люди: следующая страница", at)
+
+    u.run("browse", "группы", u.page("groups"))
+
+    at = u.run("browse", "журнал", u.page("grades"))
+    next_btn = _by_key(at.button, "marks_pager_next")
+    if next_btn is not None and not next_btn.disabled:
+        next_btn.click()
+        u.run("browse", "журнал: следующая страница", at)
+
+
+def _search_text(person: dict) -> str:
+    return " ".join(filter(None, [person["last_name"], person["first_name"], person.get("father_name")]))
+
+
+def _choose_person(at: AppTest, key: str, person: dict) -> None:
+    select = _by_key(at.selectbox, f"{key}:", prefix=True)
+    if select is None or not select.options:
+        return
+    if select.format_func(person["id"]) in select.options:
+        select.set_value(person["id"])
+
+
+def scenario_mark_entry(u: SimUser) -> None:
+    rng, refs = u.rng, u.refs
+    group = rng.choice(refs["groups"])
+    subject = rng.choice(refs["subjects"])
+
+    # ведомость группы по предмету
+    at = u.run("mark_entry", "ведомость", u.page("grade_sheet"))
+    group_select = _by_label(at.selectbox, "Группа")
+    subject_select = _by_label(at.selectbox, "Предмет")
+    if group_select is not None and subject_select is not None:
+        group_select.set_value((group["name"], group["id"]))
+        subject_select.set_value((subject["name"], subject["id"]))
+        u.run("mark_entry", "ведомость: открыть", at)
+
+    # отдельная оценка через журнал: поиск студента и преподавателя, форма добавления
+    at = u.run("mark_entry", "журнал", u.page("grades"))
+    students = [s for s in refs["students"] if s["group_id"] == group["id"]] or refs["students"]
+    student = rng.choice(students)
+    teacher = rng.choice(refs["teachers"])
+    for key, person in (("add_mark_student", student), ("add_mark_teacher", teacher)):
+        query = _by_key(at.text_input, f"{key}_q")
+        if query is not None:
+            query.set_value(_search_text(person))
+    at = u.run("mark_entry", "журнал: поиск людей", at)
+
+    _choose_person(at, "add_mark_student", student)
+    _choose_person(at, "add_mark_teacher", teacher)
+    form_subject = _by_label(at.selectbox, "Предмет", form=True)
+    value = _by_label(at.number_input, "Оценка")
+    submit = _by_label(at.button, "Добавить")
+    if form_subject is None or value is None or submit is None:
+        return
+    form_subject.set_value((subject["name"], subject["id"]))
+    value.set_value(rng.choice([3, 4, 4, 5, 5]))
+    submit.click()
+    u.run("mark_entry", "журнал: добавить оценку", at)
+
+
+def scenario_reports(u: SimUser) -> None:
+    rng, refs = u.rng, u.refs
+    at = u.run("reports", "отчёты", u.page("reports"))
+
+    span = (refs["date_to"] - refs["date_from"]).days
+    length = rng.choice([30, 120, 365, span])
+    d_from = refs["date_to"] - timedelta(days=min(length, span))
+    kind = rng.choice(["slice", "slice", "pivot", "series"])
+
+    date_from = _by_label(at.date_input, "Дата с")
+    date_to = _by_label(at.date_input, "Дата по")
+    kind_radio = _by_label(at.radio, "Вид отчёта")
+    if date_from is None or date_to is None or kind_radio is None:
+        return
+    date_from.set_value(d_from)
+    date_to.set_value(refs["date_to"])
+    kind_radio.set_value(REPORT_KINDS[kind])
+    at = u.run("reports", f"отчёты: параметры ({kind})", at)
+
+    if kind == "slice":
+        group_by = _by_label(at.selectbox, "Разрез (по чему считать средний балл)")
+        view = _by_label(at.radio, "Показать результат")
+        if group_by is None or view is None:
+            return
+        group_by.set_value(rng.choice(REPORT_DIMENSIONS))
+        view.set_value("Таблица + график")
+    calc = _by_label(at.button, "Рассчитать")
+    if calc is not None:
+        calc.click()
+        u.run("reports", f"отчёт: {kind}", at)
+
+
+SCENARIOS = {
+    "browse": scenario_browse,
+    "mark_entry": scenario_mark_entry,
+    "reports": scenario_reports,
+}
+
+
+class PoolMonitor(threading.Thread):
+    # занятость пула по выборкам: насколько часто пул был исчерпан
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop_event = threading.Event()
+        self.samples = {"sync": []}
+
+    def run(self) -> None:
+        pools = {"sync": db.engine.pool}
+        while not self.stop_event.wait(POOL_SAMPLE_S):
+            for name, pool in pools.items():
+                self.samples[name].append(pool.checkedout())
+
+    def summary(self) -> dict:
+        pools = {"sync": db.engine.pool}
+        result = {}
+        for name, pool in pools.items():
+            capacity = pool.size() + pool._max_overflow
+            samples = self.samples[name] or [0]
+            result[name] = {
+                "capacity": capacity,
+                "max_checked_out": max(samples),
+                "avg_checked_out": sum(samples) / len(samples),
+                "saturated_share": sum(1 for s in samples if s >= capacity) / len(samples),
+            }
+        return result
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _latency(records: list[dict], duration_s: float) -> dict:
+    ms = [r["ms"] for r in records]
+    return {
+        "runs": len(records),
+        "errors": sum(1 for r in records if not r["ok"]),
+        "per_s": len(records) / duration_s if duration_s else 0.0,
+        "p50_ms": _pct(ms, 0.50),
+        "p95_ms": _pct(ms, 0.95),
+        "p99_ms": _pct(ms, 0.99),
+        "max_ms": max(ms, default=0.0),
+    }
+
+
+def load_refs() -> dict:
+    s = sample_ids()
+    return {
+        "groups": get_all_groups.__wrapped__(),
+        "subjects": get_all_subjects.__wrapped__(),
+        "students": get_students.__wrapped__(),
+        "teachers": get_teachers.__wrapped__(),
+        "date_from": s["date_from"],
+        "date_to": s["date_to"],
+    }
+
+
+def run_load(users: int, duration_s: float, mix: dict, think_s: float, ramp_s: float, seed: int) -> dict:
+    refs = load_refs()
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+
+    pool_before = get_pool_stats()
+    metrics.reset()
+    monitor = PoolMonitor()
+    monitor.start()
+
+    started = time.monotonic()
+    deadline = started + duration_s
+
+    def user_loop(index: int) -> None:
+        time.sleep(ramp_s * index / max(users, 1))
+        user = SimUser(index, refs, recorder, think_s, seed)
+        while time.monotonic() < deadline:
+            scenario = user.rng.choices(names, weights=weights)[0]
+            try:
+                SCENARIOS[scenario](user)
+            except Exception as e:
+                # сбой самого сценария (не страницы) не должен останавливать пользователя
+                recorder.fail(scenario, e)
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(users)]
+    with _shared_runtime():
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    elapsed = time.monotonic() - started
+    monitor.stop_event.set()
+    monitor.join()
+    pool_after = get_pool_stats()
+
+    checkouts = pool_after["checkouts"] - pool_before["checkouts"]
+    wait_s = pool_after["wait_total_s"] - pool_before["wait_total_s"]
+
+    steps = {}
+    for r in recorder.records:
+        steps.setdefault(f"{r['scenario']}: {r['step']}", []).append(r)
+
+    return {
+        "users": users,
+        "duration_s": elapsed,
+        "mix": mix,
+        "think_s": think_s,
+        "overall": _latency(recorder.records, elapsed),
+        "steps": {name: _latency(rows, elapsed) for name, rows in sorted(steps.items())},
+        "pool": {
+            **monitor.summary(),
+            "sync_checkouts": checkouts,
+            "sync_avg_wait_ms": wait_s / checkouts * 1000 if checkouts else 0.0,
+            "sync_max_wait_ms": pool_after["max_wait_ms"],
+            "sync_timeouts": pool_after["timeouts"] - pool_before["timeouts"],
+        },
+        "scenario_failures": recorder.scenario_failures,
+        "repos": metrics.repo_stats()[:15],
+        "error_samples": recorder.error_samples,
+    }
+
+
+def print_report(report: dict) -> None:
+    o = report["overall"]
+    print(
+        f"{report['users']} пользователей, {report['duration_s']:.0f} с: "
+        f"{o['runs']} прогонов страниц ({o['per_s']:.1f}/с), ошибок {o['errors']}; "
+        f"p50 {o['p50_ms']:.0f} мс, p95 {o['p95_ms']:.0f} мс, p99 {o['p99_ms']:.0f} мс"
+    )
+    print(f"{'шаг':<52}{'прогонов':>10}{'ошибок':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, s in report["steps"].items():
+        print(f"{name:<52}{s['runs']:>10}{s['errors']:>8}{s['p50_ms']:>9.0f}{s['p95_ms']:>9.0f}{s['p99_ms']:>9.0f}")
+
+    pool = report["pool"]
+    for name in ("sync",):
+        p = pool[name]
+        print(
+            f"пул {name}: макс. занято {p['max_checked_out']} из {p['capacity']}, "
+            f"в среднем {p['avg_checked_out']:.1f}, исчерпан {p['saturated_share']:.0%} времени"
+        )
+    print(
+        f"ожидание соединения (sync): ср. {pool['sync_avg_wait_ms']:.1f} мс, "
+        f"макс. {pool['sync_max_wait_ms']:.0f} мс, таймаутов {pool['sync_timeouts']}"
+    )
+    for sample in report["error_samples"][:5]:
+        print(f"ошибка: {sample}")
+
+
+def _init_app(config_path: str) -> None:
+    init_db(config_path)
+    configure_cache(**load_cache_config(config_path))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Нагрузка на страницы Streamlit: одновременные пользователи через AppTest"
+    )
+    parser.add_argument("--config", help="существующая база вместо одноразовой")
+    parser.add_argument("--scale", choices=list(SCALES), default="small", help="масштаб одноразовой базы")
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=120, help="длительность, с")
+    parser.add_argument("--mix", choices=list(MIXES), default="exam_week")
+    parser.add_argument("--think", type=float, default=1.0, help="средняя пауза между действиями, с")
+    parser.add_argument("--ramp", type=float, default=10, help="за сколько секунд подключаются все пользователи")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--allow-writes", action="store_true",
+                        help="разрешить ввод оценок в базу из --config")
+    parser.add_argument("--json", help="записать результаты в файл")
+    args = parser.parse_args(argv)
+
+    mix = MIXES[args.mix]
+    writes = any(mix.get(name) for name in WRITE_SCENARIOS)
+
+    if args.config:
+        if writes and not args.allow_writes:
+            parser.error(f"смесь {args.mix} пишет оценки: укажите --allow-writes или другую смесь")
+        _init_app(args.config)
+        report = run_load(args.users, args.duration, mix, args.think, args.ramp, args.seed)
+    else:
+        with throwaway_postgres() as config_path:
+            prepare_database(config_path, SCALES[args.scale], args.seed)
+            _init_app(config_path)
+            report = run_load(args.users, args.duration, mix, args.think, args.ramp, args.seed)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pg8000.dbapi
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench"
+BENCH_DB = "bench"
+DOCKER_IMAGE = "postgres:15"
+START_TIMEOUT_S = 60
+
+# база одноразовая: надёжность записи не нужна, а время наполнения сокращается в разы.
+# Замеры чтения от этих настроек не зависят
+SERVER_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "max_wal_size": "4GB",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def find_pg_bin() -> str | None:
+    # каталог с initdb/pg_ctl: PATH, pg_config, стандартные пути Debian/Ubuntu
+    initdb = shutil.which("initdb")
+    if initdb:
+        return os.path.dirname(initdb)
+
+    if shutil.which("pg_config"):
+        bindir = subprocess.run(
+            ["pg_config", "--bindir"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+        if bindir and os.path.exists(os.path.join(bindir, "initdb")):
+            return bindir
+
+    found = sorted(glob.glob("/usr/lib/postgresql/*/bin/initdb"))
+    return os.path.dirname(found[-1]) if found else None
+
+
+def _wait_ready(port: int) -> None:
+    deadline = time.monotonic() + START_TIMEOUT_S
+    while True:
+        try:
+            conn = pg8000.dbapi.connect(
+                user=BENCH_USER, password=BENCH_PASSWORD, host="127.0.0.1",
+                port=port, database=BENCH_DB, timeout=5,
+            )
+            conn.close()
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"PostgreSQL не поднялся на порту {port} за {START_TIMEOUT_S} с")
+            time.sleep(0.5)
+
+
+def write_config(path: str, port: int, driver: str = "pg8000") -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "[db]\n"
+            "host=127.0.0.1\n"
+            f"port={port}\n"
+            f"dbname={BENCH_DB}\n"
+            f"user={BENCH_USER}\n"
+            f"password={BENCH_PASSWORD}\n"
+            f"driver={driver}\n"
+            "statement_timeout_ms=0\n"
+        )
+
+
+@contextmanager
+def _local_server(pg_bin: str, workdir: str, port: int):
+    data = os.path.join(workdir, "data")
+    pwfile = os.path.join(workdir, "pw")
+    with open(pwfile, "w") as f:
+        f.write(BENCH_PASSWORD)
+
+    subprocess.run(
+        [os.path.join(pg_bin, "initdb"), "-D", data, "-U", BENCH_USER, f"--pwfile={pwfile}",
+         "-A", "md5", "-E", "UTF8", "--locale=C.UTF-8"],
+        check=True, capture_output=True,
+    )
+    options = " ".join(f"-c {k}={v}" for k, v in SERVER_SETTINGS.items())
+    subprocess.run(
+        [os.path.join(pg_bin, "pg_ctl"), "-D", data, "-l", os.path.join(workdir, "server.log"),
+         "-o", f"-p {port} -k {workdir} -h 127.0.0.1 {options}", "-w", "start"],
+        check=True, capture_output=True,
+    )
+    try:
+        # initdb создаёт только postgres/template*: своя база — через служебную
+        conn = pg8000.dbapi.connect(
+            user=BENCH_USER, password=BENCH_PASSWORD, host="127.0.0.1", port=port, database="postgres"
+        )
+        conn.autocommit = True
+        conn.cursor().execute(f"CREATE DATABASE {BENCH_DB}")
+        conn.close()
+        yield
+    finally:
+        subprocess.run(
+            [os.path.join(pg_bin, "pg_ctl"), "-D", data, "-m", "immediate", "stop"],
+            check=False, capture_output=True,
+        )
+
+
+@contextmanager
+def _docker_server(port: int, image: str):
+    args = ["docker", "run", "-d", "--rm",
+            "-e", f"POSTGRES_USER={BENCH_USER}",
+            "-e", f"POSTGRES_PASSWORD={BENCH_PASSWORD}",
+            "-e", f"POSTGRES_DB={BENCH_DB}",
+            "-p", f"127.0.0.1:{port}:5432",
+            image]
+    for k, v in SERVER_SETTINGS.items():
+        args += ["-c", f"{k}={v}"]
+
+    container = subprocess.run(args, check=True, capture_output=True, text=True).stdout.strip()
+    try:
+        yield
+    finally:
+        subprocess.run(["docker", "stop", container], check=False, capture_output=True)
+
+
+@contextmanager
+def throwaway_postgres(image: str = DOCKER_IMAGE, driver: str = "pg8000"):
+    # поднимает пустой PostgreSQL и отдаёт путь к config.ini для init_db; при выходе сервер
+    # останавливается, данные удаляются. Локальные initdb/pg_ctl, иначе docker
+    pg_bin = find_pg_bin()
+    if pg_bin is None and shutil.which("docker") is None:
+        raise RuntimeError("Нужен PostgreSQL (initdb/pg_ctl) или docker")
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="bench_pg_") as workdir:
+        server = _local_server(pg_bin, workdir, port) if pg_bin else _docker_server(port, image)
+        with server:
+            _wait_ready(port)
+            config_path = os.path.join(workdir, "config.ini")
+            write_config(config_path, port, driver)
+            yield config_path
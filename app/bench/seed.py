@@ -0,0 +1,220 @@
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from db import get_raw_connection, note_write
+
+# размеры синтетической базы; отдельные величины можно переопределить из командной строки
+SCALES = {
+    "tiny": {"groups": 3, "students": 60, "subjects": 10, "teachers": 8, "marks": 5_000},
+    "small": {"groups": 10, "students": 500, "subjects": 20, "teachers": 25, "marks": 50_000},
+    "medium": {"groups": 25, "students": 2_000, "subjects": 40, "teachers": 70, "marks": 300_000},
+    "large": {"groups": 50, "students": 5_000, "subjects": 60, "teachers": 150, "marks": 1_000_000},
+}
+# оценки — за текущий учебный год и два предыдущих
+ACADEMIC_YEARS = 3
+COPY_CHUNK_ROWS = 200_000
+
+LAST_NAMES = [
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+    "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров",
+    "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин",
+    "Захаров", "Зайцев", "Соловьёв", "Борисов", "Яковлев", "Григорьев", "Романов", "Воробьёв",
+    "Сергеев", "Кузьмин", "Фролов", "Александров", "Дмитриев", "Королёв", "Гусев", "Киселёв",
+]
+FIRST_NAMES_M = [
+    "Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+    "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Иван", "Денис",
+]
+FIRST_NAMES_F = [
+    "Анастасия", "Мария", "Анна", "Виктория", "Екатерина", "Наталья", "Марина", "Полина",
+    "София", "Дарья", "Алиса", "Ксения", "Елена", "Ольга", "Вероника", "Юлия",
+]
+FATHER_NAMES = [
+    "Александров", "Дмитриев", "Сергеев", "Андреев", "Алексеев", "Михайлов", "Иванов",
+    "Николаев", "Владимиров", "Викторов", "Петров", "Юрьев",
+]
+GROUP_PREFIXES = ["ИВТ", "ПМИ", "ФИИТ", "ПИ", "БИ", "МОА", "ИБ", "ПМ"]
+SUBJECT_NAMES = [
+    "Математический анализ", "Линейная алгебра", "Дискретная математика", "Программирование",
+    "Базы данных", "Операционные системы", "Компьютерные сети", "Физика", "История",
+    "Философия", "Английский язык", "Теория вероятностей", "Математическая статистика",
+    "Алгоритмы и структуры данных", "Архитектура ЭВМ", "Численные методы", "Экономика",
+    "Информационная безопасность", "Машинное обучение", "Web-технологии",
+]
+
+
+def _person_name(rng: random.Random, female: bool) -> tuple[str, str, str]:
+    last = rng.choice(LAST_NAMES)
+    father = rng.choice(FATHER_NAMES)
+    if female:
+        return last + "а", rng.choice(FIRST_NAMES_F), father + "на"
+    return last, rng.choice(FIRST_NAMES_M), father + "ич"
+
+
+def _unique_people(rng: random.Random, count: int, taken: set) -> list[tuple[str, str, str]]:
+    # естественный ключ people — ФИО в пределах группы: повторы перегенерируются
+    result = []
+    while len(result) < count:
+        name = _person_name(rng, rng.random() < 0.45)
+        if name not in taken:
+            taken.add(name)
+            result.append(name)
+    return result
+
+
+def teaching_days(years: int, until: date) -> list[date]:
+    # будни учебных лет (сентябрь—июнь) без каникул в начале января, до until не включая
+    start_year = (until.year if until.month >= 9 else until.year - 1) - years + 1
+    day = date(start_year, 9, 1)
+    days = []
+    while day < until:
+        if day.weekday() < 5 and day.month not in (7, 8) and not (day.month == 1 and day.day <= 10):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _day_weight(day: date) -> float:
+    # к концу семестра (декабрь, май—июнь) оценок больше — зачёты и контрольные
+    return {12: 2.0, 5: 1.6, 6: 1.8, 9: 0.6}.get(day.month, 1.0)
+
+
+def _copy(cursor, table: str, columns: str, lines: list[str]) -> None:
+    buf = io.StringIO("".join(lines))
+    sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, "copy"):
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buf.getvalue())
+    else:
+        # pg8000
+        cursor.execute(sql, stream=buf)
+
+
+def _ids(cursor, table: str, where: str = "") -> list[int]:
+    # база пустая, а COPY вставляет строки по порядку: id идут в порядке строк файла
+    cursor.execute(f"SELECT id FROM {table} {where} ORDER BY id")
+    return [r[0] for r in cursor.fetchall()]
+
+
+def seed(scale: dict, seed_value: int = 42, until: date | None = None) -> dict:
+    # наполняет пустую базу: группы, предметы, преподаватели, студенты, оценки.
+    # Оценки грузятся COPY, поэтому триггеры (валидация, rollup, версии данных) работают как в жизни
+    rng = random.Random(seed_value)
+    until = until or date.today()
+    started = time.perf_counter()
+
+    groups_n, students_n = scale["groups"], scale["students"]
+    subjects_n, teachers_n, marks_n = scale["subjects"], scale["teachers"], scale["marks"]
+
+    enrol_years = [until.year - k for k in range(4)]
+    group_names = []
+    for i in range(groups_n):
+        prefix = GROUP_PREFIXES[i % len(GROUP_PREFIXES)]
+        group_names.append(f"{prefix}-{i // len(GROUP_PREFIXES) + 1}{i % 3 + 1}_{enrol_years[i % 4]}")
+
+    subject_names = [
+        SUBJECT_NAMES[i % len(SUBJECT_NAMES)] + (f" {i // len(SUBJECT_NAMES) + 1}" if i >= len(SUBJECT_NAMES) else "")
+        for i in range(subjects_n)
+    ]
+
+    conn = get_raw_connection()
+    try:
+        cursor = conn.cursor()
+        _copy(cursor, "groups", "name", [f"{n}\n" for n in group_names])
+        _copy(cursor, "subjects", "name", [f'"{n}"\n' for n in subject_names])
+        group_ids = _ids(cursor, "groups")
+        subject_ids = _ids(cursor, "subjects")
+
+        teachers = _unique_people(rng, teachers_n, set())
+        _copy(cursor, "people", "last_name, first_name, father_name, type",
+              [f"{l},{f},{p},P\n" for l, f, p in teachers])
+        teacher_ids = _ids(cursor, "people", "WHERE type = 'P'")
+
+        # неравные группы: от 60% до 140% среднего размера
+        weights = [rng.uniform(0.6, 1.4) for _ in group_ids]
+        student_group = rng.choices(group_ids, weights=weights, k=students_n)
+        student_group.sort()
+        taken_by_group: dict[int, set] = {}
+        lines = []
+        for gid in student_group:
+            l, f, p = _unique_people(rng, 1, taken_by_group.setdefault(gid, set()))[0]
+            lines.append(f"{l},{f},{p},{gid},S\n")
+        _copy(cursor, "people", "last_name, first_name, father_name, group_id, type", lines)
+        student_ids = _ids(cursor, "people", "WHERE type = 'S'")
+
+        # за каждым предметом 1—4 преподавателя; у группы — 8—12 предметов, по одному преподавателю
+        subject_teachers = {s: rng.sample(teacher_ids, min(len(teacher_ids), rng.randint(1, 4))) for s in subject_ids}
+        curriculum = {}
+        for gid in group_ids:
+            subjects = rng.sample(subject_ids, min(len(subject_ids), rng.randint(8, 12)))
+            curriculum[gid] = [(s, rng.choice(subject_teachers[s]), rng.uniform(0.5, 2.0)) for s in subjects]
+
+        difficulty = {s: rng.gauss(0, 0.3) for s in subject_ids}
+        harshness = {t: rng.gauss(0, 0.2) for t in teacher_ids}
+        days = teaching_days(ACADEMIC_YEARS, until)
+        day_text = [d.isoformat() for d in days]
+        day_cum = []
+        total_w = 0.0
+        for d in days:
+            total_w += _day_weight(d)
+            day_cum.append(total_w)
+
+        # секции учебных лет (migrations/0008); на схеме до секционирования функции нет
+        cursor.execute("SELECT to_regproc('marks_ensure_partitions') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT marks_ensure_partitions(%s, %s)", (days[0], days[-1]))
+
+        activity = [rng.lognormvariate(0, 0.4) for _ in student_ids]
+        activity_sum = sum(activity)
+
+        marks_total = 0
+        lines = []
+        for sid, gid, act in zip(student_ids, student_group, activity):
+            plan = curriculum[gid]
+            ability = rng.gauss(3.8, 0.5)
+            n = round(marks_n * act / activity_sum)
+            per_subject = rng.choices(range(len(plan)), weights=[w for _, _, w in plan], k=n)
+            counts = [0] * len(plan)
+            for i in per_subject:
+                counts[i] += 1
+
+            for (subj, teacher, _), count in zip(plan, counts):
+                if not count:
+                    continue
+                # не больше одной оценки в день от преподавателя по предмету — как в живом журнале
+                chosen = set(rng.choices(range(len(days)), cum_weights=day_cum, k=count))
+                mean = ability - difficulty[subj] - harshness[teacher]
+                for di in chosen:
+                    value = min(5, max(1, round(rng.gauss(mean, 0.8))))
+                    lines.append(f"{sid},{subj},{teacher},{value},{day_text[di]}\n")
+
+            if len(lines) >= COPY_CHUNK_ROWS:
+                _copy(cursor, "marks", "student_id, subject_id, teacher_id, value, mark_date", lines)
+                marks_total += len(lines)
+                lines = []
+
+        if lines:
+            _copy(cursor, "marks", "student_id, subject_id, teacher_id, value, mark_date", lines)
+            marks_total += len(lines)
+
+        cursor.execute("ANALYZE")
+        note_write(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "groups": len(group_ids),
+        "subjects": len(subject_ids),
+        "teachers": len(teacher_ids),
+        "students": len(student_ids),
+        "marks": marks_total,
+        "days": len(days),
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,250 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from bench.drivers import time_call
+from bench.provision import throwaway_postgres
+from bench.seed import SCALES, seed
+from db import DRIVERS, get_engine, init_db
+from migrate import migrate
+from repos.groups import get_all_groups, get_groups_page
+from repos.marks import get_all_marks, get_marks_page, get_sheet_marks, save_marks_batch
+from repos.people import (
+    get_all_people, get_people_by_ids, get_people_page, get_students, get_teachers, search_people,
+)
+from repos.reports import REPORT_DIMENSIONS, TIME_BUCKETS, avg_marks_analysis, avg_marks_multi, avg_marks_series
+from repos.subjects import get_all_subjects
+from repos.versions import data_version
+
+
+def sample_ids() -> dict:
+    # самая большая группа и её самый «оценочный» предмет: фильтры не вырождаются в пустой ответ
+    with get_engine().connect() as conn:
+        row = conn.execute(text(
+            """
+            SELECT p.group_id, r.subject_id, r.teacher_id, r.student_id, max(r.day) AS day
+            FROM marks_daily_rollup r
+            JOIN people p ON p.id = r.student_id
+            GROUP BY p.group_id, r.subject_id, r.teacher_id, r.student_id
+            ORDER BY sum(r.cnt) DESC
+            LIMIT 1
+            """
+        )).mappings().one()
+        bounds = conn.execute(text("SELECT min(mark_date), max(mark_date) FROM marks")).one()
+    return {**row, "date_from": bounds[0], "date_to": bounds[1]}
+
+
+def suite_workload(s: dict) -> dict:
+    d_from, d_to = s["date_from"], s["date_to"]
+    last_month = d_to - timedelta(days=30)
+
+    # кэши (cache.cached / cache.versioned) обходятся через __wrapped__
+    workload = {
+        "get_all_groups": get_all_groups.__wrapped__,
+        "get_all_subjects": get_all_subjects.__wrapped__,
+        "get_students": get_students.__wrapped__,
+        "get_teachers": get_teachers.__wrapped__,
+        "get_all_people": get_all_people,
+        "get_all_people(frame)": lambda: get_all_people(as_frame=True),
+        "get_all_marks": get_all_marks,
+        "get_all_marks(frame)": lambda: get_all_marks(as_frame=True),
+        "get_groups_page": lambda: get_groups_page()["rows"],
+        "get_people_page(S)": lambda: get_people_page(person_type="S")["rows"],
+        "get_people_page(frame)": lambda: get_people_page(person_type="S", as_frame=True)["rows"],
+        "get_marks_page(id)": lambda: get_marks_page(limit=200)["rows"],
+        "get_marks_page(date desc)": lambda: get_marks_page(limit=200, sort_by="date", descending=True)["rows"],
+        "get_marks_page(student)": lambda: get_marks_page(student_id=s["student_id"])["rows"],
+        "get_marks_page(group, subject)": (
+            lambda: get_marks_page(group_id=s["group_id"], subject_id=s["subject_id"])["rows"]
+        ),
+        "get_marks_page(frame)": lambda: get_marks_page(limit=200, as_frame=True)["rows"],
+        "get_sheet_marks": lambda: get_sheet_marks(s["group_id"], s["subject_id"], s["day"]),
+        "search_people(prefix)": lambda: search_people("ив"),
+        "search_people(fuzzy)": lambda: search_people("иваноф"),
+        "search_people(teacher, subject)": lambda: search_people("", person_type="P", subject_id=s["subject_id"]),
+        "get_people_by_ids": lambda: get_people_by_ids([s["student_id"], s["teacher_id"]]),
+        "data_version": data_version,
+    }
+
+    for source in ("rollup", "marks"):
+        for mode in REPORT_DIMENSIONS:
+            workload[f"avg_marks_analysis({mode}, {source})"] = (
+                lambda mode=mode, source=source: avg_marks_analysis.__wrapped__(
+                    d_from, d_to, group_by=mode, source=source
+                )
+            )
+        workload[f"avg_marks_analysis(group, month, {source})"] = (
+            lambda source=source: avg_marks_analysis.__wrapped__(last_month, d_to, source=source)
+        )
+
+    workload["avg_marks_multi(sets)"] = (
+        lambda: avg_marks_multi.__wrapped__(d_from, d_to, REPORT_DIMENSIONS)
+    )
+    workload["avg_marks_multi(cube group x subject)"] = (
+        lambda: avg_marks_multi.__wrapped__(d_from, d_to, ("group", "subject"), kind="cube")
+    )
+    for bucket in TIME_BUCKETS:
+        workload[f"avg_marks_series({bucket})"] = (
+            lambda bucket=bucket: avg_marks_series.__wrapped__(d_from, d_to, bucket=bucket)["points"]
+        )
+    return workload
+
+
+def write_cycle(s: dict, repeat: int) -> dict:
+    # сохранение ведомости: вставка оценок группе за день, правка, удаление — как на странице
+    students = [p["id"] for p in get_students.__wrapped__() if p["group_id"] == s["group_id"]]
+    mark_date = s["date_to"] + timedelta(days=1)
+    timings = {"save_marks_batch(insert)": [], "save_marks_batch(update)": [], "save_marks_batch(delete)": []}
+
+    for _ in range(repeat):
+        inserts = [
+            {"student_id": sid, "subject_id": s["subject_id"], "teacher_id": s["teacher_id"],
+             "value": 4, "mark_date": mark_date}
+            for sid in students
+        ]
+        started = time.perf_counter()
+        save_marks_batch(inserts, [], [])
+        timings["save_marks_batch(insert)"].append(time.perf_counter() - started)
+
+        sheet = get_sheet_marks(s["group_id"], s["subject_id"], mark_date)
+        ids = [m["mark_id"] for m in sheet if m["mark_id"] is not None]
+        updates = [{"id": i, "value": 5, "teacher_id": s["teacher_id"]} for i in ids]
+        started = time.perf_counter()
+        save_marks_batch([], updates, [], mark_date=mark_date)
+        timings["save_marks_batch(update)"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        save_marks_batch([], [], ids, mark_date=mark_date)
+        timings["save_marks_batch(delete)"].append(time.perf_counter() - started)
+
+    return {
+        name: {
+            "rows": len(students),
+            "min_ms": min(t) * 1000,
+            "median_ms": sorted(t)[len(t) // 2] * 1000,
+            "max_ms": max(t) * 1000,
+        }
+        for name, t in timings.items()
+    }
+
+
+def _git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=False).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def _marks_count() -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM marks")).scalar()
+
+
+def prepare_database(config_path: str, scale: dict, seed_value: int, driver: str | None = None) -> tuple:
+    # миграции до последней; пустая база засевается. Возвращает (миграции, итоги наполнения или None)
+    init_db(config_path, driver=driver)
+    applied = migrate()
+
+    seeded = None
+    if _marks_count() == 0:
+        seeded = seed(scale, seed_value)
+    return applied, seeded
+
+
+def run_suite(config_path: str, scale: dict, seed_value: int, repeat: int, driver: str | None) -> dict:
+    applied, seeded = prepare_database(config_path, scale, seed_value, driver)
+
+    with get_engine().connect() as conn:
+        server_version = conn.execute(text("SHOW server_version")).scalar()
+
+    s = sample_ids()
+    results = {name: time_call(func, repeat) for name, func in suite_workload(s).items()}
+    # записи — только в базу, которую наполнил сам прогон: чужие данные не трогаем
+    if seeded is not None:
+        results.update(write_cycle(s, repeat))
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "driver": get_engine().dialect.driver,
+            "server_version": server_version,
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "scale": scale,
+            "seed": seed_value,
+            "migrations_applied": applied,
+        },
+        "seeded": seeded,
+        "samples": s,
+        "results": results,
+    }
+
+
+def print_results(report: dict, baseline: dict | None = None) -> None:
+    header = f"{'функция':<44}{'строк':>10}{'медиана, мс':>14}{'пик, КБ':>11}"
+    if baseline:
+        header += f"{'было, мс':>12}{'изм.':>9}"
+    print(header)
+
+    base = baseline["results"] if baseline else {}
+    for name, r in report["results"].items():
+        line = f"{name:<44}{r['rows'] if r['rows'] is not None else '':>10}{r['median_ms']:>14.1f}"
+        line += f"{r['peak_kb']:>11.0f}" if "peak_kb" in r else f"{'':>11}"
+        if name in base:
+            before = base[name]["median_ms"]
+            change = (r["median_ms"] - before) / before * 100 if before else 0.0
+            line += f"{before:>12.1f}{change:>+8.0f}%"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Замеры функций repos/* на синтетической базе заданного масштаба"
+    )
+    parser.add_argument("--config", help="существующая база вместо одноразовой (засевается, если marks пуста)")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    for key in ("groups", "students", "subjects", "teachers", "marks"):
+        parser.add_argument(f"--{key}", type=int, help=f"переопределить {key} выбранного масштаба")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора данных")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--driver", choices=list(DRIVERS))
+    parser.add_argument("--json", help="записать результаты в файл")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения медиан")
+    args = parser.parse_args(argv)
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    if args.config:
+        report = run_suite(args.config, scale, args.seed, args.repeat, args.driver)
+    else:
+        with throwaway_postgres(driver=args.driver or "pg8000") as config_path:
+            report = run_suite(config_path, scale, args.seed, args.repeat, args.driver)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if report["seeded"]:
+        sd = report["seeded"]
+        print(f"база: {sd['groups']} групп, {sd['students']} студентов, {sd['marks']} оценок "
+              f"(наполнение {sd['seconds']:.0f} с)")
+    print_results(report, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
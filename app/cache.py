@@ -0,0 +1,188 @@
+import configparser
+import functools
+import inspect
+import pickle
+import threading
+
+from cachetools import LRUCache, TTLCache
+
+DEFAULT_TTL = 300
+DEFAULT_MAXSIZE = 256
+DEFAULT_REPORT_MAX_MB = 64
+
+_lock = threading.RLock()
+_cache = TTLCache(maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL)
+# поколение namespace: растёт при каждой инвалидации, чтобы чтение,
+# начатое до записи, не положило в кэш устаревший результат
+_generations: dict[str, int] = {}
+_epoch = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_MISSING = object()
+
+
+def _value_size(value) -> int:
+    # оценка занимаемой памяти по размеру pickle: грубо, но пропорционально объёму
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# результаты отчётов: LRU с лимитом в байтах; устаревание — через версию данных в ключе
+_reports = LRUCache(maxsize=DEFAULT_REPORT_MAX_MB * 1024 * 1024, getsizeof=_value_size)
+_report_stats = {"hits": 0, "misses": 0, "too_large": 0}
+
+
+def load_cache_config(path: str) -> dict:
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    if not config.has_section("cache"):
+        return {"ttl": DEFAULT_TTL, "maxsize": DEFAULT_MAXSIZE, "report_max_mb": DEFAULT_REPORT_MAX_MB}
+
+    section = config["cache"]
+    return {
+        "ttl": section.getint("ttl", DEFAULT_TTL),
+        "maxsize": section.getint("maxsize", DEFAULT_MAXSIZE),
+        "report_max_mb": section.getint("report_max_mb", DEFAULT_REPORT_MAX_MB),
+    }
+
+
+def configure(
+    ttl: int = DEFAULT_TTL,
+    maxsize: int = DEFAULT_MAXSIZE,
+    report_max_mb: int = DEFAULT_REPORT_MAX_MB,
+) -> None:
+    # повторный вызов с теми же настройками (API, нагрузочный прогон) не сбрасывает накопленное
+    global _cache, _reports, _epoch
+    with _lock:
+        if (_cache.ttl, _cache.maxsize) != (ttl, maxsize):
+            _epoch += 1
+            _cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        report_bytes = report_max_mb * 1024 * 1024
+        if _reports.maxsize != report_bytes:
+            _reports = LRUCache(maxsize=report_bytes, getsizeof=_value_size)
+
+
+def _lookup(key):
+    with _lock:
+        value = _cache.get(key, _MISSING)
+        if value is not _MISSING:
+            _stats["hits"] += 1
+            return value, None
+        _stats["misses"] += 1
+        return _MISSING, (_epoch, _generations.get(key[0], 0))
+
+
+def _store(key, value, generation) -> None:
+    with _lock:
+        if (_epoch, _generations.get(key[0], 0)) == generation:
+            _cache[key] = value
+
+
+def cached(namespace: str):
+    # результат отдаётся вызывающему как есть — не изменяйте его на месте
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (namespace, args, tuple(sorted(kwargs.items())))
+            value, generation = _lookup(key)
+            if value is not _MISSING:
+                return value
+            value = func(*args, **kwargs)
+            _store(key, value, generation)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def _freeze(value):
+    # списки и множества в аргументах — в хешируемый вид для ключа
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+def versioned(namespace: str, version):
+    # version() — дешёвый токен версии исходных данных; он входит в ключ,
+    # поэтому после изменения данных старые записи просто перестают находиться
+    # и вытесняются LRU. Параметры нормализуются: позиционные и именованные
+    # аргументы, а также значения по умолчанию дают один и тот же ключ
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # версия читается до расчёта: данные, закоммиченные позже, получат новый ключ
+            params = tuple(sorted((k, _freeze(v)) for k, v in bound.arguments.items()))
+            key = (namespace, params, version())
+
+            with _lock:
+                value = _reports.get(key, _MISSING)
+                if value is not _MISSING:
+                    _report_stats["hits"] += 1
+                    return value
+                _report_stats["misses"] += 1
+
+            value = func(*args, **kwargs)
+            with _lock:
+                try:
+                    _reports[key] = value
+                except ValueError:
+                    # один результат больше всего лимита — не кэшируем
+                    _report_stats["too_large"] += 1
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*namespaces: str) -> None:
+    with _lock:
+        for ns in namespaces:
+            _generations[ns] = _generations.get(ns, 0) + 1
+        for key in [k for k in _cache.keys() if k[0] in namespaces]:
+            _cache.pop(key, None)
+        _stats["invalidations"] += 1
+
+
+def clear_reports() -> None:
+    # после изменения исходных данных все записи отчётов — под прежней версией, освобождаем память сразу
+    with _lock:
+        _reports.clear()
+
+
+def clear() -> None:
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _cache.clear()
+        _reports.clear()
+
+
+def cache_stats() -> dict:
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_ratio": _stats["hits"] / total if total else 0.0,
+            "size": len(_cache),
+            "maxsize": _cache.maxsize,
+            "ttl": _cache.ttl,
+        }
+
+
+def report_cache_stats() -> dict:
+    with _lock:
+        total = _report_stats["hits"] + _report_stats["misses"]
+        return {
+            **_report_stats,
+            "hit_ratio": _report_stats["hits"] / total if total else 0.0,
+            "entries": len(_reports),
+            "bytes": _reports.currsize,
+            "max_bytes": _reports.maxsize,
+        }
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+from collections import Counter
+
+import altair as alt
+import pandas as pd
+from cachetools import LRUCache
+
+# столбцов в разрезе не больше этого: остальные сворачиваются в одну строку
+CHART_TOP_N = 30
+CHART_CACHE_SIZE = 64
+BAR_HEIGHT = 18
+OTHERS = "Остальные"
+
+# готовые vega-lite спецификации: браузер рисует сам, на сервере фигур не остаётся
+_lock = threading.Lock()
+_charts = LRUCache(maxsize=CHART_CACHE_SIZE)
+_stats = {"hits": 0, "misses": 0}
+
+
+def _data_key(kind: str, df: pd.DataFrame, *params) -> tuple:
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return (kind, digest.hexdigest(), params)
+
+
+def _cached_spec(key: tuple, build) -> dict:
+    with _lock:
+        spec = _charts.get(key)
+        if spec is not None:
+            _stats["hits"] += 1
+            return spec
+        _stats["misses"] += 1
+
+    spec = build()
+    with _lock:
+        _charts[key] = spec
+    return spec
+
+
+def chart_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_charts)}
+
+
+def name_labels(ids: list, names: dict) -> list[str]:
+    # подписи — имена; однофамильцам добавляется id, иначе их строки/столбцы слились бы
+    counts = Counter(names[i] for i in ids)
+    return [f"{names[i]} (id {i})" if counts[names[i]] > 1 else names[i] for i in ids]
+
+
+def top_n(df: pd.DataFrame, n: int = CHART_TOP_N) -> pd.DataFrame:
+    # первые n по числу оценок; хвост — одна строка со средним, взвешенным по числу оценок.
+    # label — по строке на id: одноимённые группы и однофамильцы не сливаются в один столбец
+    df = df.assign(label=name_labels(df["id"].tolist(), dict(zip(df["id"], df["name"]))))
+    columns = ["id", "label", "name", "avg", "count"]
+    if len(df) <= n:
+        return df[columns]
+
+    df = df.sort_values("count", ascending=False, kind="stable")
+    head, rest = df.iloc[:n], df.iloc[n:]
+    cnt = int(rest["count"].sum())
+    avg = float((rest["avg"] * rest["count"]).sum() / cnt) if cnt else 0.0
+    title = f"{OTHERS} ({len(rest)})"
+    others = pd.DataFrame([{"id": None, "label": title, "name": title, "avg": avg, "count": cnt}])
+    return pd.concat([head[columns], others], ignore_index=True)
+
+
+def slice_chart_spec(df: pd.DataFrame, group_by: str, title: str) -> dict:
+    return _cached_spec(
+        _data_key("slice", df, group_by, title),
+        lambda: _slice_chart(df, group_by, title).to_dict(),
+    )
+
+
+def _slice_chart(df: pd.DataFrame, group_by: str, title: str) -> alt.Chart:
+    avg_axis = alt.Y("avg:Q", title="Средний балл", scale=alt.Scale(zero=False))
+    tooltip = [alt.Tooltip("avg:Q", title="Средний", format=".2f"), alt.Tooltip("count:Q", title="Оценок")]
+
+    if group_by == "year":
+        data = df[["key", "avg", "count"]]
+        return (
+            alt.Chart(data, title=title)
+            .mark_line(point=True)
+            .encode(x=alt.X("key:O", title="Год"), y=avg_axis, tooltip=["key:O", *tooltip])
+        )
+
+    # горизонтальные столбцы: подписи не наезжают друг на друга при любом их числе
+    data = top_n(df)
+    others = data["id"].isna() & data["label"].str.startswith(OTHERS)
+    order = data.loc[~others].sort_values("avg", ascending=False)["label"].tolist() + data.loc[others, "label"].tolist()
+    return (
+        alt.Chart(data, title=title, height=BAR_HEIGHT * len(data))
+        .mark_bar()
+        .encode(
+            y=alt.Y("label:N", title=None, sort=order),
+            x=alt.X("avg:Q", title="Средний балл"),
+            tooltip=[alt.Tooltip("name:N", title="Название"), alt.Tooltip("id:Q", title="id"), *tooltip],
+        )
+    )
+
+
+def series_chart_spec(df: pd.DataFrame, window: int) -> dict:
+    return _cached_spec(
+        _data_key("series", df, window),
+        lambda: _series_chart(df, window).to_dict(),
+    )
+
+
+def _series_chart(df: pd.DataFrame, window: int) -> alt.LayerChart:
+    # число точек уже ограничено в запросе (repos.reports.MAX_SERIES_POINTS)
+    data = df.assign(bucket=pd.to_datetime(df["bucket"]))
+    base = alt.Chart(data).encode(x=alt.X("bucket:T", title=None))
+    tooltip = [
+        alt.Tooltip("bucket:T", title="Период"),
+        alt.Tooltip("avg:Q", title="Средний", format=".2f"),
+        alt.Tooltip("moving_avg:Q", title="Скользящее", format=".2f"),
+        alt.Tooltip("count:Q", title="Оценок"),
+    ]
+
+    avg = base.mark_line(point=True, opacity=0.6).encode(
+        y=alt.Y("avg:Q", title="Средний балл", scale=alt.Scale(zero=False)), tooltip=tooltip
+    )
+    moving = base.mark_line(strokeWidth=2, color="orange").encode(y="moving_avg:Q")
+    cum = base.mark_line(interpolate="step-after", color="gray", opacity=0.5).encode(
+        y=alt.Y("cum_count:Q", title="Оценок нарастающим итогом")
+    )
+    return (
+        alt.layer(avg + moving, cum, title=f"Средний балл и скользящее среднее ({window})")
+        .resolve_scale(y="independent")
+        .properties(height=320)
+    )
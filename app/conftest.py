@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+# тесты с PostgreSQL: путь к config.ini одноразовой базы (её схема мигрируется, данные меняются).
+# Без переменной такие тесты пропускаются
+TEST_CONFIG_ENV = "COURSE_DB_TEST_CONFIG"
+
+
+@pytest.fixture(scope="session")
+def database():
+    config_path = os.environ.get(TEST_CONFIG_ENV)
+    if not config_path:
+        pytest.skip(f"нужна тестовая база PostgreSQL: {TEST_CONFIG_ENV}=путь к config.ini")
+
+    from db import init_db
+    from migrate import migrate
+
+    init_db(config_path)
+    migrate()
+    return config_path
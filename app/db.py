@@ -1,11 +1,76 @@
 import configparser
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.exc import SQLAlchemyError
+import itertools
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from metrics import instrument_engine, record_wait
 
 Base = declarative_base()
 engine = None
 SessionLocal = None
+# реплики только для чтения ([replicas] в config.ini); пусто — всё читается с primary
+read_engines: list = []
+ReadSessionLocal = None
+
+# реплика, которая потеряла соединение, пропускается на это время
+REPLICA_RETRY_S = 30
+
+DRIVERS = {
+    "pg8000": "postgresql+pg8000",
+    "psycopg": "postgresql+psycopg",
+}
+
+POOL_DEFAULTS = {
+    "size": 5,
+    "max_overflow": 10,
+    "timeout": 30,
+    "recycle": 1800,
+    "pre_ping": True,
+}
+
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool, который считает время ожидания соединения при checkout
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+            "peak_checked_out": 0,
+        }
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            record_wait(waited)
+            with self.stats_lock:
+                if timed_out:
+                    self.stats["timeouts"] += 1
+                else:
+                    self.stats["checkouts"] += 1
+                self.stats["wait_total_s"] += waited
+                self.stats["wait_max_s"] = max(self.stats["wait_max_s"], waited)
+                self.stats["peak_checked_out"] = max(
+                    self.stats["peak_checked_out"], self.checkedout()
+                )
+
 
 def load_db_config(path: str = "../config.ini") -> dict:
     config = configparser.ConfigParser()
@@ -14,27 +79,219 @@ def load_db_config(path: str = "../config.ini") -> dict:
         raise RuntimeError(f"Не удалось прочитать файл конфигурации: {path}")
 
     db = config["db"]
+    pool = config["pool"] if config.has_section("pool") else {}
+
+    replicas = config["replicas"] if config.has_section("replicas") else {}
+
+    driver = db.get("driver", "pg8000")
+    if driver not in DRIVERS:
+        raise RuntimeError(f"Неизвестный драйвер БД: {driver} (допустимо: {', '.join(DRIVERS)})")
+
     return {
         "host": db.get("host", "localhost"),
         "port": db.getint("port", 5432),
         "dbname": db["dbname"],
         "user": db["user"],
         "password": db["password"],
+        "driver": driver,
+        "statement_timeout_ms": db.getint("statement_timeout_ms", 0),
+        "pool": {
+            "size": int(pool.get("size", POOL_DEFAULTS["size"])),
+            "max_overflow": int(pool.get("max_overflow", POOL_DEFAULTS["max_overflow"])),
+            "timeout": float(pool.get("timeout", POOL_DEFAULTS["timeout"])),
+            "recycle": int(pool.get("recycle", POOL_DEFAULTS["recycle"])),
+            "pre_ping": str(pool.get("pre_ping", POOL_DEFAULTS["pre_ping"])).lower()
+            in ("1", "true", "yes", "on"),
+        },
+        "replicas": [u.strip() for u in replicas.get("urls", "").split(",") if u.strip()],
     }
 
-def init_db(config_path: str = "../config.ini") -> None:
-    global engine, SessionLocal
 
-    cfg = load_db_config(config_path)
+def replica_config(cfg: dict, url: str) -> dict:
+    # postgresql://[user[:password]@]host[:port][/dbname]; чего нет в URL — берётся из [db]
+    u = make_url(url)
+    return {
+        **cfg,
+        "host": u.host or cfg["host"],
+        "port": u.port or cfg["port"],
+        "dbname": u.database or cfg["dbname"],
+        "user": u.username or cfg["user"],
+        "password": u.password if u.password is not None else cfg["password"],
+        "replicas": [],
+    }
+
 
-    database_url = (
-        f"postgresql+pg8000://{cfg['user']}:{cfg['password']}"
+def build_database_url(cfg: dict, driver: str | None = None) -> str:
+    return (
+        f"{DRIVERS[driver or cfg['driver']]}://{cfg['user']}:{cfg['password']}"
         f"@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
     )
 
-    engine = create_engine(database_url, echo=False, future=True)
+
+# statement_timeout из [db] — для запросов страниц. Долгие служебные операции (миграции, импорт,
+# пересборка и сверка rollup, выгрузка) снимают его до конца своей транзакции;
+# SET LOCAL не остаётся на соединении, вернувшемся в пул
+NO_STATEMENT_TIMEOUT = "SET LOCAL statement_timeout = 0"
+
+
+def create_db_engine(cfg: dict, driver: str | None = None):
+    pool = cfg["pool"]
+    new_engine = create_engine(
+        build_database_url(cfg, driver),
+        echo=False,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool["size"],
+        max_overflow=pool["max_overflow"],
+        pool_timeout=pool["timeout"],
+        pool_recycle=pool["recycle"],
+        pool_pre_ping=pool["pre_ping"],
+    )
+    instrument_engine(new_engine)
+
+    timeout_ms = cfg["statement_timeout_ms"]
+    if timeout_ms:
+        @event.listens_for(new_engine, "connect")
+        def _set_statement_timeout(dbapi_conn, connection_record):
+            cursor = dbapi_conn.cursor()
+            cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+            cursor.close()
+            dbapi_conn.commit()
+
+    return new_engine
+
+
+class _ReadRouting:
+    # Чтение с реплики допускается, только если она воспроизвела WAL не раньше floor_lsn.
+    # floor_lsn — позиция WAL primary после последнего коммита этого процесса и после
+    # последнего чтения версий данных (repos.versions): так сессия, которая только что
+    # записала, видит свою запись, а кэши процесса не заполняются отставшими данными
+    def __init__(self, count: int):
+        self.lock = threading.Lock()
+        self.floor_lsn = 0
+        self.replayed = [0] * count
+        self.down_until = [0.0] * count
+        self.next = itertools.count()
+
+
+_routing = _ReadRouting(0)
+
+# позиция WAL числом: разность pg_lsn — байты от начала
+WAL_LSN_EXPR = "(pg_current_wal_lsn() - '0/0'::pg_lsn)::bigint"
+REPLAY_LSN_SQL = (
+    "SELECT (CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() "
+    "ELSE pg_current_wal_lsn() END - '0/0'::pg_lsn)::bigint"
+)
+
+
+def require_lsn(lsn: int) -> None:
+    with _routing.lock:
+        _routing.floor_lsn = max(_routing.floor_lsn, lsn)
+
+
+# флаг в info соединения пула: на нём закоммичена запись
+WROTE_KEY = "wal_wrote"
+
+
+def note_write(conn) -> None:
+    # перед коммитом записи на primary: Connection или DBAPI-соединение из пула (get_raw_connection).
+    # Позицию WAL прочтёт _read_commit_lsn на этом же соединении, когда оно вернётся в пул
+    if read_engines:
+        conn.info[WROTE_KEY] = True
+
+
+def _on_commit(conn) -> None:
+    # ORM-сессии и engine.begin(): событие commit движка primary
+    note_write(conn)
+
+
+def _read_commit_lsn(dbapi_conn, connection_record, reset_state) -> None:
+    # возврат в пул — уже после COMMIT: позиция WAL не раньше записи коммита, так что реплика,
+    # воспроизведшая её, видит эту запись. Следующие чтения — не с реплик, отставших от неё
+    if connection_record is None or not connection_record.info.pop(WROTE_KEY, False):
+        return
+    if reset_state.terminate_only or not reset_state.asyncio_safe:
+        return
+    if not reset_state.transaction_was_reset:
+        dbapi_conn.rollback()
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute("SELECT " + WAL_LSN_EXPR)
+        lsn = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    # SELECT открыл транзакцию, а пул после коммита откат уже не делает
+    dbapi_conn.rollback()
+    require_lsn(lsn)
+
+
+def _replica_failed(index: int):
+    def handle_error(context):
+        if context.is_disconnect:
+            with _routing.lock:
+                _routing.down_until[index] = time.monotonic() + REPLICA_RETRY_S
+
+    return handle_error
+
+
+def _replayed_lsn(index: int) -> int:
+    try:
+        with read_engines[index].connect() as conn:
+            lsn = conn.execute(text(REPLAY_LSN_SQL)).scalar() or 0
+    except SQLAlchemyError:
+        with _routing.lock:
+            _routing.down_until[index] = time.monotonic() + REPLICA_RETRY_S
+        return -1
+
+    with _routing.lock:
+        _routing.replayed[index] = max(_routing.replayed[index], lsn)
+    return lsn
+
+
+def get_read_engine():
+    # реплика по кругу среди доступных и догнавших floor_lsn, иначе primary
+    if engine is None:
+        raise RuntimeError("DB не инициализирована")
+
+    start = next(_routing.next)
+    now = time.monotonic()
+    for i in range(len(read_engines)):
+        index = (start + i) % len(read_engines)
+        with _routing.lock:
+            if _routing.down_until[index] > now:
+                continue
+            floor = _routing.floor_lsn
+            caught_up = _routing.replayed[index] >= floor
+        if caught_up or _replayed_lsn(index) >= floor:
+            return read_engines[index]
+    return engine
+
+
+def init_db(config_path: str = "../config.ini", driver: str | None = None) -> None:
+    global engine, SessionLocal, read_engines, ReadSessionLocal, _routing
+
+    cfg = load_db_config(config_path)
+
+    if engine is not None:
+        engine.dispose()
+    for e in read_engines:
+        e.dispose()
+
+    engine = create_db_engine(cfg, driver)
+    read_engines = [create_db_engine(replica_config(cfg, url), driver) for url in cfg["replicas"]]
+    for index, e in enumerate(read_engines):
+        event.listen(e, "handle_error", _replica_failed(index))
+    # floor_lsn — состояние процесса, а не движков: повторный init_db не должен открыть чтение
+    # с реплики, ещё не догнавшей уже сделанные записи
+    floor = _routing.floor_lsn
+    _routing = _ReadRouting(len(read_engines))
+    _routing.floor_lsn = floor
 
     SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False)
+    if read_engines:
+        event.listen(engine, "commit", _on_commit)
+        event.listen(engine.pool, "reset", _read_commit_lsn)
 
     try:
         with engine.connect() as conn:
@@ -43,7 +300,60 @@ def init_db(config_path: str = "../config.ini") -> None:
         engine.dispose()
         raise RuntimeError(f"Не удалось подключиться к БД: {e}") from e
 
+    # недоступная реплика не мешает старту: чтение уйдёт на primary
+    for index in range(len(read_engines)):
+        _replayed_lsn(index)
+
+
+def get_pool_stats() -> dict:
+    if engine is None:
+        raise RuntimeError("DB не инициализирована")
+
+    pool = engine.pool
+    capacity = pool.size() + pool._max_overflow
+    with pool.stats_lock:
+        stats = dict(pool.stats)
+
+    checked_out = pool.checkedout()
+    return {
+        "driver": engine.dialect.driver,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "utilization": checked_out / capacity if capacity else 0.0,
+        "peak_utilization": stats["peak_checked_out"] / capacity if capacity else 0.0,
+        "avg_wait_ms": stats["wait_total_s"] / stats["checkouts"] * 1000 if stats["checkouts"] else 0.0,
+        "max_wait_ms": stats["wait_max_s"] * 1000,
+        **stats,
+    }
+
+
 def get_session():
+    # primary: запись и чтение, которому нужна самая свежая картина
     if SessionLocal is None:
         raise RuntimeError("DB не инициализирована")
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
+
+
+def get_read_session() -> Session:
+    # списки и отчёты: реплика, если она не отстала от floor_lsn, иначе primary
+    if SessionLocal is None:
+        raise RuntimeError("DB не инициализирована")
+    if not read_engines:
+        return SessionLocal()
+    return ReadSessionLocal(bind=get_read_engine())
+
+
+def get_raw_connection():
+    # DBAPI-соединение из пула — для COPY и прочего, чего нет в ORM
+    if engine is None:
+        raise RuntimeError("DB не инициализирована")
+    return engine.raw_connection()
+
+
+def get_engine():
+    if engine is None:
+        raise RuntimeError("DB не инициализирована")
+    return engine
@@ -0,0 +1,176 @@
+import csv
+import io
+from datetime import date
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import aliased
+
+from db import NO_STATEMENT_TIMEOUT, get_read_engine
+from models import Group, Mark, Person, Subject
+from repos.people import full_name_expr
+
+EXPORT_CHUNK_ROWS = 10_000
+# предел строк листа Excel вместе с заголовком; больше — продолжение на следующем листе
+XLSX_MAX_ROWS = 1_048_576
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("mark_date", pa.date32()),
+    ("value", pa.int32()),
+    ("student_id", pa.int64()),
+    ("student_name", pa.string()),
+    ("group_name", pa.string()),
+    ("subject_id", pa.int64()),
+    ("subject_name", pa.string()),
+    ("teacher_id", pa.int64()),
+    ("teacher_name", pa.string()),
+])
+
+EXPORT_COLUMNS = EXPORT_SCHEMA.names
+
+
+def export_stmt(
+    date_from: date,
+    date_to: date,
+    group_id: int | None = None,
+    subject_id: int | None = None,
+):
+    StudentA = aliased(Person)
+    TeacherA = aliased(Person)
+
+    stmt = (
+        select(
+            Mark.id.label("id"),
+            Mark.mark_date.label("mark_date"),
+            Mark.value.label("value"),
+            Mark.student_id.label("student_id"),
+            full_name_expr(StudentA).label("student_name"),
+            Group.name.label("group_name"),
+            Mark.subject_id.label("subject_id"),
+            Subject.name.label("subject_name"),
+            Mark.teacher_id.label("teacher_id"),
+            full_name_expr(TeacherA).label("teacher_name"),
+        )
+        .select_from(Mark)
+        .join(StudentA, StudentA.id == Mark.student_id)
+        .join(TeacherA, TeacherA.id == Mark.teacher_id)
+        .join(Subject, Subject.id == Mark.subject_id)
+        .join(Group, Group.id == StudentA.group_id, isouter=True)
+        .where(Mark.mark_date >= date_from, Mark.mark_date <= date_to)
+        .order_by(Mark.mark_date, Mark.id)
+    )
+    if group_id is not None:
+        stmt = stmt.where(StudentA.group_id == group_id)
+    if subject_id is not None:
+        stmt = stmt.where(Mark.subject_id == subject_id)
+    return stmt
+
+
+def count_marks(
+    date_from: date,
+    date_to: date,
+    group_id: int | None = None,
+    subject_id: int | None = None,
+) -> int:
+    # размер выгрузки до её формирования
+    stmt = export_stmt(date_from, date_to, group_id, subject_id).order_by(None)
+    with get_read_engine().connect() as conn:
+        conn.execute(text(NO_STATEMENT_TIMEOUT))
+        return conn.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+
+
+def xlsx_sheet_count(rows: int) -> int:
+    per_sheet = XLSX_MAX_ROWS - 1
+    return max(1, -(-rows // per_sheet))
+
+
+def iter_chunks(stmt, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[list[tuple]]:
+    # серверный курсор: в памяти не больше chunk_rows строк независимо от объёма выгрузки
+    with get_read_engine().connect() as conn:
+        # выгрузка за годы дольше statement_timeout страниц
+        conn.execute(text(NO_STATEMENT_TIMEOUT))
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(stmt)
+        for part in result.partitions():
+            yield [tuple(r) for r in part]
+
+
+def _write_csv(chunks, out) -> int:
+    # out — бинарный поток; TextIOWrapper отсоединяется, чтобы не закрыть его
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text, delimiter=";")
+    writer.writerow(EXPORT_COLUMNS)
+    total = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        total += len(rows)
+    text.flush()
+    text.detach()
+    return total
+
+
+def _write_parquet(chunks, out) -> int:
+    total = 0
+    with pq.ParquetWriter(out, EXPORT_SCHEMA) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            batch = pa.record_batch(
+                [pa.array(col, type=f.type) for col, f in zip(columns, EXPORT_SCHEMA)],
+                schema=EXPORT_SCHEMA,
+            )
+            writer.write_batch(batch)
+            total += len(rows)
+    return total
+
+
+def _write_xlsx(chunks, out) -> int:
+    # write_only: строки сразу уходят во временный xml листа, а не в объектную модель.
+    # Excel не открывает лист длиннее XLSX_MAX_ROWS: остаток идёт на листы marks_2, marks_3, ...
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("marks")
+    ws.append(EXPORT_COLUMNS)
+    sheet_rows = 1
+    total = 0
+    for rows in chunks:
+        for r in rows:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                ws = wb.create_sheet(f"marks_{len(wb.worksheets) + 1}")
+                ws.append(EXPORT_COLUMNS)
+                sheet_rows = 1
+            ws.append(r)
+            sheet_rows += 1
+        total += len(rows)
+    wb.save(out)
+    return total
+
+
+WRITERS = {
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+    "xlsx": _write_xlsx,
+}
+
+
+def export_marks(
+    fmt: str,
+    out,
+    date_from: date,
+    date_to: date,
+    group_id: int | None = None,
+    subject_id: int | None = None,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> int:
+    if fmt not in WRITERS:
+        raise ValueError(f"fmt must be one of: {', '.join(WRITERS)}")
+
+    stmt = export_stmt(date_from, date_to, group_id, subject_id)
+    return WRITERS[fmt](iter_chunks(stmt, chunk_rows), out)
@@ -0,0 +1,515 @@
+import csv
+import io
+import re
+from datetime import date, datetime
+from typing import Iterator
+
+from cache import invalidate
+from db import NO_STATEMENT_TIMEOUT, get_raw_connection, note_write
+from partitions import ensure_partitions_for
+
+COPY_CHUNK_ROWS = 50_000
+# импорты идут по одному: сопоставление с существующими строками без уникальных ключей
+IMPORT_LOCK_ID = 720_251_003
+MAX_REPORTED_ERRORS = 10_000
+
+GROUP_NAME_RE = re.compile(r"_(\d{4})$")
+
+# колонки файла для каждого вида импорта; staging-таблица получает их же + row_no
+IMPORT_KINDS = {
+    "groups": ["name"],
+    "subjects": ["name"],
+    "people": ["last_name", "first_name", "father_name", "type", "group"],
+    "marks": ["student", "group", "subject", "teacher", "value", "mark_date"],
+}
+
+REQUIRED_COLUMNS = {
+    "groups": {"name"},
+    "subjects": {"name"},
+    "people": {"last_name", "first_name", "type"},
+    "marks": {"student", "subject", "teacher", "value", "mark_date"},
+}
+
+
+def _clean(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = " ".join(str(value).split())
+    return text or None
+
+
+def _parse_int(value) -> int:
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return int(str(value).strip())
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Некорректная дата: {text}")
+
+
+def _validate_group_name(name: str | None) -> str:
+    # те же правила, что в trg_validate_group_name_before_ins_upd
+    if not name:
+        raise ValueError("Поле name не может быть пустым")
+    if not GROUP_NAME_RE.search(name):
+        raise ValueError("Имя группы должно оканчиваться годом _YYYY")
+    if len(name) < 6:
+        raise ValueError("name слишком короткое (минимум 6 символов: ._YYYY)")
+    return name
+
+
+def _stage_groups(rec: dict) -> tuple:
+    return (_validate_group_name(_clean(rec.get("name"))),)
+
+
+def _stage_subjects(rec: dict) -> tuple:
+    name = _clean(rec.get("name"))
+    if not name:
+        raise ValueError("Поле name не может быть пустым")
+    return (name,)
+
+
+def _stage_people(rec: dict) -> tuple:
+    # те же правила, что в trg_validate_people_rows
+    last_name = _clean(rec.get("last_name"))
+    first_name = _clean(rec.get("first_name"))
+    father_name = _clean(rec.get("father_name"))
+    person_type = (_clean(rec.get("type")) or "").upper()
+    group = _clean(rec.get("group"))
+
+    if not last_name:
+        raise ValueError("Фамилия (last_name) не может быть пустой")
+    if not first_name:
+        raise ValueError("Имя (first_name) не может быть пустым")
+    if person_type not in ("S", "P"):
+        raise ValueError("type должен быть 'S' (студент) или 'P' (преподаватель)")
+    if person_type == "S" and not group:
+        raise ValueError("Для студента (type='S') группа обязательна")
+    if person_type == "P" and group:
+        raise ValueError("Для преподавателя (type='P') группа должна быть пустой")
+
+    return (last_name, first_name, father_name, person_type, group)
+
+
+def _stage_marks(rec: dict) -> tuple:
+    student = _clean(rec.get("student"))
+    group = _clean(rec.get("group"))
+    subject = _clean(rec.get("subject"))
+    teacher = _clean(rec.get("teacher"))
+
+    if not student:
+        raise ValueError("Поле student не может быть пустым")
+    if not subject:
+        raise ValueError("Поле subject не может быть пустым")
+    if not teacher:
+        raise ValueError("Поле teacher не может быть пустым")
+
+    try:
+        value = _parse_int(rec.get("value"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Некорректная оценка: {rec.get('value')}")
+    if not 1 <= value <= 5:
+        raise ValueError("Значение value (оценка) должно быть в диапазоне между 1 и 5")
+
+    if rec.get("mark_date") in (None, ""):
+        raise ValueError("Поле mark_date не может быть пустым")
+    mark_date = _parse_date(rec.get("mark_date"))
+
+    return (student, group, subject, teacher, value, mark_date.isoformat())
+
+
+STAGERS = {
+    "groups": _stage_groups,
+    "subjects": _stage_subjects,
+    "people": _stage_people,
+    "marks": _stage_marks,
+}
+
+STAGE_DDL = {
+    "groups": "name text",
+    "subjects": "name text",
+    "people": (
+        "last_name text, first_name text, father_name text, type char(1), "
+        "group_name text, group_id integer"
+    ),
+    "marks": (
+        "student text, group_name text, subject text, teacher text, value integer, "
+        "mark_date date, student_id integer, subject_id integer, teacher_id integer, mark_id bigint"
+    ),
+}
+
+STAGE_COLUMNS = {
+    "groups": "name",
+    "subjects": "name",
+    "people": "last_name, first_name, father_name, type, group_name",
+    "marks": "student, group_name, subject, teacher, value, mark_date",
+}
+
+
+def _iter_csv(fileobj) -> Iterator[tuple[int, dict]]:
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(text, dialect)
+    header = [h.strip().lower() for h in next(reader, [])]
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        yield line_no, dict(zip(header, row))
+
+
+def _iter_xlsx(fileobj) -> Iterator[tuple[int, dict]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip().lower() if h is not None else "" for h in next(rows, ())]
+        for line_no, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            yield line_no, dict(zip(header, row))
+    finally:
+        wb.close()
+
+
+def iter_records(fileobj, filename: str) -> Iterator[tuple[int, dict]]:
+    if filename.lower().endswith(".xlsx"):
+        return _iter_xlsx(fileobj)
+    return _iter_csv(fileobj)
+
+
+def _copy_chunk(cursor, kind: str, buf: io.StringIO) -> None:
+    sql = f"COPY import_stage (row_no, {STAGE_COLUMNS[kind]}) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, "copy"):
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buf.getvalue())
+    else:
+        # pg8000
+        buf.seek(0)
+        cursor.execute(sql, stream=buf)
+
+
+def _stage_file(cursor, kind: str, records, errors: list) -> int:
+    stage = STAGERS[kind]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buffered = 0
+    total = 0
+
+    for row_no, rec in records:
+        total += 1
+        try:
+            staged = stage(rec)
+        except ValueError as e:
+            errors.append({"row": row_no, "error": str(e)})
+            continue
+
+        writer.writerow((row_no, *staged))
+        buffered += 1
+
+        if buffered >= COPY_CHUNK_ROWS:
+            _copy_chunk(cursor, kind, buf)
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            buffered = 0
+
+    if buffered:
+        _copy_chunk(cursor, kind, buf)
+
+    return total
+
+
+def _collect_errors(cursor, sql: str, errors: list) -> None:
+    cursor.execute(sql)
+    for row_no, message in cursor.fetchall():
+        errors.append({"row": row_no, "error": message})
+
+
+def _upsert_groups(cursor, errors: list) -> tuple[int, int]:
+    cursor.execute(
+        """
+        WITH ins AS (
+            INSERT INTO groups (name)
+            SELECT DISTINCT name FROM import_stage
+            ON CONFLICT (name) DO NOTHING
+            RETURNING 1
+        )
+        SELECT count(*) FROM ins
+        """
+    )
+    return cursor.fetchone()[0], 0
+
+
+def _upsert_subjects(cursor, errors: list) -> tuple[int, int]:
+    cursor.execute(
+        """
+        WITH ins AS (
+            INSERT INTO subjects (name)
+            SELECT DISTINCT name FROM import_stage
+            ON CONFLICT (name) DO NOTHING
+            RETURNING 1
+        )
+        SELECT count(*) FROM ins
+        """
+    )
+    return cursor.fetchone()[0], 0
+
+
+def _upsert_people(cursor, errors: list) -> tuple[int, int]:
+    cursor.execute(
+        """
+        UPDATE import_stage s
+        SET group_id = g.id
+        FROM groups g
+        WHERE g.name = s.group_name
+        """
+    )
+    _collect_errors(
+        cursor,
+        """
+        SELECT row_no, 'Группа "' || group_name || '" не найдена'
+        FROM import_stage
+        WHERE type = 'S' AND group_id IS NULL
+        ORDER BY row_no
+        """,
+        errors,
+    )
+    # повторы в файле сводятся в staging, уже существующие люди пропускаются (people_natural_key_idx)
+    cursor.execute(
+        """
+        WITH ins AS (
+            INSERT INTO people (last_name, first_name, father_name, type, group_id)
+            SELECT DISTINCT ON (type, last_name, first_name,
+                                coalesce(father_name, ''), coalesce(group_id, 0))
+                   last_name, first_name, father_name, type, group_id
+            FROM import_stage s
+            WHERE (s.type = 'P' OR s.group_id IS NOT NULL)
+              AND NOT EXISTS (
+                  SELECT 1 FROM people p
+                  WHERE p.type = s.type
+                    AND p.last_name = s.last_name
+                    AND p.first_name = s.first_name
+                    AND coalesce(p.father_name, '') = coalesce(s.father_name, '')
+                    AND coalesce(p.group_id, 0) = coalesce(s.group_id, 0)
+              )
+            ORDER BY type, last_name, first_name,
+                     coalesce(father_name, ''), coalesce(group_id, 0), row_no
+            RETURNING 1
+        )
+        SELECT count(*) FROM ins
+        """
+    )
+    return cursor.fetchone()[0], 0
+
+
+def _resolve_people(cursor, id_column: str, name_column: str, person_type: str, by_group: bool) -> None:
+    # имя считается однозначным, только если найден ровно один человек
+    group_cond = (
+        "AND (s.group_name IS NULL OR g.name = s.group_name)" if by_group else ""
+    )
+    cursor.execute(
+        f"""
+        UPDATE import_stage t
+        SET {id_column} = m.person_id
+        FROM (
+            SELECT s.row_no, min(p.id) AS person_id
+            FROM import_stage s
+            JOIN people p
+              ON p.type = '{person_type}'
+             AND concat_ws(' ', p.last_name, p.first_name, nullif(p.father_name, ''))
+                 = s.{name_column}
+            LEFT JOIN groups g ON g.id = p.group_id
+            WHERE true {group_cond}
+            GROUP BY s.row_no
+            HAVING count(*) = 1
+        ) m
+        WHERE t.row_no = m.row_no
+        """
+    )
+
+
+def _upsert_marks(cursor, errors: list) -> tuple[int, int]:
+    _resolve_people(cursor, "student_id", "student", "S", by_group=True)
+    _resolve_people(cursor, "teacher_id", "teacher", "P", by_group=False)
+    cursor.execute(
+        """
+        UPDATE import_stage s
+        SET subject_id = sb.id
+        FROM subjects sb
+        WHERE sb.name = s.subject
+        """
+    )
+    _collect_errors(
+        cursor,
+        """
+        SELECT row_no,
+               concat_ws('; ',
+                   CASE WHEN student_id IS NULL
+                        THEN 'Студент "' || student || '" не найден или неоднозначен' END,
+                   CASE WHEN subject_id IS NULL
+                        THEN 'Предмет "' || subject || '" не найден' END,
+                   CASE WHEN teacher_id IS NULL
+                        THEN 'Преподаватель "' || teacher || '" не найден или неоднозначен' END)
+        FROM import_stage
+        WHERE student_id IS NULL OR subject_id IS NULL OR teacher_id IS NULL
+        ORDER BY row_no
+        """,
+        errors,
+    )
+    # строка файла — одна оценка. k-я строка с данными (студент, предмет, преподаватель, день)
+    # соответствует k-й по id оценке с теми же данными: повторная загрузка ничего не дублирует,
+    # исправленное значение обновляет оценку, лишние строки добавляются
+    cursor.execute(
+        """
+        UPDATE import_stage t
+        SET mark_id = e.id
+        FROM (
+            SELECT row_no, student_id, subject_id, teacher_id, mark_date,
+                   row_number() OVER (PARTITION BY student_id, subject_id, teacher_id, mark_date
+                                      ORDER BY row_no) AS n
+            FROM import_stage
+            WHERE student_id IS NOT NULL
+              AND subject_id IS NOT NULL
+              AND teacher_id IS NOT NULL
+        ) s
+        JOIN (
+            SELECT m.id, m.student_id, m.subject_id, m.teacher_id, m.mark_date,
+                   row_number() OVER (PARTITION BY m.student_id, m.subject_id, m.teacher_id, m.mark_date
+                                      ORDER BY m.id) AS n
+            FROM marks m
+            JOIN (
+                SELECT DISTINCT student_id, subject_id, teacher_id, mark_date
+                FROM import_stage
+            ) k USING (student_id, subject_id, teacher_id, mark_date)
+        ) e USING (student_id, subject_id, teacher_id, mark_date, n)
+        WHERE t.row_no = s.row_no
+        """
+    )
+    cursor.execute(
+        """
+        UPDATE marks m
+        SET value = s.value
+        FROM import_stage s
+        WHERE m.id = s.mark_id
+          AND m.mark_date = s.mark_date
+          AND m.value IS DISTINCT FROM s.value
+        """
+    )
+    updated = cursor.rowcount
+    cursor.execute(
+        """
+        INSERT INTO marks (student_id, subject_id, teacher_id, value, mark_date)
+        SELECT student_id, subject_id, teacher_id, value, mark_date
+        FROM import_stage
+        WHERE student_id IS NOT NULL
+          AND subject_id IS NOT NULL
+          AND teacher_id IS NOT NULL
+          AND mark_id IS NULL
+        ORDER BY row_no
+        """
+    )
+    inserted = cursor.rowcount
+    return inserted, updated
+
+
+UPSERTS = {
+    "groups": _upsert_groups,
+    "subjects": _upsert_subjects,
+    "people": _upsert_people,
+    "marks": _upsert_marks,
+}
+
+INVALIDATES = {
+    "groups": ("groups", "students"),
+    "subjects": ("subjects",),
+    "people": ("students", "teachers"),
+    "marks": (),
+}
+
+
+def import_file(kind: str, fileobj, filename: str) -> dict:
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(IMPORT_KINDS)}")
+
+    records = iter_records(fileobj, filename)
+    first = next(records, None)
+    if first is None:
+        return {"kind": kind, "total": 0, "inserted": 0, "updated": 0,
+                "skipped": 0, "error_count": 0, "errors": []}
+
+    missing = REQUIRED_COLUMNS[kind] - set(first[1])
+    if missing:
+        raise ValueError(f"В файле нет обязательных колонок: {', '.join(sorted(missing))}")
+
+    def all_records():
+        yield first
+        yield from records
+
+    errors: list[dict] = []
+    conn = get_raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(NO_STATEMENT_TIMEOUT)
+        cursor.execute(
+            f"CREATE TEMP TABLE import_stage (row_no integer, {STAGE_DDL[kind]}) ON COMMIT DROP"
+        )
+        total = _stage_file(cursor, kind, all_records(), errors)
+        cursor.execute("ANALYZE import_stage")
+        if kind == "marks":
+            # секции учебных лет из файла — до блокировок импорта, в отдельной короткой транзакции:
+            # иначе ATTACH и внешние ключи секций держали бы marks, people и subjects до конца загрузки.
+            # Транзакция импорта пока трогала только свою временную таблицу
+            cursor.execute("SELECT min(mark_date), max(mark_date) FROM import_stage")
+            ensure_partitions_for(d for d in cursor.fetchone() if d is not None)
+        cursor.execute(f"SELECT pg_advisory_xact_lock({IMPORT_LOCK_ID})")
+        inserted, updated = UPSERTS[kind](cursor, errors)
+        note_write(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if INVALIDATES[kind]:
+        invalidate(*INVALIDATES[kind])
+
+    errors.sort(key=lambda e: e["row"])
+    error_count = len(errors)
+    return {
+        "kind": kind,
+        "total": total,
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": total - error_count - inserted - updated,
+        "error_count": error_count,
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
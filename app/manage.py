@@ -0,0 +1,194 @@
+import argparse
+import sys
+from datetime import date
+
+from db import init_db
+
+
+def cmd_rollup_rebuild(args) -> int:
+    from repos.rollup import rebuild_rollup
+
+    rows = rebuild_rollup()
+    print(f"rollup пересобран: {rows} строк")
+    return 0
+
+
+def cmd_rollup_check(args) -> int:
+    from repos.rollup import check_rollup
+
+    res = check_rollup(limit=args.limit)
+    if res["ok"]:
+        print("rollup согласован с marks")
+        return 0
+
+    for m in res["mismatches"]:
+        print(
+            f"{m['day']} student={m['student_id']} subject={m['subject_id']} "
+            f"teacher={m['teacher_id']}: marks sum/cnt={m['marks_sum']}/{m['marks_cnt']}, "
+            f"rollup sum/cnt={m['rollup_sum']}/{m['rollup_cnt']}"
+        )
+    if res["report_diffs"]:
+        print("отчёт расходится в разрезах: " + ", ".join(res["report_diffs"]))
+    return 1
+
+
+def cmd_migrate(args) -> int:
+    from migrate import migrate, migration_status
+
+    if args.status:
+        for m in migration_status():
+            state = f"применена {m['applied_at']:%Y-%m-%d %H:%M}" if m["applied_at"] else "ожидает"
+            print(f"{m['version']}_{m['name']}: {state}")
+        return 0
+
+    done = migrate(target=args.target)
+    if not done:
+        print("схема актуальна")
+    for name in done:
+        print(f"применена {name}")
+    return 0
+
+
+def cmd_plan_check(args) -> int:
+    from plan_check import run_plan_check
+
+    results = run_plan_check(no_seqscan=args.no_seqscan)
+    failed = [r for r in results if not r["ok"]]
+    for r in results:
+        mark = "ok  " if r["ok"] else "FAIL"
+        scans = f" seq scan: {', '.join(r['seq_scans'])}" if r["seq_scans"] else ""
+        parts = "".join(f", секций {t}: {n}" for t, n in r["partitions"].items())
+        print(f"{mark} {r['name']} (cost {r['cost']}{parts}){scans}")
+
+    print(f"{len(results) - len(failed)}/{len(results)} запросов без seq scan по marks "
+          "и без лишних секций")
+    return 1 if failed else 0
+
+
+def cmd_partitions(args) -> int:
+    from partitions import (
+        academic_year, archive_year, ensure_partitions, list_partitions, restore_year, year_bounds,
+    )
+
+    if args.ensure:
+        current = academic_year(date.today())
+        created = ensure_partitions(year_bounds(current)[0], year_bounds(current + 1)[0])
+        print(f"создано таблиц секций: {created}")
+    if args.archive is not None:
+        archive_year(args.archive)
+        print(f"учебный год {args.archive}/{args.archive + 1} перенесён в архив")
+    if args.restore is not None:
+        restore_year(args.restore)
+        print(f"учебный год {args.restore}/{args.restore + 1} возвращён из архива")
+
+    for p in list_partitions():
+        state = "архив" if p["archived"] else "подключена"
+        print(f"{p['year']}/{p['year'] + 1} ({p['date_from']} — {p['date_to']}): {state}, "
+              f"~{p['rows_estimate']} строк, {p['bytes'] / 2**20:.1f} МБ")
+    return 0
+
+
+def cmd_export_marks(args) -> int:
+    from export import export_marks, xlsx_sheet_count
+
+    with open(args.out, "wb") as out:
+        total = export_marks(
+            args.format,
+            out,
+            args.date_from,
+            args.date_to,
+            group_id=args.group_id,
+            subject_id=args.subject_id,
+        )
+    print(f"выгружено {total} оценок в {args.out}")
+    if args.format == "xlsx" and xlsx_sheet_count(total) > 1:
+        print(f"лист Excel ограничен по числу строк: данные на {xlsx_sheet_count(total)} листах marks, marks_2, ...")
+    return 0
+
+
+def cmd_report_cards(args) -> int:
+    from report_cards import generate_report_cards
+
+    def progress(done: int, total: int) -> None:
+        print(f"\rтабели: {done}/{total}", end="", flush=True)
+
+    result = generate_report_cards(
+        args.date_from,
+        args.date_to,
+        args.out,
+        mode=args.mode,
+        group_id=args.group_id,
+        workers=args.workers,
+        progress=progress,
+    )
+    print(f"\nстудентов: {result['students']}, файлов: {result['files']} в {result['out_dir']}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Служебные команды системы деканата")
+    parser.add_argument("config", help="путь к config.ini")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rollup-rebuild", help="пересобрать marks_daily_rollup из marks")
+    p.set_defaults(func=cmd_rollup_rebuild)
+
+    p = sub.add_parser("rollup-check", help="сверить marks_daily_rollup с marks")
+    p.add_argument("--limit", type=int, default=100, help="сколько расхождений показать")
+    p.set_defaults(func=cmd_rollup_check)
+
+    p = sub.add_parser("migrate", help="применить миграции схемы из migrations/")
+    p.add_argument("--target", help="применить миграции до указанной версии включительно")
+    p.add_argument("--status", action="store_true", help="показать состояние миграций")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("plan-check", help="EXPLAIN запросов repos/*: без seq scan по marks, отсечение секций")
+    p.add_argument(
+        "--no-seqscan",
+        action="store_true",
+        help="запретить seq scan планировщику (проверка наличия индексов на маленькой базе)",
+    )
+    p.set_defaults(func=cmd_plan_check)
+
+    p = sub.add_parser("partitions", help="секции marks по учебным годам: список, создание, архив")
+    p.add_argument("--ensure", action="store_true",
+                   help="создать секции текущего и следующего учебного года (для cron)")
+    p.add_argument("--archive", type=int, metavar="YEAR",
+                   help="отсоединить учебный год YEAR/YEAR+1 и перенести в схему archive")
+    p.add_argument("--restore", type=int, metavar="YEAR", help="вернуть учебный год из архива")
+    p.set_defaults(func=cmd_partitions)
+
+    p = sub.add_parser("export-marks", help="выгрузить оценки с ФИО и названиями в файл")
+    p.add_argument("--format", choices=["csv", "parquet", "xlsx"], default="csv")
+    p.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True,
+                   help="дата с (ГГГГ-ММ-ДД)")
+    p.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True,
+                   help="дата по (ГГГГ-ММ-ДД)")
+    p.add_argument("--group-id", type=int, help="только студенты группы")
+    p.add_argument("--subject-id", type=int, help="только предмет")
+    p.add_argument("--out", required=True, help="путь к файлу выгрузки")
+    p.set_defaults(func=cmd_export_marks)
+
+    p = sub.add_parser("report-cards", help="табели успеваемости в PDF за период")
+    p.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True,
+                   help="начало периода, YYYY-MM-DD")
+    p.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True,
+                   help="конец периода, YYYY-MM-DD")
+    p.add_argument("--group-id", type=int, help="только студенты группы")
+    p.add_argument("--mode", choices=["student", "group"], default="student",
+                   help="файл на студента или один файл на группу")
+    p.add_argument("--out", required=True, help="каталог для PDF")
+    p.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    p.set_defaults(func=cmd_report_cards)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    init_db(args.config)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
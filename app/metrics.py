@@ -0,0 +1,275 @@
+import configparser
+import contextvars
+import functools
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+DEFAULT_SLOW_MS = 500
+DEFAULT_SLOW_LOG_SIZE = 200
+# верхние границы корзин гистограммы задержек, мс; последняя корзина — всё, что дольше
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+PARAMS_REPR_MAX = 500
+
+logger = logging.getLogger("slow_query")
+
+_lock = threading.Lock()
+_repos: dict[str, dict] = {}
+_statements: dict[str, dict] = {}
+_slow = deque(maxlen=DEFAULT_SLOW_LOG_SIZE)
+_slow_ms = DEFAULT_SLOW_MS
+_started_at = time.time()
+
+# вызов репозитория, которому засчитываются запросы и ожидание соединения текущего потока/задачи
+_current_call = contextvars.ContextVar("current_repo_call", default=None)
+
+
+def load_metrics_config(path: str) -> dict:
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    if not config.has_section("metrics"):
+        return {"slow_ms": DEFAULT_SLOW_MS, "slow_log_size": DEFAULT_SLOW_LOG_SIZE}
+
+    section = config["metrics"]
+    return {
+        "slow_ms": section.getint("slow_ms", DEFAULT_SLOW_MS),
+        "slow_log_size": section.getint("slow_log_size", DEFAULT_SLOW_LOG_SIZE),
+    }
+
+
+def configure(slow_ms: int = DEFAULT_SLOW_MS, slow_log_size: int = DEFAULT_SLOW_LOG_SIZE) -> None:
+    global _slow, _slow_ms
+    with _lock:
+        _slow_ms = slow_ms
+        _slow = deque(_slow, maxlen=slow_log_size)
+
+
+def reset() -> None:
+    global _started_at
+    with _lock:
+        _repos.clear()
+        _statements.clear()
+        _slow.clear()
+        _started_at = time.time()
+
+
+def _new_stat() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "rows": 0,
+        "hist": [0] * (len(BUCKETS_MS) + 1),
+    }
+
+
+def _observe(stat: dict, ms: float, rows: int | None, failed: bool) -> None:
+    stat["calls"] += 1
+    stat["errors"] += failed
+    stat["total_ms"] += ms
+    stat["max_ms"] = max(stat["max_ms"], ms)
+    if rows is not None and rows >= 0:
+        stat["rows"] += rows
+    for i, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            stat["hist"][i] += 1
+            break
+    else:
+        stat["hist"][-1] += 1
+
+
+def percentile(stat: dict, q: float) -> float:
+    # оценка по гистограмме: линейно внутри корзины, сверху ограничена максимумом
+    if not stat["calls"]:
+        return 0.0
+    rank = q * stat["calls"]
+    seen = 0
+    lower = 0.0
+    for i, count in enumerate(stat["hist"]):
+        upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) else stat["max_ms"]
+        if count and seen + count >= rank:
+            value = lower + (upper - lower) * (rank - seen) / count
+            return min(value, stat["max_ms"])
+        seen += count
+        lower = upper
+    return stat["max_ms"]
+
+
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"           # строковые литералы
+    r"|%\(\w+\)s|%s|\$\d+|\?"   # плейсхолдеры драйверов
+    r"|(?<![:\w]):\w+"           # именованные параметры, но не приведение ::type
+    r"|\b\d+(?:\.\d+)?\b"        # числа
+)
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    # текст запроса без значений: IN (1, 2, 3) и IN (4, 5) — один отпечаток
+    text = _LITERALS.sub("?", statement)
+    text = _LISTS.sub("(...)", text)
+    return " ".join(text.split())
+
+
+def _params_repr(parameters, executemany: bool) -> str:
+    if executemany and parameters:
+        text = f"{len(parameters)} наборов, первый: {parameters[0]!r}"
+    else:
+        text = repr(parameters)
+    if len(text) > PARAMS_REPR_MAX:
+        text = text[:PARAMS_REPR_MAX] + "…"
+    return text
+
+
+def record_wait(seconds: float) -> None:
+    # ожидание соединения из пула (db.InstrumentedQueuePool)
+    call = _current_call.get()
+    if call is not None:
+        call["wait_ms"] += seconds * 1000
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish(conn, statement, parameters, executemany, cursor.rowcount, failed=False)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is None or not conn.info.get("metrics_started") or exception_context.statement is None:
+        return
+    _finish(
+        conn, exception_context.statement, exception_context.parameters,
+        False, None, failed=True,
+    )
+
+
+def _finish(conn, statement, parameters, executemany, rows, failed: bool) -> None:
+    started = conn.info["metrics_started"].pop()
+    ms = (time.perf_counter() - started) * 1000
+    fp = fingerprint(statement)
+
+    call = _current_call.get()
+    if call is not None:
+        call["db_ms"] += ms
+        call["statements"] += 1
+        if rows is not None and rows >= 0:
+            call["rows"] += rows
+
+    slow = ms >= _slow_ms
+    with _lock:
+        stat = _statements.get(fp)
+        if stat is None:
+            stat = _statements[fp] = _new_stat()
+        _observe(stat, ms, rows, failed)
+        if slow:
+            _slow.append({
+                "at": time.time(),
+                "ms": ms,
+                "repo": call["name"] if call is not None else None,
+                "fingerprint": fp,
+                "statement": statement,
+                "params": _params_repr(parameters, executemany),
+            })
+
+    if slow:
+        logger.warning(
+            "медленный запрос %.0f мс%s: %s; параметры: %s",
+            ms, f" ({call['name']})" if call is not None else "",
+            " ".join(statement.split()), _params_repr(parameters, executemany),
+        )
+
+
+def instrument_engine(engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _start(name: str) -> tuple:
+    call = {"name": name, "db_ms": 0.0, "statements": 0, "rows": 0, "wait_ms": 0.0}
+    return call, _current_call.set(call), time.perf_counter()
+
+
+def _end(call: dict, token, started: float, failed: bool) -> None:
+    _current_call.reset(token)
+    ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        stat = _repos.get(call["name"])
+        if stat is None:
+            stat = _repos[call["name"]] = {**_new_stat(), "db_ms": 0.0, "statements": 0, "wait_ms": 0.0}
+        _observe(stat, ms, call["rows"], failed)
+        stat["db_ms"] += call["db_ms"]
+        stat["statements"] += call["statements"]
+        stat["wait_ms"] += call["wait_ms"]
+
+
+def instrumented(func):
+    # время вызова функции репозитория и сумма по её запросам; ставится под @cached/@versioned,
+    # чтобы считались только походы в БД
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        call, token, started = _start(name)
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _end(call, token, started, failed)
+
+    return wrapper
+
+
+def _summary(name: str, stat: dict) -> dict:
+    calls = stat["calls"]
+    row = {
+        "name": name,
+        "calls": calls,
+        "errors": stat["errors"],
+        "total_ms": stat["total_ms"],
+        "avg_ms": stat["total_ms"] / calls if calls else 0.0,
+        "p50_ms": percentile(stat, 0.50),
+        "p95_ms": percentile(stat, 0.95),
+        "p99_ms": percentile(stat, 0.99),
+        "max_ms": stat["max_ms"],
+        "rows": stat["rows"],
+        "avg_rows": stat["rows"] / calls if calls else 0.0,
+    }
+    for key in ("db_ms", "statements", "wait_ms"):
+        if key in stat:
+            row[key] = stat[key]
+    return row
+
+
+def repo_stats() -> list[dict]:
+    with _lock:
+        rows = [_summary(name, stat) for name, stat in _repos.items()]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def statement_stats() -> list[dict]:
+    with _lock:
+        rows = [_summary(fp, stat) for fp, stat in _statements.items()]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def slow_queries() -> list[dict]:
+    with _lock:
+        return list(reversed(_slow))
+
+
+def metrics_info() -> dict:
+    with _lock:
+        return {"started_at": _started_at, "slow_ms": _slow_ms, "slow_log_size": _slow.maxlen}
@@ -0,0 +1,148 @@
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+
+from db import NO_STATEMENT_TIMEOUT, get_engine
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# один мигратор на базу: параллельный запуск ждёт на advisory lock
+MIGRATE_LOCK_ID = 720_251_001
+
+
+def list_migrations() -> list[dict]:
+    result = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        m = MIGRATION_RE.match(path.name)
+        if m is None:
+            continue
+        result.append({"version": m.group(1), "name": m.group(2), "path": path})
+    return result
+
+
+def split_sql(sql: str) -> list[str]:
+    # pg8000 выполняет по одному оператору за раз; режем по ';' вне строк,
+    # комментариев и $$-тел функций
+    statements = []
+    buf = []
+    i = 0
+    n = len(sql)
+    dollar_tag = None
+
+    while i < n:
+        ch = sql[i]
+
+        if dollar_tag is not None:
+            if sql.startswith(dollar_tag, i):
+                buf.append(dollar_tag)
+                i += len(dollar_tag)
+                dollar_tag = None
+            else:
+                buf.append(ch)
+                i += 1
+            continue
+
+        if ch == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end
+            continue
+
+        if ch == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and sql[end + 1:end + 2] == "'":
+                    end += 2
+                elif sql[end] == "'":
+                    break
+                else:
+                    end += 1
+            buf.append(sql[i:end + 1])
+            i = end + 1
+            continue
+
+        if ch == "$":
+            m = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if m:
+                dollar_tag = m.group(0)
+                buf.append(dollar_tag)
+                i += len(dollar_tag)
+                continue
+
+        if ch == ";":
+            stmt = "".join(buf).strip()
+            if stmt:
+                statements.append(stmt)
+            buf = []
+            i += 1
+            continue
+
+        buf.append(ch)
+        i += 1
+
+    stmt = "".join(buf).strip()
+    if stmt:
+        statements.append(stmt)
+    return statements
+
+
+def _ensure_history(conn) -> None:
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version    text PRIMARY KEY,
+            name       text NOT NULL,
+            applied_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    ))
+
+
+def applied_versions() -> dict[str, str]:
+    with get_engine().begin() as conn:
+        _ensure_history(conn)
+        rows = conn.execute(text("SELECT version, applied_at FROM schema_migrations")).all()
+    return {version: applied_at for version, applied_at in rows}
+
+
+def migration_status() -> list[dict]:
+    applied = applied_versions()
+    return [
+        {**m, "applied_at": applied.get(m["version"])}
+        for m in list_migrations()
+    ]
+
+
+def migrate(target: str | None = None) -> list[str]:
+    done = []
+    engine = get_engine()
+
+    with engine.connect() as lock_conn:
+        # ожидание чужого мигратора не ограничено statement_timeout
+        lock_conn.execute(text(NO_STATEMENT_TIMEOUT))
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATE_LOCK_ID})
+        try:
+            applied = applied_versions()
+            for m in list_migrations():
+                if target is not None and m["version"] > target:
+                    break
+                if m["version"] in applied:
+                    continue
+
+                sql = m["path"].read_text(encoding="utf-8")
+                # миграция и запись в историю — одна транзакция
+                with engine.begin() as conn:
+                    conn.execute(text(NO_STATEMENT_TIMEOUT))
+                    for stmt in split_sql(sql):
+                        conn.execute(text(stmt))
+                    conn.execute(
+                        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                        {"v": m["version"], "n": m["name"]},
+                    )
+                done.append(f"{m['version']}_{m['name']}")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATE_LOCK_ID})
+            lock_conn.commit()
+
+    return done
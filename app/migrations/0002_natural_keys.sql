@@ -0,0 +1,11 @@
+-- Индексы для сопоставления строк импорта с существующими (importer.py).
+-- Не уникальные: однофамильцы в группе и несколько оценок за день — обычные данные,
+-- повторы в файле импорт сводит сам.
+
+-- человек: ФИО, тип и группа
+CREATE INDEX IF NOT EXISTS people_natural_key_idx
+    ON public.people (type, last_name, first_name, (coalesce(father_name, '')), (coalesce(group_id, 0)));
+
+-- оценка: студент, предмет, преподаватель, день
+CREATE INDEX IF NOT EXISTS marks_natural_key_idx
+    ON public.marks (student_id, subject_id, teacher_id, mark_date);
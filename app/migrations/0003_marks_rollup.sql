@@ -0,0 +1,118 @@
+-- Агрегат по дням для avg_marks_analysis, ведётся statement-level триггерами на marks.
+
+CREATE TABLE IF NOT EXISTS public.marks_daily_rollup (
+    day        date    NOT NULL,
+    student_id integer NOT NULL,
+    subject_id integer NOT NULL,
+    teacher_id integer NOT NULL,
+    sum_value  bigint  NOT NULL,
+    cnt        bigint  NOT NULL,
+    PRIMARY KEY (day, student_id, subject_id, teacher_id)
+);
+
+CREATE OR REPLACE FUNCTION trg_marks_rollup_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO marks_daily_rollup AS r (day, student_id, subject_id, teacher_id, sum_value, cnt)
+        SELECT mark_date, student_id, subject_id, teacher_id, sum(value), count(*)
+        FROM new_rows
+        GROUP BY mark_date, student_id, subject_id, teacher_id
+        ON CONFLICT (day, student_id, subject_id, teacher_id)
+        DO UPDATE SET sum_value = r.sum_value + EXCLUDED.sum_value,
+                      cnt       = r.cnt + EXCLUDED.cnt;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE marks_daily_rollup r
+        SET sum_value = r.sum_value - d.s,
+            cnt       = r.cnt - d.c
+        FROM (
+            SELECT mark_date, student_id, subject_id, teacher_id, sum(value) AS s, count(*) AS c
+            FROM old_rows
+            GROUP BY mark_date, student_id, subject_id, teacher_id
+        ) d
+        WHERE r.day = d.mark_date
+          AND r.student_id = d.student_id
+          AND r.subject_id = d.subject_id
+          AND r.teacher_id = d.teacher_id;
+
+        DELETE FROM marks_daily_rollup r
+        USING old_rows o
+        WHERE r.cnt = 0
+          AND r.day = o.mark_date
+          AND r.student_id = o.student_id
+          AND r.subject_id = o.subject_id
+          AND r.teacher_id = o.teacher_id;
+
+    ELSE
+        INSERT INTO marks_daily_rollup AS r (day, student_id, subject_id, teacher_id, sum_value, cnt)
+        SELECT mark_date, student_id, subject_id, teacher_id, sum(v), sum(c)
+        FROM (
+            SELECT mark_date, student_id, subject_id, teacher_id, value AS v, 1 AS c FROM new_rows
+            UNION ALL
+            SELECT mark_date, student_id, subject_id, teacher_id, -value, -1 FROM old_rows
+        ) delta
+        GROUP BY mark_date, student_id, subject_id, teacher_id
+        HAVING sum(v) <> 0 OR sum(c) <> 0
+        ON CONFLICT (day, student_id, subject_id, teacher_id)
+        DO UPDATE SET sum_value = r.sum_value + EXCLUDED.sum_value,
+                      cnt       = r.cnt + EXCLUDED.cnt;
+
+        DELETE FROM marks_daily_rollup r
+        USING old_rows o
+        WHERE r.cnt = 0
+          AND r.day = o.mark_date
+          AND r.student_id = o.student_id
+          AND r.subject_id = o.subject_id
+          AND r.teacher_id = o.teacher_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS marks_rollup_ins ON marks;
+CREATE TRIGGER marks_rollup_ins
+AFTER INSERT ON marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+DROP TRIGGER IF EXISTS marks_rollup_upd ON marks;
+CREATE TRIGGER marks_rollup_upd
+AFTER UPDATE ON marks
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+DROP TRIGGER IF EXISTS marks_rollup_del ON marks;
+CREATE TRIGGER marks_rollup_del
+AFTER DELETE ON marks
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+CREATE OR REPLACE FUNCTION trg_marks_rollup_truncate()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    TRUNCATE marks_daily_rollup;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS marks_rollup_truncate ON marks;
+CREATE TRIGGER marks_rollup_truncate
+AFTER TRUNCATE ON marks
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_truncate();
+
+-- первичное заполнение
+INSERT INTO marks_daily_rollup (day, student_id, subject_id, teacher_id, sum_value, cnt)
+SELECT mark_date, student_id, subject_id, teacher_id, sum(value), count(*)
+FROM marks
+GROUP BY mark_date, student_id, subject_id, teacher_id
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,49 @@
+-- Индексы под запросы repos/* и проверки в триггерах.
+-- Проверяются командой `python manage.py config.ini plan-check`.
+
+-- marks: student_id уже ведёт индекс marks_natural_key_idx
+-- (student_id, subject_id, teacher_id, mark_date) — его хватает для фильтра по студенту
+-- и для trg_forbid_person_delete_if_has_marks (как студент).
+
+-- trg_forbid_person_delete_if_has_marks (как преподаватель), фильтр по преподавателю
+CREATE INDEX IF NOT EXISTS marks_teacher_date_idx
+    ON public.marks (teacher_id, mark_date);
+
+-- trg_forbid_subject_*_if_has_marks, фильтр по предмету, ведомость (предмет + дата)
+CREATE INDEX IF NOT EXISTS marks_subject_date_idx
+    ON public.marks (subject_id, mark_date)
+    INCLUDE (student_id, teacher_id, value);
+
+-- диапазон дат и постраничный вывод с сортировкой по дате (keyset по (mark_date, id))
+CREATE INDEX IF NOT EXISTS marks_date_id_idx
+    ON public.marks (mark_date, id)
+    INCLUDE (student_id, subject_id, teacher_id, value);
+
+-- постраничный вывод с сортировкой по оценке
+CREATE INDEX IF NOT EXISTS marks_value_id_idx
+    ON public.marks (value, id);
+
+-- people: студенты группы (ведомость, фильтр по группе, trg_validate_group_delete)
+CREATE INDEX IF NOT EXISTS people_group_name_idx
+    ON public.people (group_id, last_name, first_name, id);
+
+-- get_students / get_teachers и постраничный вывод по ФИО
+CREATE INDEX IF NOT EXISTS people_type_name_idx
+    ON public.people (type, last_name, first_name, id);
+
+CREATE INDEX IF NOT EXISTS people_name_idx
+    ON public.people (last_name, first_name, id);
+
+-- marks_daily_rollup: PK (day, ...) обслуживает диапазон дат, фильтры — здесь
+CREATE INDEX IF NOT EXISTS marks_rollup_student_idx
+    ON public.marks_daily_rollup (student_id, day);
+
+CREATE INDEX IF NOT EXISTS marks_rollup_subject_idx
+    ON public.marks_daily_rollup (subject_id, day);
+
+CREATE INDEX IF NOT EXISTS marks_rollup_teacher_idx
+    ON public.marks_daily_rollup (teacher_id, day);
+
+ANALYZE public.marks;
+ANALYZE public.people;
+ANALYZE public.marks_daily_rollup;
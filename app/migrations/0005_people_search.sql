@@ -0,0 +1,42 @@
+-- Поиск людей по ФИО для выпадающих списков (repos.people.search_people).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- строка поиска: "фамилия имя [отчество]" в нижнем регистре.
+-- concat_ws не IMMUTABLE, поэтому для индекса по выражению — своя функция
+CREATE OR REPLACE FUNCTION public.person_search_text(last_name text, first_name text, father_name text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT lower(
+        coalesce(last_name, '') || ' ' || coalesce(first_name, '')
+        || coalesce(' ' || nullif(father_name, ''), '')
+    )
+$$;
+
+-- нечёткое совпадение по словам (опечатки, часть фамилии).
+-- Обёртка нужна драйверу pg8000: он не пропускает '%' в тексте запроса,
+-- а SQL-функция встраивается планировщиком и оператор <% идёт в индекс
+CREATE OR REPLACE FUNCTION public.person_name_match(q text, search_text text)
+RETURNS boolean
+LANGUAGE sql
+STABLE PARALLEL SAFE
+AS $$
+    SELECT q <% search_text
+$$;
+
+CREATE INDEX IF NOT EXISTS people_search_trgm_idx
+    ON public.people
+    USING gin (public.person_search_text(last_name, first_name, father_name) gin_trgm_ops);
+
+-- фильтр списка групп по части имени (repos.groups): ILIKE '%...%' по триграммам
+CREATE INDEX IF NOT EXISTS groups_name_trgm_idx
+    ON public.groups
+    USING gin (name gin_trgm_ops);
+
+-- преподаватели по истории предмета: EXISTS по (teacher_id, subject_id)
+CREATE INDEX IF NOT EXISTS marks_teacher_subject_idx
+    ON public.marks (teacher_id, subject_id);
+
+ANALYZE public.people;
@@ -0,0 +1,72 @@
+-- Версии данных для кэша отчётов (cache.versioned): счётчик на таблицу,
+-- растёт на каждый изменяющий оператор, но в момент COMMIT. Счётчик — строка таблицы, а не sequence:
+-- новое значение видно только после COMMIT, поэтому читатель не закэширует
+-- старый результат под новой версией.
+--
+-- Оператор не трогает строку счётчика, а добавляет строку в data_version_pending:
+-- такие вставки друг друга не блокируют. Отложенный constraint-триггер на ней срабатывает
+-- при COMMIT, увеличивает версию и удаляет строку. Блокировка строки data_versions держится
+-- только на время фиксации, и долгий импорт или пересборка rollup не останавливают
+-- ввод оценок до своего COMMIT. UNLOGGED: строки живут в пределах транзакции.
+
+CREATE TABLE IF NOT EXISTS public.data_versions (
+    table_name text   PRIMARY KEY,
+    version    bigint NOT NULL DEFAULT 0
+);
+
+INSERT INTO public.data_versions (table_name)
+VALUES ('marks'), ('people'), ('groups'), ('subjects')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.data_version_pending (
+    id         bigint GENERATED ALWAYS AS IDENTITY,
+    table_name text   NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION trg_apply_data_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE table_name = NEW.table_name;
+    DELETE FROM data_version_pending WHERE id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS data_version_pending_apply ON public.data_version_pending;
+CREATE CONSTRAINT TRIGGER data_version_pending_apply
+AFTER INSERT ON public.data_version_pending
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION trg_apply_data_version();
+
+CREATE OR REPLACE FUNCTION trg_bump_data_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO data_version_pending (table_name) VALUES (TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+-- FOR EACH STATEMENT: многострочный INSERT/UPDATE/DELETE и импорт — одна строка в очереди
+DROP TRIGGER IF EXISTS marks_data_version ON public.marks;
+CREATE TRIGGER marks_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.marks
+FOR EACH STATEMENT EXECUTE FUNCTION trg_bump_data_version();
+
+DROP TRIGGER IF EXISTS people_data_version ON public.people;
+CREATE TRIGGER people_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.people
+FOR EACH STATEMENT EXECUTE FUNCTION trg_bump_data_version();
+
+DROP TRIGGER IF EXISTS groups_data_version ON public.groups;
+CREATE TRIGGER groups_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.groups
+FOR EACH STATEMENT EXECUTE FUNCTION trg_bump_data_version();
+
+DROP TRIGGER IF EXISTS subjects_data_version ON public.subjects;
+CREATE TRIGGER subjects_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.subjects
+FOR EACH STATEMENT EXECUTE FUNCTION trg_bump_data_version();
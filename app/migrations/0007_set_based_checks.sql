@@ -0,0 +1,166 @@
+-- Проверки в триггерах без count(*) по строке.
+--
+-- Запреты удаления (people, subjects, groups) остаются BEFORE ... FOR EACH ROW, но проверяют
+-- EXISTS: одна проба индекса на строку вместо подсчёта всех ссылок; count(*) — только для
+-- текста ошибки, когда удаление всё равно отменяется. Индексы под пробы:
+--   marks.student_id  — marks_natural_key_idx (student_id, ...)
+--   marks.teacher_id  — marks_teacher_date_idx
+--   marks.subject_id  — marks_subject_date_idx
+--   people.group_id   — people_group_name_idx
+-- Statement-level вариант для удаления невозможен: внешние ключи marks -> people/subjects
+-- (ON DELETE CASCADE) и people -> groups (SET NULL) срабатывают раньше AFTER ... FOR EACH STATEMENT,
+-- и триггер уже не увидел бы ссылок.
+--
+-- Валидация вставки/изменения people и marks — statement-level триггеры с transition tables:
+-- один запрос по new_rows на оператор вместо вызова функции на каждую строку.
+-- Существование группы проверяет внешний ключ people_group_id_fkey (проба по PK groups);
+-- NULL в обязательных полях отсекают NOT NULL столбцов — в триггерах эти проверки не повторяются.
+
+CREATE OR REPLACE FUNCTION trg_forbid_person_delete_if_has_marks()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cnt_student int;
+    cnt_teacher int;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM marks WHERE student_id = OLD.id)
+       AND NOT EXISTS (SELECT 1 FROM marks WHERE teacher_id = OLD.id) THEN
+        RETURN OLD;
+    END IF;
+
+    SELECT count(*) INTO cnt_student FROM marks WHERE student_id = OLD.id;
+    SELECT count(*) INTO cnt_teacher FROM marks WHERE teacher_id = OLD.id;
+
+    RAISE EXCEPTION
+        'Нельзя удалить человека id=%: есть ссылки в marks (как студент: %, как преподаватель: %).',
+        OLD.id, cnt_student, cnt_teacher;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_forbid_subject_delete_if_has_marks()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cnt int;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM marks WHERE subject_id = OLD.id) THEN
+        RETURN OLD;
+    END IF;
+
+    SELECT count(*) INTO cnt FROM marks WHERE subject_id = OLD.id;
+    RAISE EXCEPTION 'Нельзя удалить предмет "%": по нему есть оценки (%).', OLD.name, cnt;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_forbid_subject_update_if_has_marks()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cnt int;
+BEGIN
+    IF NEW.name = OLD.name OR NOT EXISTS (SELECT 1 FROM marks WHERE subject_id = OLD.id) THEN
+        RETURN NEW;
+    END IF;
+
+    SELECT count(*) INTO cnt FROM marks WHERE subject_id = OLD.id;
+    RAISE EXCEPTION 'Нельзя изменить предмет "%": по нему есть оценки (%).', OLD.name, cnt;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_validate_group_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cnt int;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM people WHERE group_id = OLD.id AND type = 'S') THEN
+        RETURN OLD;
+    END IF;
+
+    SELECT count(*) INTO cnt FROM people WHERE group_id = OLD.id AND type = 'S';
+    RAISE EXCEPTION 'Невозможно удалить группу "%", в ней состоят студенты (%)', OLD.name, cnt;
+END;
+$$;
+
+-- people: вставка и изменение
+CREATE OR REPLACE FUNCTION trg_validate_people_rows()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    msg text;
+BEGIN
+    SELECT CASE
+               WHEN btrim(last_name) = '' THEN 'Фамилия (last_name) не может быть пустой'
+               WHEN btrim(first_name) = '' THEN 'Имя (first_name) не может быть пустым'
+               WHEN type NOT IN ('S', 'P') THEN 'type должен быть ''S'' (студент) или ''P'' (преподаватель)'
+               WHEN type = 'S' AND group_id IS NULL THEN 'Для студента (type=''S'') group_id обязателен'
+               WHEN type = 'P' AND group_id IS NOT NULL THEN 'Для преподавателя (type=''P'') group_id должен быть NULL'
+           END
+    INTO msg
+    FROM new_rows
+    WHERE btrim(last_name) = ''
+       OR btrim(first_name) = ''
+       OR type NOT IN ('S', 'P')
+       OR (type = 'S' AND group_id IS NULL)
+       OR (type = 'P' AND group_id IS NOT NULL)
+    LIMIT 1;
+
+    IF msg IS NOT NULL THEN
+        RAISE EXCEPTION '%', msg;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS people_validate_ins_upd ON people;
+DROP FUNCTION IF EXISTS trg_validate_people_before_ins_upd();
+
+-- transition tables допускаются только у триггера на одно событие
+DROP TRIGGER IF EXISTS people_validate_ins ON people;
+CREATE TRIGGER people_validate_ins
+AFTER INSERT ON people
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_people_rows();
+
+DROP TRIGGER IF EXISTS people_validate_upd ON people;
+CREATE TRIGGER people_validate_upd
+AFTER UPDATE ON people
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_people_rows();
+
+-- marks: вставка и изменение
+CREATE OR REPLACE FUNCTION trg_validate_marks_rows()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM new_rows WHERE value NOT BETWEEN 1 AND 5) THEN
+        RAISE EXCEPTION 'Значение value (оценка) должно быть в диапазоне между 1 и 5';
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS marks_validate_ins_upd ON marks;
+DROP FUNCTION IF EXISTS trg_validate_marks_before_ins_upd();
+
+DROP TRIGGER IF EXISTS marks_validate_ins ON marks;
+CREATE TRIGGER marks_validate_ins
+AFTER INSERT ON marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_marks_rows();
+
+DROP TRIGGER IF EXISTS marks_validate_upd ON marks;
+CREATE TRIGGER marks_validate_upd
+AFTER UPDATE ON marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_marks_rows();
@@ -0,0 +1,189 @@
+-- Секционирование marks и marks_daily_rollup по учебным годам (1 сентября — 31 августа).
+-- Отчёт с фильтром по дате читает только секции своего диапазона (partition pruning),
+-- сколько бы лет истории ни хранилось. Старый год отсоединяется без долгих блокировок
+-- (DETACH PARTITION ... CONCURRENTLY): `python manage.py config.ini partitions --archive YEAR`.
+--
+-- Ключ секционирования входит в PK и уникальные индексы: PK marks — (id, mark_date),
+-- уникальность id даёт последовательность. Identity-столбцы у секционированных таблиц есть
+-- только с PostgreSQL 17, поэтому id — DEFAULT nextval.
+-- Секции по умолчанию нет: при каждом ATTACH её пришлось бы проверять сканированием.
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+CREATE OR REPLACE FUNCTION academic_year_start(d date)
+RETURNS date
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT make_date(extract(year FROM d)::int - CASE WHEN extract(month FROM d) < 9 THEN 1 ELSE 0 END, 9, 1)
+$$;
+
+-- прежние таблицы: данные переносятся, затем таблицы удаляются вместе с индексами и триггерами
+ALTER TABLE public.marks RENAME TO marks_heap;
+ALTER TABLE public.marks_heap ALTER COLUMN id DROP IDENTITY;
+ALTER TABLE public.marks_daily_rollup RENAME TO marks_daily_rollup_heap;
+
+CREATE SEQUENCE public.marks_id_seq AS integer;
+
+CREATE TABLE public.marks (
+    id         integer NOT NULL DEFAULT nextval('public.marks_id_seq'),
+    student_id integer NOT NULL,
+    subject_id integer NOT NULL,
+    teacher_id integer NOT NULL,
+    value      integer NOT NULL,
+    mark_date  date    NOT NULL DEFAULT CURRENT_DATE
+) PARTITION BY RANGE (mark_date);
+
+ALTER SEQUENCE public.marks_id_seq OWNED BY public.marks.id;
+
+CREATE TABLE public.marks_daily_rollup (
+    day        date    NOT NULL,
+    student_id integer NOT NULL,
+    subject_id integer NOT NULL,
+    teacher_id integer NOT NULL,
+    sum_value  bigint  NOT NULL,
+    cnt        bigint  NOT NULL
+) PARTITION BY RANGE (day);
+
+-- Секции учебных лет с d_from по d_to, которых ещё нет; возвращает число созданных таблиц.
+-- Таблица создаётся отдельно и подключается ATTACH PARTITION: он берёт на родителе
+-- SHARE UPDATE EXCLUSIVE (чтение и запись не ждут), а CREATE TABLE ... PARTITION OF — ACCESS EXCLUSIVE
+CREATE OR REPLACE FUNCTION marks_ensure_partitions(d_from date, d_to date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    y       date := academic_year_start(d_from);
+    parent  text;
+    part    text;
+    created integer := 0;
+BEGIN
+    -- параллельные вызовы не создают одну секцию дважды
+    PERFORM pg_advisory_xact_lock(720251002);
+
+    WHILE y <= d_to LOOP
+        FOREACH parent IN ARRAY ARRAY['marks', 'marks_daily_rollup'] LOOP
+            part := format('%s_y%s', parent, extract(year FROM y)::int);
+
+            IF to_regclass('archive.' || part) IS NOT NULL THEN
+                RAISE EXCEPTION 'Учебный год %/% в архиве: сначала верните его (partitions --restore %)',
+                    extract(year FROM y), extract(year FROM y) + 1, extract(year FROM y);
+            END IF;
+
+            IF to_regclass('public.' || part) IS NULL THEN
+                EXECUTE format('CREATE TABLE public.%I (LIKE public.%I INCLUDING DEFAULTS)', part, parent);
+                EXECUTE format(
+                    'ALTER TABLE public.%I ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                    parent, part, y, (y + interval '1 year')::date
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+        y := (y + interval '1 year')::date;
+    END LOOP;
+
+    RETURN created;
+END;
+$$;
+
+-- все годы с данными, текущий и следующий
+SELECT marks_ensure_partitions(
+    least((SELECT min(mark_date) FROM public.marks_heap), CURRENT_DATE),
+    (CURRENT_DATE + interval '1 year')::date
+);
+
+-- перенос до индексов и триггеров: rollup переносится как есть, а не пересчитывается
+INSERT INTO public.marks (id, student_id, subject_id, teacher_id, value, mark_date)
+SELECT id, student_id, subject_id, teacher_id, value, mark_date
+FROM public.marks_heap;
+
+INSERT INTO public.marks_daily_rollup (day, student_id, subject_id, teacher_id, sum_value, cnt)
+SELECT day, student_id, subject_id, teacher_id, sum_value, cnt
+FROM public.marks_daily_rollup_heap;
+
+SELECT setval('public.marks_id_seq', coalesce((SELECT max(id) FROM public.marks), 0) + 1, false);
+
+DROP TABLE public.marks_heap;
+DROP TABLE public.marks_daily_rollup_heap;
+
+-- ключи и индексы (0001, 0002, 0003, 0004) — на родителе, секции получают их автоматически
+ALTER TABLE public.marks ADD CONSTRAINT marks_pkey PRIMARY KEY (id, mark_date);
+
+ALTER TABLE public.marks ADD CONSTRAINT marks_student_id_fkey
+    FOREIGN KEY (student_id) REFERENCES public.people(id) ON DELETE CASCADE;
+ALTER TABLE public.marks ADD CONSTRAINT marks_subject_id_fkey
+    FOREIGN KEY (subject_id) REFERENCES public.subjects(id) ON DELETE CASCADE;
+ALTER TABLE public.marks ADD CONSTRAINT marks_teacher_id_fkey
+    FOREIGN KEY (teacher_id) REFERENCES public.people(id) ON DELETE CASCADE;
+
+CREATE INDEX marks_natural_key_idx
+    ON public.marks (student_id, subject_id, teacher_id, mark_date);
+
+CREATE INDEX marks_teacher_date_idx
+    ON public.marks (teacher_id, mark_date);
+
+CREATE INDEX marks_subject_date_idx
+    ON public.marks (subject_id, mark_date)
+    INCLUDE (student_id, teacher_id, value);
+
+CREATE INDEX marks_date_id_idx
+    ON public.marks (mark_date, id)
+    INCLUDE (student_id, subject_id, teacher_id, value);
+
+CREATE INDEX marks_value_id_idx
+    ON public.marks (value, id);
+
+ALTER TABLE public.marks_daily_rollup ADD CONSTRAINT marks_daily_rollup_pkey
+    PRIMARY KEY (day, student_id, subject_id, teacher_id);
+
+CREATE INDEX marks_rollup_student_idx
+    ON public.marks_daily_rollup (student_id, day);
+
+CREATE INDEX marks_rollup_subject_idx
+    ON public.marks_daily_rollup (subject_id, day);
+
+CREATE INDEX marks_rollup_teacher_idx
+    ON public.marks_daily_rollup (teacher_id, day);
+
+-- триггеры (0003, 0006, 0007): функции прежние, триггеры ушли вместе со старой таблицей
+CREATE TRIGGER marks_rollup_ins
+AFTER INSERT ON public.marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+CREATE TRIGGER marks_rollup_upd
+AFTER UPDATE ON public.marks
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+CREATE TRIGGER marks_rollup_del
+AFTER DELETE ON public.marks
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_apply();
+
+CREATE TRIGGER marks_rollup_truncate
+AFTER TRUNCATE ON public.marks
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_marks_rollup_truncate();
+
+CREATE TRIGGER marks_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.marks
+FOR EACH STATEMENT EXECUTE FUNCTION trg_bump_data_version();
+
+CREATE TRIGGER marks_validate_ins
+AFTER INSERT ON public.marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_marks_rows();
+
+CREATE TRIGGER marks_validate_upd
+AFTER UPDATE ON public.marks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_validate_marks_rows();
+
+ANALYZE public.marks;
+ANALYZE public.marks_daily_rollup;
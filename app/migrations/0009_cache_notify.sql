@@ -0,0 +1,15 @@
+-- Межпроцессная инвалидация кэша (notify.py). Тот же statement-триггер, что считает версии
+-- данных, шлёт NOTIFY table_changed с именем таблицы. Слушатели получают его только после
+-- COMMIT; одинаковые уведомления одной транзакции PostgreSQL доставляет один раз,
+-- поэтому импорт или ведомость — одно уведомление на таблицу.
+
+CREATE OR REPLACE FUNCTION trg_bump_data_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO data_version_pending (table_name) VALUES (TG_TABLE_NAME);
+    PERFORM pg_notify('table_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Text, String, CheckConstraint, ForeignKey, CHAR
+from sqlalchemy import Integer, BigInteger, Text, String, CheckConstraint, ForeignKey, CHAR
 from db import Base
 from datetime import date
 from sqlalchemy import Date
@@ -62,6 +62,8 @@ class Subject(Base):
 
 
 class Mark(Base):
+    # секционирована по учебным годам (migrations/0008): в БД первичный ключ (id, mark_date),
+    # id уникален за счёт последовательности
     __tablename__ = "marks"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -96,6 +98,27 @@ class Mark(Base):
     mark_date: Mapped[date] = mapped_column(Date, nullable=False)
 
 
+class MarkDailyRollup(Base):
+    # сумма и количество оценок за день; ведётся триггерами на marks
+    __tablename__ = "marks_daily_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    student_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    subject_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    teacher_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    sum_value: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    cnt: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class DataVersion(Base):
+    # счётчик изменений таблицы; ведётся триггерами, ключ кэша отчётов
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
 class AppUser(Base):
     __tablename__ = "app_users"
 
@@ -0,0 +1,106 @@
+import configparser
+import logging
+import threading
+
+import psycopg
+
+import db
+from cache import clear, clear_reports, invalidate
+from db import WAL_LSN_EXPR, load_db_config, require_lsn
+from repos.versions import REPORT_TABLES
+
+# канал триггера trg_bump_data_version (migrations/0009), payload — имя таблицы
+CHANNEL = "table_changed"
+# namespace кэша (cache.cached), которые строятся по таблице
+TABLE_NAMESPACES = {
+    "groups": ("groups", "students"),
+    "people": ("students", "teachers"),
+    "subjects": ("subjects",),
+    "marks": (),
+}
+# как долго поток ждёт уведомлений до проверки флага остановки, с
+WAIT_S = 5.0
+RECONNECT_S = 5.0
+
+logger = logging.getLogger("cache_notify")
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def load_notify_config(path: str) -> bool:
+    config = configparser.ConfigParser()
+    config.read(path)
+    if not config.has_section("cache"):
+        return True
+    return config["cache"].getboolean("listen", True)
+
+
+def _apply(conn, table: str) -> None:
+    if db.read_engines:
+        # уведомление приходит после COMMIT: позиция WAL primary сейчас не раньше этой записи,
+        # и перечитанное после вытеснения не возьмётся с отставшей реплики
+        require_lsn(conn.execute("SELECT " + WAL_LSN_EXPR).fetchone()[0])
+
+    namespaces = TABLE_NAMESPACES.get(table, ())
+    if namespaces:
+        invalidate(*namespaces)
+    if table in REPORT_TABLES:
+        clear_reports()
+
+
+def _listen(cfg: dict) -> None:
+    # отдельное соединение вне пула: LISTEN живёт, пока живёт сессия
+    with psycopg.connect(
+        host=cfg["host"],
+        port=cfg["port"],
+        dbname=cfg["dbname"],
+        user=cfg["user"],
+        password=cfg["password"],
+        autocommit=True,
+    ) as conn:
+        conn.execute(f"LISTEN {CHANNEL}")
+        # пока соединения не было, уведомления терялись: всё закэшированное раньше под подозрением
+        clear()
+        while not _stop.is_set():
+            for n in conn.notifies(timeout=WAIT_S):
+                _apply(conn, n.payload)
+
+
+def _run(cfg: dict) -> None:
+    while not _stop.is_set():
+        try:
+            _listen(cfg)
+        except psycopg.Error as e:
+            # без слушателя кэш устаревает не дольше TTL
+            logger.warning("Слушатель %s отключился: %s", CHANNEL, e)
+            _stop.wait(RECONNECT_S)
+        except Exception:
+            # ошибка обработки уведомления (кэш, реплики) не должна остановить поток насовсем
+            logger.exception("Ошибка слушателя %s", CHANNEL)
+            _stop.wait(RECONNECT_S)
+
+
+def start_listener(config_path: str) -> None:
+    # один поток на процесс: Streamlit выполняет app.py на каждый rerun
+    global _thread
+    if not load_notify_config(config_path):
+        return
+
+    cfg = load_db_config(config_path)
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_run, args=(cfg,), name="cache-notify", daemon=True)
+        _thread.start()
+
+
+def stop_listener() -> None:
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    _stop.set()
+    if thread is not None:
+        thread.join(WAIT_S + 1)
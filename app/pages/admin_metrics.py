@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from .login import ensure_logged_in
+from db import get_pool_stats
+from metrics import metrics_info, repo_stats, reset, slow_queries, statement_stats
+
+
+REPO_COLUMNS = {
+    "name": "Функция",
+    "calls": "Вызовов",
+    "errors": "Ошибок",
+    "total_ms": "Всего, мс",
+    "avg_ms": "Среднее, мс",
+    "p50_ms": "p50, мс",
+    "p95_ms": "p95, мс",
+    "p99_ms": "p99, мс",
+    "max_ms": "Макс, мс",
+    "db_ms": "В БД, мс",
+    "wait_ms": "Ожидание соединения, мс",
+    "statements": "Запросов",
+    "avg_rows": "Строк на вызов",
+}
+
+STATEMENT_COLUMNS = {
+    "name": "Запрос (отпечаток)",
+    "calls": "Выполнений",
+    "errors": "Ошибок",
+    "total_ms": "Всего, мс",
+    "avg_ms": "Среднее, мс",
+    "p50_ms": "p50, мс",
+    "p95_ms": "p95, мс",
+    "p99_ms": "p99, мс",
+    "max_ms": "Макс, мс",
+    "avg_rows": "Строк",
+}
+
+
+def _table(rows: list[dict], columns: dict, top: int) -> None:
+    if not rows:
+        st.info("Пока нет данных.")
+        return
+    df = pd.DataFrame(rows[:top])[list(columns)].rename(columns=columns)
+    st.dataframe(df.style.format(precision=1), use_container_width=True, hide_index=True)
+
+
+def metrics_page():
+    ensure_logged_in()
+    user = st.session_state["user"]
+
+    st.title("Метрики запросов к БД")
+    st.sidebar.title("Пользователь")
+    st.sidebar.write(f"**{user['username']}** ({user['role']})")
+
+    if st.sidebar.button("Выйти"):
+        del st.session_state["user"]
+        st.rerun()
+
+    if user["role"] != "admin":
+        st.info("Страница доступна только администратору")
+        return
+
+    info = metrics_info()
+    st.caption(
+        f"С {datetime.fromtimestamp(info['started_at']):%d.%m.%Y %H:%M:%S}; "
+        f"медленные — от {info['slow_ms']} мс. Перцентили — оценка по гистограмме задержек."
+    )
+
+    col_a, col_b = st.columns([3, 1])
+    with col_a:
+        top = st.slider("Показать первых (по суммарному времени)", min_value=5, max_value=100, value=20)
+    with col_b:
+        if st.button("Сбросить счётчики"):
+            reset()
+            st.rerun()
+
+    pool = get_pool_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Соединений занято", f"{pool['checked_out']} / {pool['size'] + pool['max_overflow']}")
+    c2.metric("Пик загрузки пула", f"{pool['peak_utilization']:.0%}")
+    c3.metric("Ожидание соединения, ср.", f"{pool['avg_wait_ms']:.1f} мс")
+    c4.metric("Таймаутов пула", pool["timeouts"])
+
+    st.subheader("Функции репозиториев")
+    _table(repo_stats(), REPO_COLUMNS, top)
+
+    st.subheader("Запросы")
+    _table(statement_stats(), STATEMENT_COLUMNS, top)
+
+    st.subheader("Медленные запросы")
+    slow = slow_queries()
+    if not slow:
+        st.info("Медленных запросов не было.")
+        return
+
+    for q in slow[:top]:
+        title = f"{datetime.fromtimestamp(q['at']):%H:%M:%S} — {q['ms']:.0f} мс — {q['repo'] or 'вне репозиториев'}"
+        with st.expander(title):
+            st.code(q["statement"], language="sql")
+            st.text(f"Параметры: {q['params']}")
@@ -0,0 +1,101 @@
+import tempfile
+from datetime import date
+
+import streamlit as st
+
+from .login import ensure_logged_in
+from export import EXPORT_FORMATS, count_marks, export_marks
+from repos.groups import get_all_groups
+from repos.subjects import get_all_subjects
+
+
+FORMAT_TITLES = {
+    "csv": "CSV (;)",
+    "parquet": "Parquet",
+    "xlsx": "Excel (XLSX)",
+}
+
+# st.download_button держит файл в памяти сервера целиком; больше — через API или manage.py,
+# которые отдают файл с диска по частям
+INLINE_MAX_ROWS = 200_000
+
+
+def export_page():
+    ensure_logged_in()
+    user = st.session_state["user"]
+
+    st.title("Выгрузка оценок")
+    st.sidebar.title("Пользователь")
+    st.sidebar.write(f"**{user['username']}** ({user['role']})")
+
+    if st.sidebar.button("Выйти"):
+        del st.session_state["user"]
+        st.rerun()
+
+    today = date.today()
+    col_a, col_b, col_c = st.columns(3)
+    with col_a:
+        d_from = st.date_input("Дата с", value=date(today.year, 1, 1))
+    with col_b:
+        d_to = st.date_input("Дата по", value=today)
+    with col_c:
+        fmt = st.selectbox("Формат", options=list(EXPORT_FORMATS), format_func=lambda f: FORMAT_TITLES[f])
+
+    if d_from > d_to:
+        st.error("Дата 'с' не может быть позже даты 'по'.")
+        st.stop()
+
+    groups = get_all_groups()
+    subjects = get_all_subjects()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        group_id = st.selectbox(
+            "Группа",
+            options=[None] + [g["id"] for g in groups],
+            format_func={None: "Все группы", **{g["id"]: g["name"] for g in groups}}.get,
+        )
+    with col2:
+        subject_id = st.selectbox(
+            "Предмет",
+            options=[None] + [s["id"] for s in subjects],
+            format_func={None: "Все предметы", **{s["id"]: s["name"] for s in subjects}}.get,
+        )
+
+    st.caption("Для многомиллионных выгрузок удобнее `python manage.py <config> export-marks`.")
+
+    if st.button("Сформировать файл"):
+        mime, ext = EXPORT_FORMATS[fmt]
+        rows = count_marks(d_from, d_to, group_id=group_id, subject_id=subject_id)
+        if rows > INLINE_MAX_ROWS:
+            params = f"fmt={fmt}&date_from={d_from}&date_to={d_to}"
+            params += f"&group_id={group_id}" if group_id is not None else ""
+            params += f"&subject_id={subject_id}" if subject_id is not None else ""
+            args = f"--format {fmt} --from {d_from} --to {d_to}"
+            args += f" --group-id {group_id}" if group_id is not None else ""
+            args += f" --subject-id {subject_id}" if subject_id is not None else ""
+            st.warning(
+                f"Оценок: {rows}, через страницу отдаётся не больше {INLINE_MAX_ROWS}. "
+                "Большую выгрузку можно получить через HTTP API или из командной строки:"
+            )
+            st.code(f"GET /export/marks?{params}\npython manage.py <config> export-marks {args} --out marks.{ext}")
+            st.stop()
+        # выгрузка пишется во временный файл по частям; Streamlit отдаёт только готовый файл
+        with tempfile.TemporaryFile() as out:
+            try:
+                with st.spinner("Выгрузка..."):
+                    total = export_marks(fmt, out, d_from, d_to, group_id=group_id, subject_id=subject_id)
+            except Exception as e:
+                st.error(f"Ошибка выгрузки: {e}")
+                st.stop()
+
+            out.seek(0)
+            data = out.read()
+
+        st.success(f"Выгружено оценок: {total}")
+        st.download_button(
+            label=f"Скачать {FORMAT_TITLES[fmt]}",
+            data=data,
+            file_name=f"marks_{d_from}_{d_to}.{ext}",
+            mime=mime,
+        )
@@ -0,0 +1,74 @@
+import streamlit as st
+import pandas as pd
+
+from .login import ensure_logged_in
+from importer import IMPORT_KINDS, import_file
+
+
+KIND_TITLES = {
+    "groups": "Группы",
+    "subjects": "Предметы",
+    "people": "Люди",
+    "marks": "Оценки",
+}
+
+
+def import_page():
+    ensure_logged_in()
+    user = st.session_state["user"]
+
+    st.title("Импорт данных из CSV / XLSX")
+    st.sidebar.title("Пользователь")
+    st.sidebar.write(f"**{user['username']}** ({user['role']})")
+
+    if st.sidebar.button("Выйти"):
+        del st.session_state["user"]
+        st.rerun()
+
+    if user["role"] != "admin":
+        st.info("У вас нет прав для изменения данных (роль: user)")
+        return
+
+    kind = st.selectbox(
+        "Что загружаем",
+        options=list(IMPORT_KINDS),
+        format_func=lambda k: KIND_TITLES[k],
+    )
+    st.caption("Колонки файла (первая строка — заголовок): " + ", ".join(IMPORT_KINDS[kind]))
+    if kind == "marks":
+        st.caption(
+            "student и teacher — ФИО через пробел, group — группа студента (для однофамильцев), "
+            "mark_date — ГГГГ-ММ-ДД или ДД.ММ.ГГГГ."
+        )
+
+    uploaded = st.file_uploader("Файл", type=["csv", "xlsx"])
+
+    if uploaded is not None and st.button("Загрузить"):
+        try:
+            with st.spinner("Загрузка..."):
+                res = import_file(kind, uploaded, uploaded.name)
+        except Exception as e:
+            st.error(f"Ошибка импорта: {e}")
+            st.stop()
+
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Строк в файле", res["total"])
+        col2.metric("Добавлено", res["inserted"])
+        col3.metric("Обновлено", res["updated"])
+        col4.metric("Без изменений", res["skipped"])
+        col5.metric("Ошибок", res["error_count"])
+
+        if res["errors"]:
+            st.subheader("Строки с ошибками")
+            errors_df = pd.DataFrame(res["errors"])
+            st.dataframe(errors_df, use_container_width=True)
+            st.download_button(
+                label="Скачать ошибки (CSV)",
+                data=errors_df.to_csv(index=False, sep=";").encode("utf-8"),
+                file_name=f"import_errors_{kind}.csv",
+                mime="text/csv; charset=utf-8",
+            )
+            if res["error_count"] > len(res["errors"]):
+                st.caption(f"Показаны первые {len(res['errors'])} ошибок из {res['error_count']}.")
+        else:
+            st.success("Файл загружен без ошибок")
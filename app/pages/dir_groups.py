@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 
 from .login import ensure_logged_in
+from .pager import current_cursor, pager_controls
 from repos.groups import (
-    get_all_groups,
+    get_groups_page,
     create_group,
     update_group,
     delete_group,
@@ -22,12 +23,28 @@ def groups_page():
         del st.session_state["user"]
         st.rerun()
 
-    # чтение
-    rows = get_all_groups()
+    # чтение (постранично)
+    st.subheader("Список групп")
+    col_f1, col_f2, col_f3 = st.columns([2, 1, 1])
+    with col_f1:
+        name_filter = st.text_input("Поиск по названию", key="groups_filter_name")
+    with col_f2:
+        descending = st.checkbox("Я → А", key="groups_sort_desc")
+    with col_f3:
+        page_size = st.selectbox("Строк на странице", options=[25, 50, 100], index=1, key="groups_page_size")
+
+    cursor = current_cursor("groups_pager", (name_filter, descending, page_size))
+    page = get_groups_page(
+        cursor=cursor,
+        limit=page_size,
+        descending=descending,
+        name=name_filter or None,
+    )
+    rows = page["rows"]
     df = pd.DataFrame(rows) if rows else pd.DataFrame(columns=["id", "name"])
 
-    st.subheader("Список групп")
     st.dataframe(df, use_container_width=True)
+    pager_controls("groups_pager", page["next_cursor"])
 
     is_admin = user["role"] == "admin"
     if not is_admin:
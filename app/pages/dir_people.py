@@ -1,9 +1,9 @@
 import streamlit as st
-import pandas as pd
 
 from .login import ensure_logged_in
+from .pager import current_cursor, pager_controls
 from repos.people import (
-    get_all_people,
+    get_people_page,
     create_person,
     update_person,
     delete_person,
@@ -23,27 +23,60 @@ def people_page():
         del st.session_state["user"]
         st.rerun()
 
-    people = get_all_people()
-    df = pd.DataFrame(people) if people else pd.DataFrame(
-        columns=["id", "last_name", "first_name", "father_name", "type", "group_name"]
+    groups = get_all_groups()
+    groups_map = {g["id"]: g["name"] for g in groups}
+
+    st.subheader("Список людей")
+    col_f1, col_f2, col_f3 = st.columns(3)
+    with col_f1:
+        name_filter = st.text_input("Фамилия начинается с", key="people_filter_name")
+        type_filter = st.selectbox(
+            "Тип",
+            options=[("Все", None), ("Студенты", "S"), ("Преподаватели", "P")],
+            format_func=lambda t: t[0],
+            key="people_filter_type",
+        )[1]
+    with col_f2:
+        group_filter = st.selectbox(
+            "Группа",
+            options=[("Все группы", None)] + [(name, gid) for gid, name in groups_map.items()],
+            format_func=lambda x: x[0],
+            key="people_filter_group",
+        )[1]
+        sort_by = st.selectbox(
+            "Сортировка",
+            options=[("По ФИО", "name"), ("По группе", "group"), ("По id", "id")],
+            format_func=lambda x: x[0],
+            key="people_sort_by",
+        )[1]
+    with col_f3:
+        descending = st.checkbox("По убыванию", key="people_sort_desc")
+        page_size = st.selectbox("Строк на странице", options=[25, 50, 100], index=1, key="people_page_size")
+
+    signature = (name_filter, type_filter, group_filter, sort_by, descending, page_size)
+    cursor = current_cursor("people_pager", signature)
+    page = get_people_page(
+        cursor=cursor,
+        limit=page_size,
+        sort_by=sort_by,
+        descending=descending,
+        person_type=type_filter,
+        group_id=group_filter,
+        name=name_filter or None,
+        as_frame=True,
     )
+    df = page["rows"]
 
-    if not df.empty:
-        df_display = df[["id", "last_name", "first_name", "father_name", "type", "group_name"]]
-    else:
-        df_display = df
+    df_display = df[["id", "last_name", "first_name", "father_name", "type", "group_name"]]
 
-    st.subheader("Список людей")
     st.dataframe(df_display, use_container_width=True)
+    pager_controls("people_pager", page["next_cursor"])
 
     is_admin = user["role"] == "admin"
     if not is_admin:
         st.info("У вас нет прав для изменения данных (роль: user)")
         return
 
-    groups = get_all_groups()
-    groups_map = {g["id"]: g["name"] for g in groups}
-
     st.subheader("Добавить человека")
     with st.form("add_person_form"):
         last_name = st.text_input("Фамилия")
@@ -90,13 +123,14 @@ def people_page():
 
     st.subheader("Изменить / удалить человека")
     if not df.empty:
+        person_labels = {
+            int(r.id): f"{r.last_name} {r.first_name}"
+            for r in df.itertuples(index=False)
+        }
         selected_id = st.selectbox(
             "Выберите человека",
-            options=df["id"].tolist(),
-            format_func=lambda pid: (
-                f"{df.loc[df['id'] == pid, 'last_name'].iloc[0]} "
-                f"{df.loc[df['id'] == pid, 'first_name'].iloc[0]}"
-            ),
+            options=list(person_labels),
+            format_func=person_labels.get,
         )
 
         row = df.loc[df["id"] == selected_id].iloc[0]
@@ -1,14 +1,16 @@
+from datetime import date, timedelta
+
 import streamlit as st
-import pandas as pd
 
 from .login import ensure_logged_in
+from .pager import current_cursor, pager_controls
+from .pickers import person_picker
 from repos.marks import (
-    get_all_marks,
+    get_marks_page,
     create_mark,
     update_mark,
     delete_mark,
 )
-from repos.people import get_students, get_teachers
 from repos.subjects import get_all_subjects
 
 
@@ -24,60 +26,114 @@ def grades_page():
         del st.session_state["user"]
         st.rerun()
 
-    marks = get_all_marks()
-    if marks:
-        df = pd.DataFrame(marks)
-        df_display = df[["id", "student_name", "subject_name", "teacher_name", "value"]]
-    else:
-        df = pd.DataFrame(columns=["id", "student_name", "subject_name", "teacher_name", "value"])
-        df_display = df
+    subjects = get_all_subjects()
 
     st.subheader("Список оценок")
+    with st.expander("Фильтры и сортировка", expanded=False):
+        col_f1, col_f2, col_f3 = st.columns(3)
+        with col_f1:
+            f_student = person_picker(
+                "Студент", "marks_filter_student", "S", empty_label="Все студенты"
+            )
+            f_subject = st.selectbox(
+                "Предмет",
+                options=[("Все предметы", None)] + [(s["name"], s["id"]) for s in subjects],
+                format_func=lambda x: x[0],
+                key="marks_filter_subject",
+            )[1]
+        with col_f2:
+            f_teacher = person_picker(
+                "Преподаватель", "marks_filter_teacher", "P",
+                subject_id=f_subject, empty_label="Все преподаватели",
+            )
+            f_value = st.selectbox(
+                "Оценка",
+                options=[None, 5, 4, 3, 2, 1],
+                format_func=lambda v: "Любая" if v is None else str(v),
+                key="marks_filter_value",
+            )
+        with col_f3:
+            use_dates = st.checkbox("Фильтр по датам", key="marks_filter_use_dates")
+            f_date_from = f_date_to = None
+            if use_dates:
+                f_date_from = st.date_input(
+                    "Дата с", value=date.today() - timedelta(days=30), key="marks_filter_from"
+                )
+                f_date_to = st.date_input("Дата по", value=date.today(), key="marks_filter_to")
+
+        col_s1, col_s2, col_s3 = st.columns(3)
+        with col_s1:
+            sort_by = st.selectbox(
+                "Сортировка",
+                options=[
+                    ("По id", "id"),
+                    ("По дате", "date"),
+                    ("По оценке", "value"),
+                    ("По студенту", "student"),
+                    ("По предмету", "subject"),
+                ],
+                format_func=lambda x: x[0],
+                key="marks_sort_by",
+            )[1]
+        with col_s2:
+            descending = st.checkbox("По убыванию", key="marks_sort_desc")
+        with col_s3:
+            page_size = st.selectbox("Строк на странице", options=[25, 50, 100, 200], index=1, key="marks_page_size")
+
+    filters = {
+        "student_id": f_student,
+        "subject_id": f_subject,
+        "teacher_id": f_teacher,
+        "value": f_value,
+        "date_from": f_date_from,
+        "date_to": f_date_to,
+    }
+    signature = (tuple(filters.items()), sort_by, descending, page_size)
+    cursor = current_cursor("marks_pager", signature)
+    page = get_marks_page(
+        cursor=cursor,
+        limit=page_size,
+        sort_by=sort_by,
+        descending=descending,
+        as_frame=True,
+        **filters,
+    )
+
+    columns = ["id", "mark_date", "student_name", "subject_name", "teacher_name", "value"]
+    df = page["rows"]
+    df_display = df[columns]
+
     st.dataframe(df_display, use_container_width=True)
+    pager_controls("marks_pager", page["next_cursor"])
 
     is_admin = user["role"] == "admin"
     if not is_admin:
         st.info("У вас нет прав для изменения данных (роль: user)")
         return
 
-    students = get_students()
-    teachers = get_teachers()
-    subjects = get_all_subjects()
-
-    if not students or not teachers or not subjects:
-        st.warning("Для работы журнала нужны студенты, преподаватели и предметы.")
+    if not subjects:
+        st.warning("Для работы журнала нужны предметы.")
         return
 
-    student_options = [
-        (f"{s['last_name']} {s['first_name']} ({s['group_name']})", s["id"])
-        for s in students
-    ]
-    teacher_options = [
-        (f"{t['last_name']} {t['first_name']}", t["id"])
-        for t in teachers
-    ]
     subject_options = [
         (s["name"], s["id"])
         for s in subjects
     ]
 
     st.subheader("Добавить оценку")
+    # поиск людей вне формы: внутри st.form поле поиска не перерисовывает список
+    add_col1, add_col2 = st.columns(2)
+    with add_col1:
+        new_student_id = person_picker("Студент", "add_mark_student", "S")
+    with add_col2:
+        new_teacher_id = person_picker("Преподаватель", "add_mark_teacher", "P")
+
     with st.form("add_mark_form"):
-        student_choice = st.selectbox(
-            "Студент",
-            options=student_options,
-            format_func=lambda x: x[0],
-        )
         subject_choice = st.selectbox(
             "Предмет",
             options=subject_options,
             format_func=lambda x: x[0],
         )
-        teacher_choice = st.selectbox(
-            "Преподаватель",
-            options=teacher_options,
-            format_func=lambda x: x[0],
-        )
 
         value = st.number_input(
             "Оценка",
@@ -89,11 +145,14 @@ def grades_page():
 
         submitted = st.form_submit_button("Добавить")
         if submitted:
+            if new_student_id is None or new_teacher_id is None:
+                st.warning("Выберите студента и преподавателя")
+                st.stop()
             try:
                 create_mark(
-                    student_id=student_choice[1],
+                    student_id=new_student_id,
                     subject_id=subject_choice[1],
-                    teacher_id=teacher_choice[1],
+                    teacher_id=new_teacher_id,
                     value=int(value),
                 )
                 st.success("Оценка добавлена")
@@ -103,14 +162,15 @@ def grades_page():
 
     st.subheader("Изменить / удалить оценку")
     if not df.empty:
+        # подписи считаются один раз, а не поиском по df для каждой опции
+        mark_labels = {
+            int(r.id): f"{r.student_name} — {r.subject_name} ({r.value})"
+            for r in df.itertuples(index=False)
+        }
         selected_id = st.selectbox(
             "Выберите оценку",
-            options=df["id"].tolist(),
-            format_func=lambda mid: (
-                f"{df.loc[df['id'] == mid, 'student_name'].iloc[0]} — "
-                f"{df.loc[df['id'] == mid, 'subject_name'].iloc[0]} "
-                f"({df.loc[df['id'] == mid, 'value'].iloc[0]})"
-            ),
+            options=list(mark_labels),
+            format_func=mark_labels.get,
         )
 
         row = df.loc[df["id"] == selected_id].iloc[0]
@@ -118,17 +178,9 @@ def grades_page():
         col1, col2 = st.columns(2)
 
         with col1:
-            student_idx = 0
-            for i, (_, sid) in enumerate(student_options):
-                if sid == row["student_id"]:
-                    student_idx = i
-                    break
-            student_edit = st.selectbox(
-                "Студент (ред.)",
-                options=student_options,
-                index=student_idx,
-                format_func=lambda x: x[0],
-                key="edit_student",
+            student_edit = person_picker(
+                "Студент (ред.)", f"edit_student_{selected_id}", "S",
+                default_id=int(row["student_id"]),
             )
 
             subject_idx = 0
@@ -144,17 +196,9 @@ def grades_page():
                 key="edit_subject",
             )
 
-            teacher_idx = 0
-            for i, (_, tid) in enumerate(teacher_options):
-                if tid == row["teacher_id"]:
-                    teacher_idx = i
-                    break
-            teacher_edit = st.selectbox(
-                "Преподаватель (ред.)",
-                options=teacher_options,
-                index=teacher_idx,
-                format_func=lambda x: x[0],
-                key="edit_teacher",
+            teacher_edit = person_picker(
+                "Преподаватель (ред.)", f"edit_teacher_{selected_id}", "P",
+                default_id=int(row["teacher_id"]),
             )
 
             value_edit = st.number_input(
@@ -170,9 +214,9 @@ def grades_page():
                 try:
                     update_mark(
                         mark_id=selected_id,
-                        student_id=student_edit[1],
+                        student_id=student_edit,
                         subject_id=subject_edit[1],
-                        teacher_id=teacher_edit[1],
+                        teacher_id=teacher_edit,
                         value=int(value_edit),
                     )
                     st.success("Оценка обновлена")
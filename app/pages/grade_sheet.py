@@ -0,0 +1,154 @@
+from datetime import date
+
+import streamlit as st
+import pandas as pd
+
+from .login import ensure_logged_in
+from repos.marks import get_sheet_marks, save_marks_batch
+from repos.groups import get_all_groups
+from repos.people import get_teachers
+from repos.subjects import get_all_subjects
+
+
+def _load_snapshot(group_id: int, subject_id: int, mark_date: date) -> pd.DataFrame:
+    rows = get_sheet_marks(group_id, subject_id, mark_date)
+    df = pd.DataFrame(
+        rows, columns=["student_id", "student_name", "mark_id", "value", "teacher_id"]
+    )
+    df["mark_id"] = df["mark_id"].astype("Int64")
+    df["value"] = df["value"].astype("Int64")
+    df["teacher_id"] = df["teacher_id"].astype("Int64")
+    return df
+
+
+def _diff_sheet(
+    snapshot: pd.DataFrame,
+    edited: pd.DataFrame,
+    subject_id: int,
+    teacher_id: int,
+    mark_date: date,
+):
+    inserts, updates, deletes = [], [], []
+
+    for (_, old), (_, new) in zip(snapshot.iterrows(), edited.iterrows()):
+        old_value = None if pd.isna(old["value"]) else int(old["value"])
+        new_value = None if pd.isna(new["value"]) else int(new["value"])
+
+        if old_value == new_value:
+            continue
+
+        if pd.isna(old["mark_id"]):
+            inserts.append(
+                {
+                    "student_id": int(old["student_id"]),
+                    "subject_id": subject_id,
+                    "teacher_id": teacher_id,
+                    "value": new_value,
+                    "mark_date": mark_date,
+                }
+            )
+        elif new_value is None:
+            deletes.append(int(old["mark_id"]))
+        else:
+            # исправление не переписывает оценку на выбранного преподавателя: он — только для новых
+            updates.append(
+                {"id": int(old["mark_id"]), "value": new_value, "teacher_id": int(old["teacher_id"])}
+            )
+
+    return inserts, updates, deletes
+
+
+def grade_sheet_page():
+    ensure_logged_in()
+    user = st.session_state["user"]
+
+    st.title("Журнал: ведомость группы")
+    st.sidebar.title("Пользователь")
+    st.sidebar.write(f"**{user['username']}** ({user['role']})")
+
+    if st.sidebar.button("Выйти"):
+        del st.session_state["user"]
+        st.rerun()
+
+    groups = get_all_groups()
+    subjects = get_all_subjects()
+    teachers = get_teachers()
+
+    if not groups or not subjects or not teachers:
+        st.warning("Для работы ведомости нужны группы, предметы и преподаватели.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        group_choice = st.selectbox(
+            "Группа",
+            options=[(g["name"], g["id"]) for g in groups],
+            format_func=lambda x: x[0],
+        )
+        subject_choice = st.selectbox(
+            "Предмет",
+            options=[(s["name"], s["id"]) for s in subjects],
+            format_func=lambda x: x[0],
+        )
+    with col2:
+        mark_date = st.date_input("Дата", value=date.today())
+        teacher_choice = st.selectbox(
+            "Преподаватель",
+            options=[(f"{t['last_name']} {t['first_name']}", t["id"]) for t in teachers],
+            format_func=lambda x: x[0],
+        )
+
+    group_id, subject_id, teacher_id = group_choice[1], subject_choice[1], teacher_choice[1]
+
+    # снимок загружается один раз на (группа, предмет, дата) и служит базой для diff
+    scope = (group_id, subject_id, mark_date)
+    reload = st.button("Перечитать из БД")
+    if reload or st.session_state.get("sheet_scope") != scope:
+        st.session_state["sheet_scope"] = scope
+        st.session_state["sheet_snapshot"] = _load_snapshot(*scope)
+        st.session_state["sheet_version"] = st.session_state.get("sheet_version", 0) + 1
+
+    snapshot: pd.DataFrame = st.session_state["sheet_snapshot"]
+
+    if snapshot.empty:
+        st.info("В группе нет студентов.")
+        return
+
+    is_admin = user["role"] == "admin"
+    if not is_admin:
+        st.dataframe(snapshot[["student_name", "value"]], use_container_width=True)
+        st.info("У вас нет прав для изменения данных (роль: user)")
+        return
+
+    st.caption("Пустая ячейка — нет оценки. Очистите ячейку, чтобы удалить оценку.")
+    edited = st.data_editor(
+        snapshot,
+        column_order=["student_name", "value"],
+        column_config={
+            "student_name": st.column_config.TextColumn("Студент", disabled=True),
+            "value": st.column_config.NumberColumn("Оценка", min_value=2, max_value=5, step=1),
+        },
+        num_rows="fixed",
+        hide_index=True,
+        use_container_width=True,
+        key=f"sheet_editor_{st.session_state['sheet_version']}",
+    )
+
+    inserts, updates, deletes = _diff_sheet(snapshot, edited, subject_id, teacher_id, mark_date)
+    st.write(
+        f"Изменений: добавить {len(inserts)}, изменить {len(updates)}, удалить {len(deletes)}"
+    )
+
+    if st.button("Сохранить ведомость", disabled=not (inserts or updates or deletes)):
+        try:
+            res = save_marks_batch(inserts, updates, deletes, mark_date=mark_date)
+        except Exception as e:
+            st.error(f"Ошибка при сохранении: {e}")
+        else:
+            st.session_state["sheet_snapshot"] = _load_snapshot(*scope)
+            st.session_state["sheet_version"] += 1
+            st.success(
+                f"Сохранено: добавлено {res['inserted']}, "
+                f"изменено {res['updated']}, удалено {res['deleted']}"
+            )
+            st.rerun()
@@ -0,0 +1,26 @@
+import streamlit as st
+
+
+def current_cursor(key: str, signature) -> tuple | None:
+    # стек курсоров: вершина — курсор текущей страницы, None — первая страница
+    state = st.session_state.setdefault(key, {"signature": None, "stack": [None]})
+    if state["signature"] != signature:
+        state["signature"] = signature
+        state["stack"] = [None]
+    return state["stack"][-1]
+
+
+def pager_controls(key: str, next_cursor: tuple | None):
+    state = st.session_state[key]
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("← Назад", key=f"{key}_prev", disabled=len(state["stack"]) == 1):
+            state["stack"].pop()
+            st.rerun()
+    with col_info:
+        st.write(f"Страница {len(state['stack'])}")
+    with col_next:
+        if st.button("Вперёд →", key=f"{key}_next", disabled=next_cursor is None):
+            state["stack"].append(next_cursor)
+            st.rerun()
@@ -0,0 +1,56 @@
+import streamlit as st
+
+from repos.people import search_people, get_people_by_ids
+
+
+def person_label(p: dict) -> str:
+    label = f"{p['last_name']} {p['first_name']}"
+    if p.get("type") == "S" and p.get("group_name"):
+        label += f" ({p['group_name']})"
+    return label
+
+
+def person_picker(
+    label: str,
+    key: str,
+    person_type: str,
+    group_id: int | None = None,
+    subject_id: int | None = None,
+    empty_label: str | None = None,
+    default_id: int | None = None,
+) -> int | None:
+    # поле поиска + список из первых совпадений; всех людей в список не грузим.
+    # group_id / subject_id сужают выдачу по уже выбранным фильтрам страницы
+    query = st.text_input(label, key=f"{key}_q", placeholder="Поиск по ФИО")
+    found = search_people(
+        query, person_type=person_type, group_id=group_id, subject_id=subject_id
+    )
+    labels = {p["id"]: person_label(p) for p in found}
+
+    # смена фильтров-родителей сбрасывает выбор: ключ виджета зависит от них
+    select_key = f"{key}:{group_id}:{subject_id}"
+
+    # уже выбранный человек остаётся в списке, даже если выпал из выдачи поиска
+    current = st.session_state.get(select_key, default_id)
+    if current is not None and current not in labels:
+        for p in get_people_by_ids([current]):
+            labels = {p["id"]: person_label(p), **labels}
+
+    options = list(labels)
+    if empty_label is not None:
+        options = [None] + options
+        labels[None] = empty_label
+
+    if not options:
+        st.caption("Никого не найдено")
+        return None
+
+    index = options.index(current) if current in options else 0
+    return st.selectbox(
+        label,
+        options=options,
+        index=index,
+        format_func=labels.get,
+        key=select_key,
+        label_visibility="collapsed",
+    )
@@ -1,17 +1,93 @@
+import time
 from datetime import date, timedelta
 
 import streamlit as st
-import io
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from .login import ensure_logged_in
-from repos.reports import avg_marks_analysis
+from .pickers import person_picker
+from cache import report_cache_stats
+from charts import CHART_TOP_N, name_labels, slice_chart_spec, series_chart_spec
+from repos.reports import avg_marks_analysis, avg_marks_multi, avg_marks_series
 from repos.groups import get_all_groups
-from repos.people import get_students, get_teachers
 from repos.subjects import get_all_subjects
 
 
+DIMENSION_TITLES = {
+    "group": "Группы",
+    "student": "Студенты",
+    "subject": "Предметы",
+    "teacher": "Преподаватели",
+    "year": "Года (по датам оценок)",
+}
+
+TOTAL = "Итого"
+
+BUCKET_TITLES = {
+    "auto": "Авто",
+    "day": "День",
+    "week": "Неделя",
+    "month": "Месяц",
+    "term": "Семестр",
+}
+
+
+def _pivot_frame(data: dict, row_dim: str, col_dim: str, value: str) -> pd.DataFrame | None:
+    # ячейки и итоги берутся из одного CUBE-запроса; средние итогов не пересчитываются в pandas.
+    # Ключи — id разрезов, имена только для подписей
+    cells = data.get((row_dim, col_dim), [])
+    if not cells:
+        return None
+
+    row_id, col_id = f"{row_dim}_id", f"{col_dim}_id"
+    row_names: dict = {}
+    col_names: dict = {}
+    grid = {}
+    for r in cells:
+        row_names.setdefault(r[row_id], r[f"{row_dim}_name"])
+        col_names.setdefault(r[col_id], r[f"{col_dim}_name"])
+        grid[(r[row_id], r[col_id])] = r[value]
+
+    row_totals = {r[row_id]: r[value] for r in data.get((row_dim,), [])}
+    col_totals = {r[col_id]: r[value] for r in data.get((col_dim,), [])}
+    grand = data.get((), [])
+
+    rows = sorted(row_names, key=lambda i: row_names[i])
+    cols = sorted(col_names, key=lambda i: col_names[i])
+    values = [[grid.get((ri, ci)) for ci in cols] + [row_totals.get(ri)] for ri in rows]
+    values.append([col_totals.get(ci) for ci in cols] + [grand[0][value] if grand else None])
+
+    table = pd.DataFrame(
+        values,
+        index=name_labels(rows, row_names) + [TOTAL],
+        columns=name_labels(cols, col_names) + [TOTAL],
+        dtype=float,
+    )
+    table.index.name = DIMENSION_TITLES[row_dim]
+    table.columns.name = DIMENSION_TITLES[col_dim]
+    return table
+
+
+def _render_series(data: dict, window: int) -> None:
+    points = data["points"]
+    if not points:
+        st.info("Нет данных для выбранных фильтров/интервала.")
+        return
+
+    df = pd.DataFrame(points)
+    st.caption(f"Шаг: {BUCKET_TITLES[data['bucket']].lower()}, точек: {len(df)}")
+
+    st.vega_lite_chart(series_chart_spec(df, window), use_container_width=True)
+
+    st.dataframe(df, use_container_width=True)
+    st.download_button(
+        label="Скачать CSV",
+        data=df.to_csv(index=False, sep=";").encode("utf-8"),
+        file_name="series.csv",
+        mime="text/csv; charset=utf-8",
+    )
+
+
 def reports_page():
     ensure_logged_in()
     user = st.session_state["user"]
@@ -40,111 +116,166 @@ def reports_page():
         st.stop()
 
     groups = get_all_groups()
-    students = get_students()
-    teachers = get_teachers()
     subjects = get_all_subjects()
 
     group_opts = [("Все группы", None)] + [(g["name"], g["id"]) for g in groups]
     subj_opts = [("Все предметы", None)] + [(s["name"], s["id"]) for s in subjects]
-    teacher_opts = [("Все преподаватели", None)] + [
-        (f'{t["last_name"]} {t["first_name"]}', t["id"]) for t in teachers
-    ]
-    student_opts = [("Все студенты", None)] + [
-        (f'{s["last_name"]} {s["first_name"]} ({s["group_name"]})', s["id"]) for s in students
-    ]
 
+    # студенты — из выбранной группы, преподаватели — ставившие оценки по выбранному предмету
     col1, col2 = st.columns(2)
     with col1:
-        group_choice = st.selectbox("Группа", options=group_opts, format_func=lambda x: x[0])
-        subject_choice = st.selectbox("Предмет", options=subj_opts, format_func=lambda x: x[0])
+        group_id = st.selectbox("Группа", options=group_opts, format_func=lambda x: x[0])[1]
+        subject_id = st.selectbox("Предмет", options=subj_opts, format_func=lambda x: x[0])[1]
     with col2:
-        teacher_choice = st.selectbox("Преподаватель", options=teacher_opts, format_func=lambda x: x[0])
-        student_choice = st.selectbox("Студент", options=student_opts, format_func=lambda x: x[0])
-
-    group_id = group_choice[1]
-    subject_id = subject_choice[1]
-    teacher_id = teacher_choice[1]
-    student_id = student_choice[1]
-
-    group_by = st.selectbox(
-        "Разрез (по чему считать средний балл)",
-        options=[
-            ("Группы", "group"),
-            ("Студенты", "student"),
-            ("Предметы", "subject"),
-            ("Преподаватели", "teacher"),
-            ("Года (по датам оценок)", "year"),
-        ],
+        teacher_id = person_picker(
+            "Преподаватель", "report_teacher", "P",
+            subject_id=subject_id, empty_label="Все преподаватели",
+        )
+        student_id = person_picker(
+            "Студент", "report_student", "S",
+            group_id=group_id, empty_label="Все студенты",
+        )
+
+    filters = {
+        "date_from": d_from,
+        "date_to": d_to,
+        "group_id": group_id,
+        "student_id": student_id,
+        "subject_id": subject_id,
+        "teacher_id": teacher_id,
+    }
+
+    report_kind = st.radio(
+        "Вид отчёта",
+        options=[("Один разрез", "slice"), ("Сводная таблица", "pivot"), ("Динамика", "series")],
         format_func=lambda x: x[0],
+        horizontal=True,
     )[1]
 
-    view_mode = st.radio("Показать результат", options=["Таблица", "График", "Таблица + график"], horizontal=True)
+    if report_kind == "slice":
+        group_by = st.selectbox(
+            "Разрез (по чему считать средний балл)",
+            options=list(DIMENSION_TITLES),
+            format_func=DIMENSION_TITLES.get,
+        )
+        view_mode = st.radio("Показать результат", options=["Таблица", "График", "Таблица + график"], horizontal=True)
+        params = {**filters, "group_by": group_by}
+    elif report_kind == "series":
+        col_t1, col_t2 = st.columns(2)
+        with col_t1:
+            bucket = st.selectbox("Шаг", options=list(BUCKET_TITLES), format_func=BUCKET_TITLES.get)
+        with col_t2:
+            window = st.number_input("Скользящее среднее, шагов", min_value=1, max_value=24, value=3)
+        params = {**filters, "bucket": bucket, "window": int(window)}
+    else:
+        col_p1, col_p2, col_p3 = st.columns(3)
+        with col_p1:
+            row_dim = st.selectbox("Строки", options=list(DIMENSION_TITLES), format_func=DIMENSION_TITLES.get)
+        with col_p2:
+            col_dim = st.selectbox(
+                "Столбцы",
+                options=[d for d in DIMENSION_TITLES if d != row_dim],
+                format_func=DIMENSION_TITLES.get,
+            )
+        with col_p3:
+            pivot_value = st.radio(
+                "Значение",
+                options=[("Средний балл", "avg"), ("Число оценок", "count")],
+                format_func=lambda x: x[0],
+            )[1]
+        params = {**filters, "dimensions": (row_dim, col_dim)}
 
     if st.button("Рассчитать"):
+        started = time.perf_counter()
         try:
-            data = avg_marks_analysis(
-                date_from=d_from,
-                date_to=d_to,
-                group_id=group_id,
-                student_id=student_id,
-                subject_id=subject_id,
-                teacher_id=teacher_id,
-                group_by=group_by,
-            )
+            if report_kind == "slice":
+                data = avg_marks_analysis(**params)
+            elif report_kind == "series":
+                data = avg_marks_series(**params)
+            else:
+                # ячейки, итоги по строкам/столбцам и общий итог — один запрос CUBE
+                data = avg_marks_multi(kind="cube", **params)
         except Exception as e:
             st.error(f"Ошибка расчёта: {e}")
             st.stop()
+        st.session_state["report_result"] = {
+            "params": params,
+            "data": data,
+            "ms": (time.perf_counter() - started) * 1000,
+        }
 
-        if not data:
-            st.info("Нет данных для выбранных фильтров/интервала.")
-            st.stop()
+    # результат переживает перезапуски страницы (смена вида, скачивание), пока параметры те же
+    result = st.session_state.get("report_result")
+    if result is None or result["params"] != params:
+        return
 
-        df = pd.DataFrame(data)
+    data = result["data"]
+    stats = report_cache_stats()
+    st.caption(
+        f"Расчёт: {result['ms']:.1f} мс. Кэш отчётов: попаданий {stats['hits']}, "
+        f"промахов {stats['misses']}, записей {stats['entries']}, "
+        f"{stats['bytes'] / 2**20:.1f} из {stats['max_bytes'] / 2**20:.0f} МБ"
+    )
 
-        st.subheader("Экспорт")
+    if report_kind == "series":
+        _render_series(data, params["window"])
+        return
 
-        col_e1, col_e2 = st.columns(2)
+    if report_kind == "pivot":
+        table = _pivot_frame(data, row_dim, col_dim, pivot_value)
+        if table is None:
+            st.info("Нет данных для выбранных фильтров/интервала.")
+            st.stop()
 
-        with col_e1:
-            txt = df.to_string(index=False)
-            st.download_button(
-                label="Скачать TXT",
-                data=txt.encode("utf-8"),
-                file_name="report.txt",
-                mime="text/plain; charset=utf-8",
-            )
+        st.subheader("Сводная таблица")
+        st.dataframe(
+            table.style.format(precision=2 if pivot_value == "avg" else 0, na_rep=""),
+            use_container_width=True,
+        )
+        st.download_button(
+            label="Скачать CSV",
+            data=table.to_csv(sep=";").encode("utf-8"),
+            file_name="pivot.csv",
+            mime="text/csv; charset=utf-8",
+        )
+        return
 
-        with col_e2:
-            csv = df.to_csv(index=False, sep=";")
-            st.download_button(
-                label="Скачать CSV",
-                data=csv.encode("utf-8"),
-                file_name="report.csv",
-                mime="text/csv; charset=utf-8",
-            )
+    if not data:
+        st.info("Нет данных для выбранных фильтров/интервала.")
+        st.stop()
 
-        if view_mode in ("Таблица", "Таблица + график"):
-            st.subheader("Результат (таблица)")
-            st.dataframe(df, use_container_width=True)
+    df = pd.DataFrame(data)
 
-        if view_mode in ("График", "Таблица + график"):
-            st.subheader("Результат (график)")
+    st.subheader("Экспорт")
 
-            fig = plt.figure()
-            ax = fig.add_subplot(111)
+    col_e1, col_e2 = st.columns(2)
 
-            if group_by == "year":
-                x = df["key"].astype(str).tolist()
-            else:
-                x = df["name"].astype(str).tolist()
+    with col_e1:
+        txt = df.to_string(index=False)
+        st.download_button(
+            label="Скачать TXT",
+            data=txt.encode("utf-8"),
+            file_name="report.txt",
+            mime="text/plain; charset=utf-8",
+        )
+
+    with col_e2:
+        csv = df.to_csv(index=False, sep=";")
+        st.download_button(
+            label="Скачать CSV",
+            data=csv.encode("utf-8"),
+            file_name="report.csv",
+            mime="text/csv; charset=utf-8",
+        )
 
-            y = df["avg"].astype(float).tolist()
+    if view_mode in ("Таблица", "Таблица + график"):
+        st.subheader("Результат (таблица)")
+        st.dataframe(df, use_container_width=True)
 
-            ax.plot(x, y, marker="o")
-            ax.set_ylabel("Средний балл")
-            ax.set_xlabel("Категория")
-            ax.set_title(f"Средний балл за период {d_from} — {d_to}")
-            ax.grid(True)
-            plt.xticks(rotation=45, ha="right")
+    if view_mode in ("График", "Таблица + график"):
+        st.subheader("Результат (график)")
 
-            st.pyplot(fig)
+        spec = slice_chart_spec(df, group_by, f"Средний балл за период {d_from} — {d_to}")
+        st.vega_lite_chart(spec, use_container_width=True)
+        if group_by != "year" and len(df) > CHART_TOP_N:
+            st.caption(f"На графике {CHART_TOP_N} из {len(df)} по числу оценок, остальные — одной строкой")
@@ -0,0 +1,41 @@
+from datetime import date
+
+import pandas as pd
+
+from pages.grade_sheet import _diff_sheet
+
+DAY = date(2024, 9, 2)
+
+
+def _sheet(values, mark_ids, teacher_ids):
+    df = pd.DataFrame(
+        {
+            "student_id": [1, 2, 3, 4],
+            "student_name": ["А", "Б", "В", "Г"],
+            "mark_id": mark_ids,
+            "value": values,
+            "teacher_id": teacher_ids,
+        }
+    )
+    for col in ("mark_id", "value", "teacher_id"):
+        df[col] = df[col].astype("Int64")
+    return df
+
+
+def test_diff_sheet_splits_changes():
+    snapshot = _sheet([None, 3, 4, 5], [None, 11, 12, 13], [None, 7, 8, 9])
+    edited = snapshot.copy()
+    edited["value"] = pd.array([5, 4, None, 5], dtype="Int64")
+
+    inserts, updates, deletes = _diff_sheet(snapshot, edited, subject_id=20, teacher_id=30, mark_date=DAY)
+
+    assert inserts == [{"student_id": 1, "subject_id": 20, "teacher_id": 30, "value": 5, "mark_date": DAY}]
+    # исправление остаётся за преподавателем, поставившим оценку
+    assert updates == [{"id": 11, "value": 4, "teacher_id": 7}]
+    assert deletes == [12]
+
+
+def test_diff_sheet_without_changes_is_empty():
+    snapshot = _sheet([None, 3, 4, 5], [None, 11, 12, 13], [None, 7, 8, 9])
+
+    assert _diff_sheet(snapshot, snapshot.copy(), 20, 30, DAY) == ([], [], [])
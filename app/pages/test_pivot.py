@@ -0,0 +1,38 @@
+import math
+
+from pages.reports import TOTAL, _pivot_frame
+
+
+def _cell(g_id, g_name, s_id, s_name, avg):
+    return {"group_id": g_id, "group_name": g_name, "subject_id": s_id, "subject_name": s_name, "avg": avg}
+
+
+def test_pivot_keeps_namesakes_apart():
+    data = {
+        ("group", "subject"): [
+            _cell(1, "IT_2024", 10, "Физика", 4.0),
+            _cell(2, "IT_2024", 10, "Физика", 3.0),
+            _cell(1, "IT_2024", 11, "Химия", 5.0),
+        ],
+        ("group",): [
+            {"group_id": 1, "group_name": "IT_2024", "avg": 4.5},
+            {"group_id": 2, "group_name": "IT_2024", "avg": 3.0},
+        ],
+        ("subject",): [
+            {"subject_id": 10, "subject_name": "Физика", "avg": 3.5},
+            {"subject_id": 11, "subject_name": "Химия", "avg": 5.0},
+        ],
+        (): [{"avg": 4.0}],
+    }
+
+    table = _pivot_frame(data, "group", "subject", "avg")
+
+    assert list(table.index) == ["IT_2024 (id 1)", "IT_2024 (id 2)", TOTAL]
+    assert list(table.columns) == ["Физика", "Химия", TOTAL]
+    assert table.loc["IT_2024 (id 2)", "Физика"] == 3.0
+    assert math.isnan(table.loc["IT_2024 (id 2)", "Химия"])
+    assert table.loc[TOTAL, TOTAL] == 4.0
+
+
+def test_pivot_without_cells_is_none():
+    assert _pivot_frame({}, "group", "subject", "avg") is None
@@ -0,0 +1,144 @@
+import threading
+from datetime import date
+
+from sqlalchemy import text
+
+from db import get_engine
+
+# marks и marks_daily_rollup секционированы по учебным годам одинаково (migrations/0008)
+PARTITIONED = ("marks", "marks_daily_rollup")
+ACADEMIC_YEAR_START_MONTH = 9
+ARCHIVE_SCHEMA = "archive"
+# DDL над секциями не должен вставать в очередь за долгими транзакциями и держать всех за собой
+LOCK_TIMEOUT_MS = 5000
+
+# учебные годы, секции которых уже проверены этим процессом
+_known_years: set[int] = set()
+_known_lock = threading.Lock()
+
+
+def academic_year(d: date) -> int:
+    # 2024 — учебный год с 1 сентября 2024 по 31 августа 2025
+    return d.year if d.month >= ACADEMIC_YEAR_START_MONTH else d.year - 1
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    return date(year, ACADEMIC_YEAR_START_MONTH, 1), date(year + 1, ACADEMIC_YEAR_START_MONTH, 1)
+
+
+def _partition(parent: str, year: int) -> str:
+    return f"{parent}_y{year}"
+
+
+def ensure_partitions(date_from: date, date_to: date) -> int:
+    # отдельная короткая транзакция: блокировка ATTACH не живёт до конца записи оценок
+    with get_engine().begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = {LOCK_TIMEOUT_MS}"))
+        created = conn.execute(
+            text("SELECT marks_ensure_partitions(:d_from, :d_to)"),
+            {"d_from": date_from, "d_to": date_to},
+        ).scalar()
+
+    with _known_lock:
+        _known_years.update(range(academic_year(date_from), academic_year(date_to) + 1))
+    return created
+
+
+def ensure_partitions_for(dates) -> None:
+    # перед записью оценок: секции лет, которых процесс ещё не видел. Заодно создаётся
+    # следующий учебный год, чтобы 1 сентября первая запись не ждала DDL
+    years = {academic_year(d) for d in dates}
+    if not years or years <= _known_years:
+        return
+    ensure_partitions(year_bounds(min(years))[0], year_bounds(max(years) + 1)[0])
+
+
+def list_partitions() -> list[dict]:
+    # секции marks: подключённые и перенесённые в архив
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT n.nspname AS schema, c.relname AS name,
+                       c.reltuples::bigint AS rows_estimate,
+                       pg_total_relation_size(c.oid) AS bytes
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE c.relkind = 'r'
+                  AND n.nspname IN ('public', :archive)
+                  AND c.relname ~ '^marks_y[0-9]{4}$'
+                ORDER BY c.relname
+                """
+            ),
+            {"archive": ARCHIVE_SCHEMA},
+        ).mappings().all()
+
+    result = []
+    for r in rows:
+        year = int(r["name"][-4:])
+        d_from, d_to = year_bounds(year)
+        result.append({
+            "year": year,
+            "date_from": d_from,
+            "date_to": d_to,
+            "archived": r["schema"] == ARCHIVE_SCHEMA,
+            "rows_estimate": max(r["rows_estimate"], 0),
+            "bytes": r["bytes"],
+        })
+    return result
+
+
+def _bump_marks_version(conn) -> None:
+    # ATTACH/DETACH не вызывают триггеров: версия и уведомление для кэшей — вручную
+    conn.execute(text("UPDATE data_versions SET version = version + 1 WHERE table_name = 'marks'"))
+    conn.execute(text("SELECT pg_notify('table_changed', 'marks')"))
+
+
+def archive_year(year: int) -> None:
+    # DETACH PARTITION ... CONCURRENTLY: на родителе только SHARE UPDATE EXCLUSIVE, чтение и запись
+    # не останавливаются. Работает только вне транзакции, поэтому AUTOCOMMIT
+    if year >= academic_year(date.today()):
+        raise ValueError("Текущий учебный год архивировать нельзя")
+
+    engine = get_engine()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET lock_timeout = {LOCK_TIMEOUT_MS}"))
+        for parent in PARTITIONED:
+            part = _partition(parent, year)
+            # NULL — не подключена; true — прошлый DETACH CONCURRENTLY прерван и ждёт FINALIZE
+            pending = conn.execute(
+                text(
+                    "SELECT inhdetachpending FROM pg_inherits "
+                    "WHERE inhrelid = to_regclass(:part) AND inhparent = to_regclass(:parent)"
+                ),
+                {"part": f"public.{part}", "parent": f"public.{parent}"},
+            ).scalar()
+            if pending is None:
+                raise ValueError(f"Секция {part} не подключена к {parent}")
+
+            mode = "FINALIZE" if pending else "CONCURRENTLY"
+            conn.execute(text(f"ALTER TABLE public.{parent} DETACH PARTITION public.{part} {mode}"))
+            conn.execute(text(f"ALTER TABLE public.{part} SET SCHEMA {ARCHIVE_SCHEMA}"))
+
+        _bump_marks_version(conn)
+
+    with _known_lock:
+        _known_years.discard(year)
+
+
+def restore_year(year: int) -> None:
+    # обратно из архива. DETACH CONCURRENTLY оставил на секции CHECK с её границами,
+    # поэтому ATTACH не сканирует таблицу
+    d_from, d_to = year_bounds(year)
+    with get_engine().begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = {LOCK_TIMEOUT_MS}"))
+        for parent in PARTITIONED:
+            part = _partition(parent, year)
+            conn.execute(text(f"ALTER TABLE {ARCHIVE_SCHEMA}.{part} SET SCHEMA public"))
+            conn.execute(
+                text(
+                    f"ALTER TABLE public.{parent} ATTACH PARTITION public.{part} "
+                    f"FOR VALUES FROM ('{d_from.isoformat()}') TO ('{d_to.isoformat()}')"
+                )
+            )
+        _bump_marks_version(conn)
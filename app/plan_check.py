@@ -0,0 +1,177 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event, select, text
+
+import db
+from db import REPLAY_LSN_SQL, WAL_LSN_EXPR, get_engine, get_session
+from models import Mark, Person
+from repos.marks import get_marks_page, get_sheet_marks
+from repos.people import get_people_page, get_students, get_teachers
+from repos.reports import avg_marks_analysis
+
+# таблицы, на которых seq scan считается регрессией
+GUARDED_TABLES = {"marks"}
+# секционированные по учебным годам (migrations/0008): секция marks_y2024 -> marks
+PARTITION_RE = re.compile(r"^(marks|marks_daily_rollup)_y\d{4}$")
+
+# пробы EXISTS триггеров-ограничителей удаления: выполняются на каждую удаляемую строку
+TRIGGER_QUERIES = {
+    "trg_forbid_person_delete (student)": "SELECT 1 FROM marks WHERE student_id = :id LIMIT 1",
+    "trg_forbid_person_delete (teacher)": "SELECT 1 FROM marks WHERE teacher_id = :id LIMIT 1",
+    "trg_forbid_subject_delete": "SELECT 1 FROM marks WHERE subject_id = :id LIMIT 1",
+}
+
+
+def _sample_ids() -> dict:
+    with get_session() as session:
+        row = session.execute(
+            select(Mark.student_id, Mark.subject_id, Mark.teacher_id, Mark.mark_date, Person.group_id)
+            .join(Person, Person.id == Mark.student_id)
+            .limit(1)
+        ).first()
+
+    if row is None:
+        return {"student_id": 1, "subject_id": 1, "teacher_id": 1,
+                "mark_date": date.today(), "group_id": 1}
+    return dict(row._mapping)
+
+
+def _term_start(d: date) -> date:
+    # семестры как в repos.reports: осенний с 1 сентября, весенний с 1 февраля
+    if d.month >= 9:
+        return date(d.year, 9, 1)
+    if d.month >= 2:
+        return date(d.year, 2, 1)
+    return date(d.year - 1, 9, 1)
+
+
+def pruning_checks(s: dict) -> dict:
+    # запросы в пределах одного учебного года: должны читать одну секцию
+    term_from = _term_start(s["mark_date"])
+    return {
+        "отчёт за семестр (rollup)": lambda: avg_marks_analysis.__wrapped__(term_from, s["mark_date"]),
+        "отчёт за семестр (marks)": (
+            lambda: avg_marks_analysis.__wrapped__(term_from, s["mark_date"], source="marks")
+        ),
+        "get_sheet_marks (один день)": lambda: get_sheet_marks(s["group_id"], s["subject_id"], s["mark_date"]),
+    }
+
+
+def repository_checks(s: dict) -> dict:
+    d_from = s["mark_date"] - timedelta(days=30)
+    d_to = s["mark_date"]
+
+    checks = {
+        "get_marks_page(student)": lambda: get_marks_page(student_id=s["student_id"]),
+        "get_marks_page(teacher)": lambda: get_marks_page(teacher_id=s["teacher_id"]),
+        "get_marks_page(subject)": lambda: get_marks_page(subject_id=s["subject_id"]),
+        "get_marks_page(dates)": lambda: get_marks_page(date_from=d_from, date_to=d_to, sort_by="date"),
+        "get_marks_page(sort=date)": lambda: get_marks_page(sort_by="date", descending=True),
+        "get_marks_page(sort=value)": lambda: get_marks_page(sort_by="value"),
+        "get_marks_page(next page)": lambda: get_marks_page(cursor=(s["mark_date"], 0), sort_by="date"),
+        "get_sheet_marks": lambda: get_sheet_marks(s["group_id"], s["subject_id"], s["mark_date"]),
+        "get_people_page": lambda: get_people_page(person_type="S"),
+        "get_students": lambda: get_students.__wrapped__(),
+        "get_teachers": lambda: get_teachers.__wrapped__(),
+    }
+    for mode in ("group", "student", "subject", "teacher", "year"):
+        checks[f"avg_marks_analysis({mode})"] = (
+            lambda mode=mode: avg_marks_analysis.__wrapped__(d_from, d_to, group_by=mode)
+        )
+        checks[f"avg_marks_analysis({mode}, filtered)"] = (
+            lambda mode=mode: avg_marks_analysis.__wrapped__(
+                d_from, d_to, group_id=s["group_id"], subject_id=s["subject_id"], group_by=mode
+            )
+        )
+    return checks
+
+
+@contextmanager
+def _capture_statements(engines):
+    # с репликами чтения идут через db.read_engines: слушаем все движки, иначе проверять нечего
+    captured = []
+    routing_sql = {REPLAY_LSN_SQL, "SELECT " + WAL_LSN_EXPR}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement not in routing_sql:
+            captured.append((statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _table(relation: str) -> str:
+    m = PARTITION_RE.match(relation)
+    return m.group(1) if m else relation
+
+
+def _scans(plan_node: dict) -> list[tuple[str, str]]:
+    # (тип узла, таблица) для всех чтений таблиц в плане
+    found = []
+    if plan_node.get("Relation Name"):
+        found.append((plan_node["Node Type"], plan_node["Relation Name"]))
+    for child in plan_node.get("Plans", []):
+        found.extend(_scans(child))
+    return found
+
+
+def _plan(raw) -> dict:
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    return plan[0]["Plan"]
+
+
+def _result(name: str, plan: dict, single_partition: bool = False) -> dict:
+    scanned = _scans(plan)
+    seq_scans = [rel for node, rel in scanned if node == "Seq Scan" and _table(rel) in GUARDED_TABLES]
+
+    # сколько секций каждой секционированной таблицы читает запрос
+    partitions: dict[str, set] = {}
+    for _, rel in scanned:
+        if PARTITION_RE.match(rel):
+            partitions.setdefault(_table(rel), set()).add(rel)
+    counts = {table: len(rels) for table, rels in partitions.items()}
+
+    ok = not seq_scans and not (single_partition and any(n > 1 for n in counts.values()))
+    return {"name": name, "ok": ok, "seq_scans": seq_scans, "partitions": counts, "cost": plan.get("Total Cost")}
+
+
+def run_plan_check(no_seqscan: bool = False) -> list[dict]:
+    # no_seqscan=True запрещает планировщику seq scan: на маленькой базе так видно,
+    # есть ли вообще индекс под запрос; иначе проверяется реальный план на засеянной базе
+    engine = get_engine()
+    samples = _sample_ids()
+    results = []
+
+    work = []
+    checks = [(repository_checks(samples), False), (pruning_checks(samples), True)]
+    for calls, single_partition in checks:
+        for name, call in calls.items():
+            with _capture_statements([engine, *db.read_engines]) as captured:
+                call()
+            work.extend((name, stmt, params, single_partition) for stmt, params in captured)
+
+    with engine.connect() as conn:
+        if no_seqscan:
+            conn.execute(text("SET enable_seqscan = off"))
+
+        for name, stmt, params, single_partition in work:
+            raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + stmt, params).scalar()
+            results.append(_result(name, _plan(raw), single_partition))
+
+        for name, sql in TRIGGER_QUERIES.items():
+            raw = conn.execute(
+                text("EXPLAIN (FORMAT JSON) " + sql), {"id": samples["student_id"]}
+            ).scalar()
+            results.append(_result(name, _plan(raw)))
+
+        conn.rollback()
+
+    return results
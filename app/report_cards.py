@@ -0,0 +1,209 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from multiprocessing import get_context
+
+import fitz
+import matplotlib
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+
+from db import get_read_session
+from models import Group, MarkDailyRollup, Person, Subject
+
+CARD_MODES = ("student", "group")
+# карточек на одну задачу пула: меньше накладных расходов на передачу между процессами
+CARDS_PER_TASK = 50
+
+# DejaVu из поставки matplotlib — в стандартных шрифтах PDF нет кириллицы
+FONT_FILE = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+FONT_NAME = "dejavu"
+
+PAGE_W, PAGE_H = fitz.paper_size("a4")
+MARGIN = 56
+LINE = 18
+
+
+def card_rows(date_from: date, date_to: date, group_id: int | None = None) -> list[dict]:
+    # один запрос на весь факультет: средний балл студента по каждому предмету за период
+    R = MarkDailyRollup
+    StudentA = aliased(Person)
+
+    stmt = (
+        select(
+            StudentA.id.label("student_id"),
+            StudentA.last_name,
+            StudentA.first_name,
+            StudentA.father_name,
+            Group.id.label("group_id"),
+            Group.name.label("group_name"),
+            Subject.name.label("subject_name"),
+            func.sum(R.sum_value).label("sum_value"),
+            func.sum(R.cnt).label("cnt"),
+        )
+        .select_from(R)
+        .join(StudentA, StudentA.id == R.student_id)
+        .join(Subject, Subject.id == R.subject_id)
+        .join(Group, Group.id == StudentA.group_id, isouter=True)
+        .where(R.day >= date_from, R.day <= date_to)
+        .group_by(StudentA.id, Group.id, Subject.id)
+        .order_by(Group.name, StudentA.last_name, StudentA.first_name, StudentA.id, Subject.name)
+    )
+    if group_id is not None:
+        stmt = stmt.where(StudentA.group_id == group_id)
+
+    with get_read_session() as session:
+        return [dict(r) for r in session.execute(stmt).mappings().all()]
+
+
+def build_cards(rows: list[dict]) -> list[dict]:
+    # строки уже упорядочены по студенту — собираем карточки за один проход
+    cards: list[dict] = []
+    for r in rows:
+        if not cards or cards[-1]["student_id"] != r["student_id"]:
+            name = " ".join(filter(None, [r["last_name"], r["first_name"], r["father_name"]]))
+            cards.append({
+                "student_id": r["student_id"],
+                "student_name": name,
+                "group_id": r["group_id"],
+                "group_name": r["group_name"] or "—",
+                "subjects": [],
+                "sum_value": 0,
+                "cnt": 0,
+            })
+        card = cards[-1]
+        card["subjects"].append({
+            "name": r["subject_name"],
+            "avg": r["sum_value"] / r["cnt"],
+            "count": int(r["cnt"]),
+        })
+        card["sum_value"] += int(r["sum_value"])
+        card["cnt"] += int(r["cnt"])
+
+    for card in cards:
+        card["avg"] = card.pop("sum_value") / card["cnt"]
+    return cards
+
+
+def _new_page(doc):
+    page = doc.new_page(width=PAGE_W, height=PAGE_H)
+    page.insert_font(fontname=FONT_NAME, fontfile=FONT_FILE)
+    return page
+
+
+def _text(page, x: float, y: float, text: str, size: float = 11) -> None:
+    page.insert_text((x, y), text, fontname=FONT_NAME, fontsize=size)
+
+
+def _draw_card(doc, card: dict, period: str) -> None:
+    page = _new_page(doc)
+    y = MARGIN + 10
+    _text(page, MARGIN, y, "Табель успеваемости", 18)
+    y += LINE * 2
+    _text(page, MARGIN, y, card["student_name"], 14)
+    y += LINE
+    _text(page, MARGIN, y, f"Группа: {card['group_name']}    Период: {period}")
+    y += LINE * 2
+
+    col_count = PAGE_W - MARGIN - 170
+    col_avg = PAGE_W - MARGIN - 80
+    _text(page, MARGIN, y, "Предмет")
+    _text(page, col_count, y, "Оценок")
+    _text(page, col_avg, y, "Средний")
+    y += 6
+    page.draw_line((MARGIN, y), (PAGE_W - MARGIN, y))
+    y += LINE
+
+    for s in card["subjects"]:
+        if y > PAGE_H - MARGIN - LINE * 2:
+            page = _new_page(doc)
+            y = MARGIN + 10
+        _text(page, MARGIN, y, s["name"][:60])
+        _text(page, col_count, y, str(s["count"]))
+        _text(page, col_avg, y, f"{s['avg']:.2f}")
+        y += LINE
+
+    y += 6
+    page.draw_line((MARGIN, y - LINE + 4), (PAGE_W - MARGIN, y - LINE + 4))
+    _text(page, MARGIN, y, "Итого по всем предметам", 12)
+    _text(page, col_count, y, str(card["cnt"]), 12)
+    _text(page, col_avg, y, f"{card['avg']:.2f}", 12)
+
+
+def _save(doc, path: str) -> None:
+    # шрифт вставлен на каждую страницу; subset оставляет одну копию нужных глифов
+    doc.subset_fonts()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", text).strip("_") or "_"
+
+
+def render_students(cards: list[dict], period: str, out_dir: str) -> int:
+    # выполняется в процессе пула; БД не трогает, пишет файлы сам
+    for card in cards:
+        group_dir = os.path.join(out_dir, _safe_name(card["group_name"]))
+        os.makedirs(group_dir, exist_ok=True)
+        doc = fitz.open()
+        _draw_card(doc, card, period)
+        _save(doc, os.path.join(group_dir, f"{_safe_name(card['student_name'])}_{card['student_id']}.pdf"))
+    return len(cards)
+
+
+def render_group(cards: list[dict], period: str, out_dir: str) -> int:
+    doc = fitz.open()
+    for card in cards:
+        _draw_card(doc, card, period)
+    _save(doc, os.path.join(out_dir, f"{_safe_name(cards[0]['group_name'])}.pdf"))
+    return len(cards)
+
+
+def _tasks(cards: list[dict], mode: str) -> list[list[dict]]:
+    if mode == "student":
+        return [cards[i:i + CARDS_PER_TASK] for i in range(0, len(cards), CARDS_PER_TASK)]
+    by_group: dict = {}
+    for card in cards:
+        by_group.setdefault(card["group_id"], []).append(card)
+    return list(by_group.values())
+
+
+def generate_report_cards(
+    date_from: date,
+    date_to: date,
+    out_dir: str,
+    mode: str = "student",
+    group_id: int | None = None,
+    workers: int | None = None,
+    progress=None,
+) -> dict:
+    # mode="student" — файл на студента (каталог на группу), "group" — один файл на группу.
+    # progress(done, total) вызывается в текущем процессе по мере готовности карточек
+    if mode not in CARD_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(CARD_MODES)}")
+
+    cards = build_cards(card_rows(date_from, date_to, group_id))
+    total = len(cards)
+    os.makedirs(out_dir, exist_ok=True)
+    if not cards:
+        return {"students": 0, "files": 0, "out_dir": out_dir}
+
+    period = f"{date_from:%d.%m.%Y} — {date_to:%d.%m.%Y}"
+    render = render_students if mode == "student" else render_group
+    tasks = _tasks(cards, mode)
+
+    done = 0
+    if progress:
+        progress(done, total)
+    # spawn, а не fork: у родителя открыты пул соединений и поток слушателя NOTIFY
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(render, task, period, out_dir) for task in tasks]
+        for future in as_completed(futures):
+            done += future.result()
+            if progress:
+                progress(done, total)
+
+    files = total if mode == "student" else len(tasks)
+    return {"students": total, "files": files, "out_dir": out_dir}
@@ -0,0 +1,66 @@
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from repos.paging import build_keyset_stmt
+
+
+def _fetch_raw(session: Session, stmt) -> tuple[list[str], list, dict]:
+    # Core-выполнение на соединении сессии (мимо ORM и identity map); строки — прямо
+    # с DBAPI-курсора, без Row-объектов SQLAlchemy
+    conn = session.connection()
+    result = conn.execute(stmt)
+    try:
+        keys = list(result.keys())
+        description = result.cursor.description
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+
+    # преобразования типов, которые Row применил бы к каждому значению, — потом по столбцу.
+    # Для чисел, строк и дат PostgreSQL-драйверы отдают готовые значения, их почти нет
+    processors = {}
+    for key, desc, column in zip(keys, description, stmt.selected_columns):
+        proc = column.type.dialect_impl(conn.dialect).result_processor(conn.dialect, desc[1])
+        if proc is not None:
+            processors[key] = proc
+    return keys, rows, processors
+
+
+def rows_frame(keys: list[str], rows, processors: dict, exclude: list[str] | None = None) -> pd.DataFrame:
+    # столбцы собирает pandas (from_records) из кортежей курсора, без dict на каждую строку
+    frame = pd.DataFrame.from_records(rows, columns=keys, exclude=exclude, coerce_float=False)
+    for key, proc in processors.items():
+        if key in frame.columns:
+            frame[key] = frame[key].map(proc)
+    return frame
+
+
+def fetch_frame(session: Session, stmt) -> pd.DataFrame:
+    keys, rows, processors = _fetch_raw(session, stmt)
+    return rows_frame(keys, rows, processors)
+
+
+def fetch_keyset_frame(
+    session: Session,
+    stmt,
+    sort_keys: list,
+    cursor: tuple | None,
+    limit: int,
+    descending: bool = False,
+) -> dict:
+    stmt, labels = build_keyset_stmt(stmt, sort_keys, cursor, limit, descending)
+    keys, rows, processors = _fetch_raw(session, stmt)
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    # курсор из исходных значений строки, а не из numpy-типов DataFrame
+    next_cursor = None
+    if has_next:
+        values = [(lb, rows[-1][keys.index(lb)]) for lb in labels]
+        next_cursor = tuple(processors[lb](v) if lb in processors else v for lb, v in values)
+
+    return {
+        "rows": rows_frame(keys, rows, processors, exclude=labels),
+        "next_cursor": next_cursor,
+    }
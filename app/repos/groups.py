@@ -1,38 +1,87 @@
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
 
-from db import get_session
+from cache import cached, invalidate
+from db import get_read_session, get_session
+from metrics import instrumented
 from models import Group
+from repos.paging import fetch_keyset_page
 
+GROUP_SORT = [Group.name, Group.id]
 
+
+@cached("groups")
+@instrumented
 def get_all_groups():
-    with get_session() as session:
+    with get_read_session() as session:
         stmt = select(Group).order_by(Group.name)
         groups = session.scalars(stmt).all()
 
     return [{"id": g.id, "name": g.name} for g in groups]
 
 
-def create_group(name: str):
+def _groups_page_stmt(name: str | None):
+    stmt = select(Group.id.label("id"), Group.name.label("name"))
+    if name:
+        # ILIKE '%...%' идёт в триграммный индекс groups_name_trgm_idx (миграция 0005)
+        stmt = stmt.where(Group.name.icontains(name.strip(), autoescape=True))
+    return stmt
+
+
+@instrumented
+def get_groups_page(
+    cursor: tuple | None = None,
+    limit: int = 50,
+    descending: bool = False,
+    name: str | None = None,
+) -> dict:
+    with get_read_session() as session:
+        return fetch_keyset_page(
+            session, _groups_page_stmt(name), GROUP_SORT, cursor, limit, descending
+        )
+
+
+@instrumented
+def create_group(name: str) -> int:
     with get_session() as session:
-        group = Group(name=name)
-        session.add(group)
+        group_id = session.execute(
+            insert(Group).values(name=name).returning(Group.id)
+        ).scalar_one()
         session.commit()
 
+    invalidate("groups", "students")
+    return group_id
+
 
+@instrumented
 def update_group(group_id: int, new_name: str):
     with get_session() as session:
-        group = session.get(Group, group_id)
-        if group is None:
+        found = session.execute(
+            update(Group)
+            .where(Group.id == group_id)
+            .values(name=new_name)
+            .returning(Group.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Группа id={group_id} не найдена")
-        group.name = new_name
         session.commit()
 
+    invalidate("groups", "students")
 
+
+@instrumented
 def delete_group(group_id: int):
+    # студенты группы проверяются триггером, group_id остальных обнуляет ON DELETE SET NULL
     with get_session() as session:
-        group = session.get(Group, group_id)
-        if group is None:
+        found = session.execute(
+            delete(Group)
+            .where(Group.id == group_id)
+            .returning(Group.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Группа id={group_id} не найдена")
-        session.delete(group)
         session.commit()
+
+    invalidate("groups", "students")
@@ -1,23 +1,43 @@
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from datetime import date
 
-from db import get_session
+import pandas as pd
+from sqlalchemy import select, insert, update, delete, values, column, Integer, and_
+from sqlalchemy.orm import Session, joinedload, aliased
+
+from db import get_read_session, get_session
+from metrics import instrumented
 from models import Mark, Person, Subject
+from partitions import ensure_partitions_for
+from repos.columnar import fetch_frame, fetch_keyset_frame
+from repos.paging import fetch_keyset_page
+from repos.people import full_name_expr
 
 
-def get_all_marks() -> list[dict]:
-    with get_session() as session:
-        stmt = (
-            select(Mark)
-            .options(
-                joinedload(Mark.student),
-                joinedload(Mark.teacher),
-                joinedload(Mark.subject),
-            )
-            .order_by(Mark.id)
+StudentA = aliased(Person)
+TeacherA = aliased(Person)
+
+MARK_SORTS = {
+    "id": [Mark.id],
+    "date": [Mark.mark_date, Mark.id],
+    "value": [Mark.value, Mark.id],
+    "student": [StudentA.last_name, StudentA.first_name, Mark.id],
+    "subject": [Subject.name, Mark.id],
+}
+
+
+def _all_marks_stmt():
+    return (
+        select(Mark)
+        .options(
+            joinedload(Mark.student),
+            joinedload(Mark.teacher),
+            joinedload(Mark.subject),
         )
-        marks = session.scalars(stmt).all()
+        .order_by(Mark.id)
+    )
 
+
+def _mark_rows(marks) -> list[dict]:
     result: list[dict] = []
     for m in marks:
         st = m.student
@@ -51,18 +71,219 @@ def get_all_marks() -> list[dict]:
     return result
 
 
-def create_mark(student_id: int, subject_id: int, teacher_id: int, value: int):
-    with get_session() as session:
-        mark = Mark(
-            student_id=student_id,
-            subject_id=subject_id,
-            teacher_id=teacher_id,
-            value=value,
+def _all_marks_columns_stmt():
+    # те же столбцы, что у _mark_rows, но ФИО собираются в SQL
+    return (
+        select(
+            Mark.id.label("id"),
+            Mark.value.label("value"),
+            Mark.student_id.label("student_id"),
+            Mark.teacher_id.label("teacher_id"),
+            Mark.subject_id.label("subject_id"),
+            full_name_expr(StudentA).label("student_name"),
+            full_name_expr(TeacherA).label("teacher_name"),
+            Subject.name.label("subject_name"),
+        )
+        .select_from(Mark)
+        .join(StudentA, StudentA.id == Mark.student_id)
+        .join(TeacherA, TeacherA.id == Mark.teacher_id)
+        .join(Subject, Subject.id == Mark.subject_id)
+        .order_by(Mark.id)
+    )
+
+
+@instrumented
+def get_all_marks(as_frame: bool = False) -> list[dict] | pd.DataFrame:
+    with get_read_session() as session:
+        if as_frame:
+            return fetch_frame(session, _all_marks_columns_stmt())
+        marks = session.scalars(_all_marks_stmt()).all()
+    return _mark_rows(marks)
+
+
+def _marks_page_stmt(
+    sort_by, student_id, subject_id, teacher_id, group_id, date_from, date_to, value
+):
+    if sort_by not in MARK_SORTS:
+        raise ValueError(f"sort_by must be one of: {', '.join(MARK_SORTS)}")
+
+    stmt = (
+        select(
+            Mark.id.label("id"),
+            Mark.value.label("value"),
+            Mark.mark_date.label("mark_date"),
+            Mark.student_id.label("student_id"),
+            Mark.teacher_id.label("teacher_id"),
+            Mark.subject_id.label("subject_id"),
+            full_name_expr(StudentA).label("student_name"),
+            full_name_expr(TeacherA).label("teacher_name"),
+            Subject.name.label("subject_name"),
+        )
+        .select_from(Mark)
+        .join(StudentA, StudentA.id == Mark.student_id)
+        .join(TeacherA, TeacherA.id == Mark.teacher_id)
+        .join(Subject, Subject.id == Mark.subject_id)
+    )
+
+    if student_id is not None:
+        stmt = stmt.where(Mark.student_id == student_id)
+    if subject_id is not None:
+        stmt = stmt.where(Mark.subject_id == subject_id)
+    if teacher_id is not None:
+        stmt = stmt.where(Mark.teacher_id == teacher_id)
+    if group_id is not None:
+        stmt = stmt.where(StudentA.group_id == group_id)
+    if date_from is not None:
+        stmt = stmt.where(Mark.mark_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Mark.mark_date <= date_to)
+    if value is not None:
+        stmt = stmt.where(Mark.value == value)
+    return stmt
+
+
+@instrumented
+def get_marks_page(
+    cursor: tuple | None = None,
+    limit: int = 50,
+    sort_by: str = "id",
+    descending: bool = False,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    value: int | None = None,
+    as_frame: bool = False,
+) -> dict:
+    # as_frame=True: rows — DataFrame, собранный из столбцов Core-результата
+    stmt = _marks_page_stmt(
+        sort_by, student_id, subject_id, teacher_id, group_id, date_from, date_to, value
+    )
+    with get_read_session() as session:
+        if as_frame:
+            return fetch_keyset_frame(
+                session, stmt, MARK_SORTS[sort_by], cursor, limit, descending
+            )
+        return fetch_keyset_page(
+            session, stmt, MARK_SORTS[sort_by], cursor, limit, descending
+        )
+
+
+def _sheet_marks_stmt(group_id: int, subject_id: int, mark_date: date):
+    # по строке на каждую оценку студента группы за день; студенты без оценки — с mark_id = None
+    return (
+        select(
+            Person.id.label("student_id"),
+            full_name_expr(Person).label("student_name"),
+            Mark.id.label("mark_id"),
+            Mark.value.label("value"),
+            Mark.teacher_id.label("teacher_id"),
+        )
+        .select_from(Person)
+        .join(
+            Mark,
+            and_(
+                Mark.student_id == Person.id,
+                Mark.subject_id == subject_id,
+                Mark.mark_date == mark_date,
+            ),
+            isouter=True,
         )
-        session.add(mark)
+        .where(Person.group_id == group_id, Person.type == "S")
+        .order_by(Person.last_name, Person.first_name, Person.id, Mark.id)
+    )
+
+
+@instrumented
+def get_sheet_marks(group_id: int, subject_id: int, mark_date: date) -> list[dict]:
+    with get_read_session() as session:
+        rows = session.execute(_sheet_marks_stmt(group_id, subject_id, mark_date)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+@instrumented
+def save_marks_batch(
+    inserts: list[dict],
+    updates: list[dict],
+    deletes: list[int],
+    mark_date: date | None = None,
+) -> dict:
+    # всё в одной транзакции: DELETE ... IN, UPDATE ... FROM (VALUES ...), многострочный INSERT.
+    # mark_date — день ведомости: UPDATE/DELETE по id читают одну секцию marks, а не все годы
+    result = {"inserted": 0, "updated": 0, "deleted": 0}
+    ensure_partitions_for(m["mark_date"] for m in inserts)
+    same_day = [Mark.mark_date == mark_date] if mark_date is not None else []
+
+    with get_session() as session:
+        if deletes:
+            res = session.execute(
+                delete(Mark)
+                .where(Mark.id.in_(deletes), *same_day)
+                .execution_options(synchronize_session=False)
+            )
+            result["deleted"] = res.rowcount
+
+        if updates:
+            changed = values(
+                column("id", Integer),
+                column("value", Integer),
+                column("teacher_id", Integer),
+                name="changed",
+                literal_binds=True,
+            ).data([(int(u["id"]), int(u["value"]), int(u["teacher_id"])) for u in updates])
+
+            res = session.execute(
+                update(Mark)
+                .where(Mark.id == changed.c.id, *same_day)
+                .values(value=changed.c.value, teacher_id=changed.c.teacher_id)
+                .execution_options(synchronize_session=False)
+            )
+            result["updated"] = res.rowcount
+
+        if inserts:
+            res = session.execute(
+                insert(Mark).values(
+                    [
+                        {
+                            "student_id": int(m["student_id"]),
+                            "subject_id": int(m["subject_id"]),
+                            "teacher_id": int(m["teacher_id"]),
+                            "value": int(m["value"]),
+                            "mark_date": m["mark_date"],
+                        }
+                        for m in inserts
+                    ]
+                )
+            )
+            result["inserted"] = res.rowcount
+
+        session.commit()
+
+    return result
+
+
+@instrumented
+def create_mark(student_id: int, subject_id: int, teacher_id: int, value: int) -> int:
+    # mark_date — DEFAULT CURRENT_DATE в БД
+    ensure_partitions_for([date.today()])
+    with get_session() as session:
+        mark_id = session.execute(
+            insert(Mark)
+            .values(
+                student_id=student_id,
+                subject_id=subject_id,
+                teacher_id=teacher_id,
+                value=value,
+            )
+            .returning(Mark.id)
+        ).scalar_one()
         session.commit()
+    return mark_id
 
 
+@instrumented
 def update_mark(
     mark_id: int,
     student_id: int,
@@ -70,24 +291,34 @@ def update_mark(
     teacher_id: int,
     value: int,
 ):
+    # UPDATE ... RETURNING: одна команда вместо SELECT по всем секциям и UPDATE
     with get_session() as session:
-        mark = session.get(Mark, mark_id)
-        if mark is None:
+        found = session.execute(
+            update(Mark)
+            .where(Mark.id == mark_id)
+            .values(
+                student_id=student_id,
+                subject_id=subject_id,
+                teacher_id=teacher_id,
+                value=value,
+            )
+            .returning(Mark.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Оценка id={mark_id} не найдена")
-
-        mark.student_id = student_id
-        mark.subject_id = subject_id
-        mark.teacher_id = teacher_id
-        mark.value = value
-
         session.commit()
 
 
+@instrumented
 def delete_mark(mark_id: int):
     with get_session() as session:
-        mark = session.get(Mark, mark_id)
-        if mark is None:
+        found = session.execute(
+            delete(Mark)
+            .where(Mark.id == mark_id)
+            .returning(Mark.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Оценка id={mark_id} не найдена")
-
-        session.delete(mark)
         session.commit()
@@ -0,0 +1,58 @@
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+
+def build_keyset_stmt(
+    stmt,
+    sort_keys: list,
+    cursor: tuple | None,
+    limit: int,
+    descending: bool = False,
+):
+    # sort_keys должны быть NOT NULL и заканчиваться уникальным столбцом (id),
+    # иначе сравнение кортежей пропустит или повторит строки
+    labels = [f"_sort_{i}" for i in range(len(sort_keys))]
+    stmt = stmt.add_columns(*[k.label(lb) for k, lb in zip(sort_keys, labels)])
+
+    if cursor is not None:
+        # курсор приходит от клиента (API): другой длины — от другой сортировки
+        if len(cursor) != len(sort_keys):
+            raise ValueError(f"cursor must have {len(sort_keys)} values for this sort")
+        key_tuple = tuple_(*sort_keys)
+        cursor_tuple = tuple_(*cursor)
+        stmt = stmt.where(key_tuple < cursor_tuple if descending else key_tuple > cursor_tuple)
+        # следствие сравнения кортежей по первому ключу: по сравнению строк планировщик
+        # не отсекает секции, а по простому условию на mark_date — отсекает
+        first = sort_keys[0]
+        stmt = stmt.where(first <= cursor[0] if descending else first >= cursor[0])
+
+    order = [k.desc() if descending else k.asc() for k in sort_keys]
+    return stmt.order_by(*order).limit(limit + 1), labels
+
+
+def keyset_result(rows, labels: list[str], limit: int) -> dict:
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = tuple(rows[-1][lb] for lb in labels)
+
+    items = [
+        {k: v for k, v in r.items() if k not in labels}
+        for r in rows
+    ]
+    return {"rows": items, "next_cursor": next_cursor}
+
+
+def fetch_keyset_page(
+    session: Session,
+    stmt,
+    sort_keys: list,
+    cursor: tuple | None,
+    limit: int,
+    descending: bool = False,
+) -> dict:
+    stmt, labels = build_keyset_stmt(stmt, sort_keys, cursor, limit, descending)
+    rows = session.execute(stmt).mappings().all()
+    return keyset_result(rows, labels, limit)
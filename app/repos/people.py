@@ -1,22 +1,48 @@
 from typing import Optional
 
-from sqlalchemy import select
+import pandas as pd
+from sqlalchemy import select, insert, update, delete, func, exists, or_
 from sqlalchemy.orm import Session
 
-from db import get_session
-from models import Person, Group
+from cache import cached, invalidate
+from db import get_read_session, get_session
+from metrics import instrumented
+from models import Person, Group, Mark
+from repos.columnar import fetch_frame, fetch_keyset_frame
+from repos.paging import fetch_keyset_page
 
 
-def get_all_people() -> list[dict]:
-    with get_session() as session:
-        stmt = (
-            select(Person, Group)
-            .select_from(Person)
-            .join(Group, Person.group_id == Group.id, isouter=True)
-            .order_by(Person.type, Person.last_name, Person.first_name)
-        )
-        rows = session.execute(stmt).all()
+PEOPLE_SORTS = {
+    "name": [Person.last_name, Person.first_name, Person.id],
+    "group": [func.coalesce(Group.name, ""), Person.last_name, Person.id],
+    "id": [Person.id],
+}
+
+SEARCH_LIMIT = 20
+# короче — триграмм не хватает для индекса, ищем по началу строки
+SEARCH_MIN_FUZZY = 3
+
+
+def full_name_expr(person):
+    # то же, что " ".join(filter(None, [last, first, father])), но на стороне БД
+    return func.concat_ws(
+        " ",
+        func.nullif(person.last_name, ""),
+        func.nullif(person.first_name, ""),
+        func.nullif(person.father_name, ""),
+    )
+
+
+def _all_people_stmt():
+    return (
+        select(Person, Group)
+        .select_from(Person)
+        .join(Group, Person.group_id == Group.id, isouter=True)
+        .order_by(Person.type, Person.last_name, Person.first_name)
+    )
 
+
+def _people_rows(rows) -> list[dict]:
     result: list[dict] = []
     for person, group in rows:
         result.append(
@@ -33,17 +59,93 @@ def get_all_people() -> list[dict]:
     return result
 
 
-def get_students() -> list[dict]:
-    with get_session() as session:
-        stmt = (
-            select(Person, Group)
-            .select_from(Person)
-            .join(Group, Person.group_id == Group.id, isouter=True)
-            .where(Person.type == "S")
-            .order_by(Person.last_name, Person.first_name)
+def _all_people_columns_stmt():
+    return (
+        select(
+            Person.id.label("id"),
+            Person.first_name.label("first_name"),
+            Person.last_name.label("last_name"),
+            Person.father_name.label("father_name"),
+            Person.type.label("type"),
+            Person.group_id.label("group_id"),
+            Group.name.label("group_name"),
         )
-        rows = session.execute(stmt).all()
+        .select_from(Person)
+        .join(Group, Person.group_id == Group.id, isouter=True)
+        .order_by(Person.type, Person.last_name, Person.first_name)
+    )
+
+
+@instrumented
+def get_all_people(as_frame: bool = False) -> list[dict] | pd.DataFrame:
+    with get_read_session() as session:
+        if as_frame:
+            return fetch_frame(session, _all_people_columns_stmt())
+        rows = session.execute(_all_people_stmt()).all()
+    return _people_rows(rows)
+
+
+def _people_page_stmt(sort_by, person_type, group_id, name):
+    if sort_by not in PEOPLE_SORTS:
+        raise ValueError(f"sort_by must be one of: {', '.join(PEOPLE_SORTS)}")
 
+    stmt = (
+        select(
+            Person.id.label("id"),
+            Person.first_name.label("first_name"),
+            Person.last_name.label("last_name"),
+            Person.father_name.label("father_name"),
+            Person.type.label("type"),
+            Person.group_id.label("group_id"),
+            Group.name.label("group_name"),
+        )
+        .select_from(Person)
+        .join(Group, Person.group_id == Group.id, isouter=True)
+    )
+
+    if person_type is not None:
+        stmt = stmt.where(Person.type == person_type)
+    if group_id is not None:
+        stmt = stmt.where(Person.group_id == group_id)
+    if name:
+        # % и _ из ввода — обычные символы, а не шаблон LIKE
+        stmt = stmt.where(Person.last_name.istartswith(name.strip(), autoescape=True))
+    return stmt
+
+
+@instrumented
+def get_people_page(
+    cursor: tuple | None = None,
+    limit: int = 50,
+    sort_by: str = "name",
+    descending: bool = False,
+    person_type: str | None = None,
+    group_id: int | None = None,
+    name: str | None = None,
+    as_frame: bool = False,
+) -> dict:
+    stmt = _people_page_stmt(sort_by, person_type, group_id, name)
+    with get_read_session() as session:
+        if as_frame:
+            return fetch_keyset_frame(
+                session, stmt, PEOPLE_SORTS[sort_by], cursor, limit, descending
+            )
+        return fetch_keyset_page(
+            session, stmt, PEOPLE_SORTS[sort_by], cursor, limit, descending
+        )
+
+
+def _students_stmt():
+    return (
+        select(Person, Group)
+        .select_from(Person)
+        .join(Group, Person.group_id == Group.id, isouter=True)
+        .where(Person.type == "S")
+        .order_by(Person.last_name, Person.first_name)
+    )
+
+
+def _student_rows(rows) -> list[dict]:
     res: list[dict] = []
     for p, g in rows:
         res.append(
@@ -59,15 +161,23 @@ def get_students() -> list[dict]:
     return res
 
 
-def get_teachers() -> list[dict]:
-    with get_session() as session:
-        stmt = (
-            select(Person)
-            .where(Person.type == "P")
-            .order_by(Person.last_name, Person.first_name)
-        )
-        teachers = session.scalars(stmt).all()
+@cached("students")
+@instrumented
+def get_students() -> list[dict]:
+    with get_read_session() as session:
+        rows = session.execute(_students_stmt()).all()
+    return _student_rows(rows)
+
+
+def _teachers_stmt():
+    return (
+        select(Person)
+        .where(Person.type == "P")
+        .order_by(Person.last_name, Person.first_name)
+    )
+
 
+def _teacher_rows(teachers) -> list[dict]:
     return [
         {
             "id": t.id,
@@ -79,25 +189,127 @@ def get_teachers() -> list[dict]:
     ]
 
 
+@cached("teachers")
+@instrumented
+def get_teachers() -> list[dict]:
+    with get_read_session() as session:
+        teachers = session.scalars(_teachers_stmt()).all()
+    return _teacher_rows(teachers)
+
+
+def search_text_expr(person):
+    # совпадает с выражением индекса people_search_trgm_idx (миграция 0005)
+    return func.person_search_text(person.last_name, person.first_name, person.father_name)
+
+
+def _search_rows(rows) -> list[dict]:
+    return [
+        {
+            "id": r.id,
+            "first_name": r.first_name,
+            "last_name": r.last_name,
+            "father_name": r.father_name,
+            "type": r.type,
+            "group_id": r.group_id,
+            "group_name": r.group_name,
+        }
+        for r in rows
+    ]
+
+
+def _search_columns():
+    return (
+        select(
+            Person.id,
+            Person.first_name,
+            Person.last_name,
+            Person.father_name,
+            Person.type,
+            Person.group_id,
+            Group.name.label("group_name"),
+        )
+        .select_from(Person)
+        .join(Group, Person.group_id == Group.id, isouter=True)
+    )
+
+
+@instrumented
+def search_people(
+    query: str | None = None,
+    person_type: str | None = None,
+    group_id: int | None = None,
+    subject_id: int | None = None,
+    limit: int = SEARCH_LIMIT,
+) -> list[dict]:
+    # subject_id — только преподаватели, ставившие оценки по предмету
+    stmt = _search_columns()
+
+    if person_type is not None:
+        stmt = stmt.where(Person.type == person_type)
+    if group_id is not None:
+        stmt = stmt.where(Person.group_id == group_id)
+    if subject_id is not None:
+        stmt = stmt.where(
+            exists().where(Mark.teacher_id == Person.id, Mark.subject_id == subject_id)
+        )
+
+    q = " ".join((query or "").lower().split())
+    text_expr = search_text_expr(Person)
+    order = [Person.last_name, Person.first_name, Person.id]
+
+    if len(q) >= SEARCH_MIN_FUZZY:
+        stmt = stmt.where(
+            or_(
+                text_expr.contains(q, autoescape=True),
+                func.person_name_match(q, text_expr),
+            )
+        )
+        order = [func.word_similarity(q, text_expr).desc()] + order
+    elif q:
+        stmt = stmt.where(text_expr.startswith(q, autoescape=True))
+
+    with get_read_session() as session:
+        rows = session.execute(stmt.order_by(*order).limit(limit)).all()
+    return _search_rows(rows)
+
+
+@instrumented
+def get_people_by_ids(ids: list[int]) -> list[dict]:
+    if not ids:
+        return []
+    stmt = _search_columns().where(Person.id.in_([int(i) for i in ids]))
+    with get_read_session() as session:
+        rows = session.execute(stmt).all()
+    return _search_rows(rows)
+
+
+@instrumented
 def create_person(
     first_name: str,
     last_name: str,
     father_name: Optional[str],
     group_id: Optional[int],
     person_type: str,
-):
+) -> int:
     with get_session() as session:
-        person = Person(
-            first_name=first_name,
-            last_name=last_name,
-            father_name=father_name,
-            group_id=group_id,
-            type=person_type,
-        )
-        session.add(person)
+        person_id = session.execute(
+            insert(Person)
+            .values(
+                first_name=first_name,
+                last_name=last_name,
+                father_name=father_name,
+                group_id=group_id,
+                type=person_type,
+            )
+            .returning(Person.id)
+        ).scalar_one()
         session.commit()
 
+    invalidate("students", "teachers")
+    return person_id
+
 
+@instrumented
 def update_person(
     person_id: int,
     first_name: str,
@@ -107,23 +319,37 @@ def update_person(
     person_type: str,
 ):
     with get_session() as session:
-        person = session.get(Person, person_id)
-        if person is None:
+        found = session.execute(
+            update(Person)
+            .where(Person.id == person_id)
+            .values(
+                first_name=first_name,
+                last_name=last_name,
+                father_name=father_name,
+                group_id=group_id,
+                type=person_type,
+            )
+            .returning(Person.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Человек id={person_id} не найден")
-
-        person.first_name = first_name
-        person.last_name = last_name
-        person.father_name = father_name
-        person.group_id = group_id
-        person.type = person_type
-
         session.commit()
 
+    invalidate("students", "teachers")
 
+
+@instrumented
 def delete_person(person_id: int):
     with get_session() as session:
-        person = session.get(Person, person_id)
-        if person is None:
+        found = session.execute(
+            delete(Person)
+            .where(Person.id == person_id)
+            .returning(Person.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Человек id={person_id} не найден")
-        session.delete(person)
         session.commit()
+
+    invalidate("students", "teachers")
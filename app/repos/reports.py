@@ -1,11 +1,84 @@
 from datetime import date
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, case, literal_column, tuple_, Date, Integer
+from sqlalchemy.orm import aliased
 
-from db import get_session
-from models import Mark, Person, Subject, Group
+from cache import versioned
+from db import get_read_session
+from metrics import instrumented
+from models import Mark, MarkDailyRollup, Person, Subject, Group
+from repos.versions import data_version
 
+REPORT_DIMENSIONS = ("group", "student", "subject", "teacher", "year")
 
-def avg_marks_analysis(
+# от мелкого к крупному; term — семестр: осенний с 1 сентября, весенний с 1 февраля
+TIME_BUCKETS = ("day", "week", "month", "term")
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 30, "term": 182}
+MAX_SERIES_POINTS = 400
+
+
+def _report_base(
+    date_from: date,
+    date_to: date,
+    group_id: int | None,
+    student_id: int | None,
+    subject_id: int | None,
+    teacher_id: int | None,
+    source: str,
+) -> dict:
+    # source="marks" — расчёт по сырым оценкам, нужен для сверки rollup
+    if source == "rollup":
+        Src = MarkDailyRollup
+        date_col = MarkDailyRollup.day
+        avg_expr = (func.sum(MarkDailyRollup.sum_value) / func.sum(MarkDailyRollup.cnt)).label("avg_value")
+        cnt_expr = func.sum(MarkDailyRollup.cnt).label("cnt")
+        sum_expr = func.sum(MarkDailyRollup.sum_value).label("sum_value")
+    elif source == "marks":
+        Src = Mark
+        date_col = Mark.mark_date
+        avg_expr = func.avg(Mark.value).label("avg_value")
+        cnt_expr = func.count(Mark.id).label("cnt")
+        sum_expr = func.sum(Mark.value).label("sum_value")
+    else:
+        raise ValueError("source must be one of: rollup, marks")
+
+    StudentA = aliased(Person)
+    TeacherA = aliased(Person)
+
+    conditions = [
+        date_col >= date_from,
+        date_col <= date_to,
+    ]
+
+    if group_id is not None:
+        conditions.append(StudentA.group_id == group_id)
+    if student_id is not None:
+        conditions.append(Src.student_id == student_id)
+    if subject_id is not None:
+        conditions.append(Src.subject_id == subject_id)
+    if teacher_id is not None:
+        conditions.append(Src.teacher_id == teacher_id)
+
+    base = (
+        select()
+        .select_from(Src)
+        .join(StudentA, StudentA.id == Src.student_id)
+        .join(TeacherA, TeacherA.id == Src.teacher_id)
+        .join(Subject, Subject.id == Src.subject_id)
+        .join(Group, Group.id == StudentA.group_id, isouter=True)
+        .where(and_(*conditions))
+    )
+    return {
+        "base": base,
+        "student": StudentA,
+        "teacher": TeacherA,
+        "date_col": date_col,
+        "avg": avg_expr,
+        "cnt": cnt_expr,
+        "sum": sum_expr,
+    }
+
+
+def _avg_marks_stmt(
     date_from: date,
     date_to: date,
     group_id: int | None = None,
@@ -13,108 +86,82 @@ def avg_marks_analysis(
     subject_id: int | None = None,
     teacher_id: int | None = None,
     group_by: str = "group",
-) -> list[dict]:
-    with get_session() as session:
-        conditions = [
-            Mark.mark_date >= date_from,
-            Mark.mark_date <= date_to,
-        ]
-
-        if group_id is not None:
-            conditions.append(Person.group_id == group_id)
-        if student_id is not None:
-            conditions.append(Mark.student_id == student_id)
-        if subject_id is not None:
-            conditions.append(Mark.subject_id == subject_id)
-        if teacher_id is not None:
-            conditions.append(Mark.teacher_id == teacher_id)
-
-        # student = Person (алиас)
-        Student = Person
-        Teacher = Person
-
-        # join на student и teacher через алиасы
-        from sqlalchemy.orm import aliased
-        StudentA = aliased(Person)
-        TeacherA = aliased(Person)
-
-        base = (
-            select()
-            .select_from(Mark)
-            .join(StudentA, StudentA.id == Mark.student_id)
-            .join(TeacherA, TeacherA.id == Mark.teacher_id)
-            .join(Subject, Subject.id == Mark.subject_id)
-            .join(Group, Group.id == StudentA.group_id, isouter=True)
-            .where(and_(*conditions))
-        )
+    source: str = "rollup",
+):
+    b = _report_base(date_from, date_to, group_id, student_id, subject_id, teacher_id, source)
+    base = b["base"]
+    StudentA = b["student"]
+    TeacherA = b["teacher"]
+    date_col = b["date_col"]
+    avg_expr = b["avg"]
+    cnt_expr = b["cnt"]
 
-        avg_expr = func.avg(Mark.value).label("avg_value")
-        cnt_expr = func.count(Mark.id).label("cnt")
-
-        if group_by == "group":
-            stmt = (
-                base.with_only_columns(
-                    Group.id.label("key_id"),
-                    Group.name.label("key_name"),
-                    avg_expr,
-                    cnt_expr,
-                )
-                .group_by(Group.id, Group.name)
-                .order_by(Group.name)
+    if group_by == "group":
+        stmt = (
+            base.with_only_columns(
+                Group.id.label("key_id"),
+                Group.name.label("key_name"),
+                avg_expr,
+                cnt_expr,
             )
+            .group_by(Group.id, Group.name)
+            .order_by(Group.name)
+        )
 
-        elif group_by == "student":
-            stmt = (
-                base.with_only_columns(
-                    StudentA.id.label("key_id"),
-                    (StudentA.last_name + " " + StudentA.first_name).label("key_name"),
-                    avg_expr,
-                    cnt_expr,
-                )
-                .group_by(StudentA.id, StudentA.last_name, StudentA.first_name)
-                .order_by(StudentA.last_name, StudentA.first_name)
+    elif group_by == "student":
+        stmt = (
+            base.with_only_columns(
+                StudentA.id.label("key_id"),
+                (StudentA.last_name + " " + StudentA.first_name).label("key_name"),
+                avg_expr,
+                cnt_expr,
             )
+            .group_by(StudentA.id, StudentA.last_name, StudentA.first_name)
+            .order_by(StudentA.last_name, StudentA.first_name)
+        )
 
-        elif group_by == "subject":
-            stmt = (
-                base.with_only_columns(
-                    Subject.id.label("key_id"),
-                    Subject.name.label("key_name"),
-                    avg_expr,
-                    cnt_expr,
-                )
-                .group_by(Subject.id, Subject.name)
-                .order_by(Subject.name)
+    elif group_by == "subject":
+        stmt = (
+            base.with_only_columns(
+                Subject.id.label("key_id"),
+                Subject.name.label("key_name"),
+                avg_expr,
+                cnt_expr,
             )
+            .group_by(Subject.id, Subject.name)
+            .order_by(Subject.name)
+        )
 
-        elif group_by == "teacher":
-            stmt = (
-                base.with_only_columns(
-                    TeacherA.id.label("key_id"),
-                    (TeacherA.last_name + " " + TeacherA.first_name).label("key_name"),
-                    avg_expr,
-                    cnt_expr,
-                )
-                .group_by(TeacherA.id, TeacherA.last_name, TeacherA.first_name)
-                .order_by(TeacherA.last_name, TeacherA.first_name)
+    elif group_by == "teacher":
+        stmt = (
+            base.with_only_columns(
+                TeacherA.id.label("key_id"),
+                (TeacherA.last_name + " " + TeacherA.first_name).label("key_name"),
+                avg_expr,
+                cnt_expr,
             )
+            .group_by(TeacherA.id, TeacherA.last_name, TeacherA.first_name)
+            .order_by(TeacherA.last_name, TeacherA.first_name)
+        )
 
-        elif group_by == "year":
-            year_expr = func.extract("year", Mark.mark_date).cast(int).label("key_name")
-            stmt = (
-                base.with_only_columns(
-                    year_expr,
-                    avg_expr,
-                    cnt_expr,
-                )
-                .group_by(year_expr)
-                .order_by(year_expr)
+    elif group_by == "year":
+        year_expr = func.extract("year", date_col).cast(Integer).label("key_name")
+        stmt = (
+            base.with_only_columns(
+                year_expr,
+                avg_expr,
+                cnt_expr,
             )
-        else:
-            raise ValueError("group_by must be one of: group, student, subject, teacher, year")
+            .group_by(year_expr)
+            .order_by(year_expr)
+        )
+    else:
+        raise ValueError("group_by must be one of: group, student, subject, teacher, year")
 
-        rows = session.execute(stmt).all()
+    return stmt
 
+
+def _avg_rows(rows, group_by: str) -> list[dict]:
     result = []
     for r in rows:
         if group_by == "year":
@@ -128,3 +175,238 @@ def avg_marks_analysis(
                            "count": int(cnt)})
 
     return result
+
+
+@versioned("avg_marks_analysis", data_version)
+@instrumented
+def avg_marks_analysis(
+    date_from: date,
+    date_to: date,
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    group_by: str = "group",
+    source: str = "rollup",
+) -> list[dict]:
+    stmt = _avg_marks_stmt(
+        date_from, date_to, group_id, student_id, subject_id, teacher_id, group_by, source
+    )
+    with get_read_session() as session:
+        rows = session.execute(stmt).all()
+    return _avg_rows(rows, group_by)
+
+
+def _dimension(dim: str, b: dict) -> tuple:
+    # (столбцы группировки, id, подпись); подпись строится из сгруппированных столбцов
+    StudentA = b["student"]
+    TeacherA = b["teacher"]
+    if dim == "group":
+        return [Group.id, Group.name], Group.id, Group.name
+    if dim == "student":
+        cols = [StudentA.id, StudentA.last_name, StudentA.first_name]
+        return cols, StudentA.id, StudentA.last_name + " " + StudentA.first_name
+    if dim == "subject":
+        return [Subject.id, Subject.name], Subject.id, Subject.name
+    if dim == "teacher":
+        cols = [TeacherA.id, TeacherA.last_name, TeacherA.first_name]
+        return cols, TeacherA.id, TeacherA.last_name + " " + TeacherA.first_name
+    if dim == "year":
+        year_expr = func.extract("year", b["date_col"]).cast(Integer)
+        return [year_expr], year_expr, year_expr
+    raise ValueError(f"dimension must be one of: {', '.join(REPORT_DIMENSIONS)}")
+
+
+def _multi_stmt(
+    date_from: date,
+    date_to: date,
+    dimensions: tuple,
+    kind: str,
+    group_id: int | None,
+    student_id: int | None,
+    subject_id: int | None,
+    teacher_id: int | None,
+    source: str,
+):
+    if not dimensions or len(set(dimensions)) != len(dimensions):
+        raise ValueError("dimensions must be a non-empty list without repeats")
+
+    b = _report_base(date_from, date_to, group_id, student_id, subject_id, teacher_id, source)
+    specs = [_dimension(d, b) for d in dimensions]
+
+    if kind == "sets":
+        # каждый разрез отдельно + общий итог
+        grouping = func.grouping_sets(*[tuple_(*cols) for cols, _, _ in specs], tuple_())
+    elif kind == "cube":
+        # все сочетания разрезов: ячейки, промежуточные итоги и общий итог
+        grouping = func.cube(*[tuple_(*cols) for cols, _, _ in specs])
+    else:
+        raise ValueError("kind must be one of: sets, cube")
+
+    # бит i маски = 1, если разрез i свёрнут в этой строке
+    mask = func.grouping(*[id_expr for _, id_expr, _ in specs]).label("grouping_mask")
+
+    columns = [mask]
+    for dim, (_, id_expr, name_expr) in zip(dimensions, specs):
+        columns.append(id_expr.label(f"{dim}_id"))
+        columns.append(name_expr.label(f"{dim}_name"))
+
+    return (
+        b["base"].with_only_columns(*columns, b["avg"], b["cnt"])
+        .group_by(grouping)
+        .order_by(mask, *[name_expr for _, _, name_expr in specs])
+    )
+
+
+def _multi_rows(rows, dimensions: tuple) -> dict:
+    n = len(dimensions)
+    result: dict[tuple, list[dict]] = {}
+    for r in rows:
+        m = r._mapping
+        level = tuple(
+            d for i, d in enumerate(dimensions)
+            if not m["grouping_mask"] & (1 << (n - 1 - i))
+        )
+        item = {}
+        for d in level:
+            key_id = m[f"{d}_id"]
+            key_name = m[f"{d}_name"]
+            item[f"{d}_id"] = int(key_id) if key_id is not None else None
+            item[f"{d}_name"] = str(key_name) if key_name is not None else "—"
+        item["avg"] = float(m["avg_value"]) if m["avg_value"] is not None else 0.0
+        item["count"] = int(m["cnt"])
+        result.setdefault(level, []).append(item)
+    return result
+
+
+@versioned("avg_marks_multi", data_version)
+@instrumented
+def avg_marks_multi(
+    date_from: date,
+    date_to: date,
+    dimensions: tuple | list,
+    kind: str = "sets",
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    source: str = "rollup",
+) -> dict:
+    # один запрос GROUPING SETS / CUBE вместо отдельного скана на каждый разрез.
+    # Результат: {кортеж разрезов: строки}; () — общий итог,
+    # при kind="cube" есть и все промежуточные сочетания
+    dimensions = tuple(dimensions)
+    stmt = _multi_stmt(
+        date_from, date_to, dimensions, kind,
+        group_id, student_id, subject_id, teacher_id, source,
+    )
+    with get_read_session() as session:
+        rows = session.execute(stmt).all()
+    return _multi_rows(rows, dimensions)
+
+
+def series_bucket(date_from: date, date_to: date, bucket: str = "auto") -> str:
+    # самый мелкий шаг не мельче запрошенного, при котором точек не больше MAX_SERIES_POINTS
+    if bucket != "auto" and bucket not in TIME_BUCKETS:
+        raise ValueError(f"bucket must be one of: auto, {', '.join(TIME_BUCKETS)}")
+
+    span = (date_to - date_from).days + 1
+    start = 0 if bucket == "auto" else TIME_BUCKETS.index(bucket)
+    for b in TIME_BUCKETS[start:]:
+        if span / BUCKET_DAYS[b] <= MAX_SERIES_POINTS:
+            return b
+    return TIME_BUCKETS[-1]
+
+
+def _bucket_expr(bucket: str, date_col):
+    if bucket == "term":
+        year = func.extract("year", date_col).cast(Integer)
+        month = func.extract("month", date_col).cast(Integer)
+        return case(
+            (month >= 9, func.make_date(year, 9, 1)),
+            (month == 1, func.make_date(year - 1, 9, 1)),
+            else_=func.make_date(year, 2, 1),
+        )
+    return func.date_trunc(bucket, date_col).cast(Date)
+
+
+def _series_stmt(
+    date_from: date,
+    date_to: date,
+    bucket: str,
+    window: int,
+    group_id: int | None,
+    student_id: int | None,
+    subject_id: int | None,
+    teacher_id: int | None,
+    source: str,
+):
+    b = _report_base(date_from, date_to, group_id, student_id, subject_id, teacher_id, source)
+    # диапазон дат остаётся условием на сам столбец, бакет считается только в SELECT
+    bucket_expr = _bucket_expr(bucket, b["date_col"])
+    # GROUP BY по имени столбца: выражение с параметрами в SELECT и GROUP BY
+    # получило бы разные $n, и PostgreSQL не признал бы их одним выражением
+    per_bucket = (
+        b["base"].with_only_columns(bucket_expr.label("bucket"), b["sum"], b["cnt"])
+        .group_by(literal_column("bucket"))
+        .subquery("per_bucket")
+    )
+
+    moving = {"order_by": per_bucket.c.bucket, "rows": (-(window - 1), 0)}
+    running = {"order_by": per_bucket.c.bucket, "rows": (None, 0)}
+    return (
+        select(
+            per_bucket.c.bucket,
+            (per_bucket.c.sum_value / per_bucket.c.cnt).label("avg_value"),
+            per_bucket.c.cnt,
+            (
+                func.sum(per_bucket.c.sum_value).over(**moving)
+                / func.sum(per_bucket.c.cnt).over(**moving)
+            ).label("moving_avg"),
+            func.sum(per_bucket.c.cnt).over(**running).label("cum_count"),
+            (
+                func.sum(per_bucket.c.sum_value).over(**running)
+                / func.sum(per_bucket.c.cnt).over(**running)
+            ).label("cum_avg"),
+        )
+        .order_by(per_bucket.c.bucket)
+    )
+
+
+@versioned("avg_marks_series", data_version)
+@instrumented
+def avg_marks_series(
+    date_from: date,
+    date_to: date,
+    bucket: str = "auto",
+    window: int = 3,
+    group_id: int | None = None,
+    student_id: int | None = None,
+    subject_id: int | None = None,
+    teacher_id: int | None = None,
+    source: str = "rollup",
+) -> dict:
+    # window — ширина скользящего среднего в бакетах (взвешено по числу оценок)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+
+    chosen = series_bucket(date_from, date_to, bucket)
+    stmt = _series_stmt(
+        date_from, date_to, chosen, window,
+        group_id, student_id, subject_id, teacher_id, source,
+    )
+    with get_read_session() as session:
+        rows = session.execute(stmt).all()
+
+    points = [
+        {
+            "bucket": r.bucket,
+            "avg": float(r.avg_value),
+            "count": int(r.cnt),
+            "moving_avg": float(r.moving_avg),
+            "cum_count": int(r.cum_count),
+            "cum_avg": float(r.cum_avg),
+        }
+        for r in rows
+    ]
+    return {"bucket": chosen, "points": points}
@@ -0,0 +1,124 @@
+import math
+
+from sqlalchemy import select, insert, delete, func, text, or_, and_
+
+from db import NO_STATEMENT_TIMEOUT, get_session
+from metrics import instrumented
+from models import Mark, MarkDailyRollup
+from repos.reports import _avg_marks_stmt, _avg_rows
+
+GROUP_BY_MODES = ["group", "student", "subject", "teacher", "year"]
+
+
+def _marks_aggregate():
+    return (
+        select(
+            Mark.mark_date.label("day"),
+            Mark.student_id.label("student_id"),
+            Mark.subject_id.label("subject_id"),
+            Mark.teacher_id.label("teacher_id"),
+            func.sum(Mark.value).label("sum_value"),
+            func.count(Mark.id).label("cnt"),
+        )
+        .group_by(Mark.mark_date, Mark.student_id, Mark.subject_id, Mark.teacher_id)
+    )
+
+
+@instrumented
+def rebuild_rollup() -> int:
+    with get_session() as session:
+        session.execute(text(NO_STATEMENT_TIMEOUT))
+        # SHARE блокирует запись в marks на время пересборки, чтение не мешает
+        session.execute(text("LOCK TABLE marks IN SHARE MODE"))
+        session.execute(delete(MarkDailyRollup))
+        session.execute(
+            insert(MarkDailyRollup).from_select(
+                ["day", "student_id", "subject_id", "teacher_id", "sum_value", "cnt"],
+                _marks_aggregate(),
+            )
+        )
+        rows = session.scalar(select(func.count()).select_from(MarkDailyRollup))
+        session.commit()
+
+    return rows
+
+
+def _report_key(row: dict) -> tuple:
+    # строки avg_marks_analysis: {"key"} для годов, {"id", "name"} для остальных разрезов
+    return row.get("key", row.get("id")), row.get("name")
+
+
+def same_report(a: list[dict], b: list[dict]) -> bool:
+    # avg — sum/cnt, посчитанные разными путями: сравнение с допуском, число оценок — точно
+    left = {_report_key(r): r for r in a}
+    right = {_report_key(r): r for r in b}
+    if len(left) != len(a) or left.keys() != right.keys():
+        return False
+    return all(
+        left[k]["count"] == right[k]["count"]
+        and math.isclose(left[k]["avg"], right[k]["avg"], rel_tol=1e-9, abs_tol=1e-9)
+        for k in left
+    )
+
+
+@instrumented
+def check_rollup(limit: int = 100) -> dict:
+    agg = _marks_aggregate().subquery("agg")
+    R = MarkDailyRollup
+
+    keys_match = and_(
+        agg.c.day == R.day,
+        agg.c.student_id == R.student_id,
+        agg.c.subject_id == R.subject_id,
+        agg.c.teacher_id == R.teacher_id,
+    )
+    stmt = (
+        select(
+            func.coalesce(agg.c.day, R.day).label("day"),
+            func.coalesce(agg.c.student_id, R.student_id).label("student_id"),
+            func.coalesce(agg.c.subject_id, R.subject_id).label("subject_id"),
+            func.coalesce(agg.c.teacher_id, R.teacher_id).label("teacher_id"),
+            agg.c.sum_value.label("marks_sum"),
+            R.sum_value.label("rollup_sum"),
+            agg.c.cnt.label("marks_cnt"),
+            R.cnt.label("rollup_cnt"),
+        )
+        .select_from(agg)
+        .join(R, keys_match, full=True)
+        .where(
+            or_(
+                agg.c.sum_value.is_distinct_from(R.sum_value),
+                agg.c.cnt.is_distinct_from(R.cnt),
+            )
+        )
+        .limit(limit)
+    )
+
+    # все сверки — на primary в одном снимке REPEATABLE READ: запись, пришедшая между запросами,
+    # или реплики с разным отставанием дали бы ложные расхождения
+    report_diffs = []
+    with get_session() as session:
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        session.execute(text(NO_STATEMENT_TIMEOUT))
+        mismatches = [dict(r) for r in session.execute(stmt).mappings().all()]
+        bounds = session.execute(
+            select(func.min(Mark.mark_date), func.max(Mark.mark_date))
+        ).one()
+
+        # отчёт по rollup и по сырым оценкам должен совпадать во всех разрезах
+        if bounds[0] is not None:
+            for mode in GROUP_BY_MODES:
+                reports = [
+                    _avg_rows(session.execute(
+                        _avg_marks_stmt(bounds[0], bounds[1], group_by=mode, source=source)
+                    ).all(), mode)
+                    for source in ("rollup", "marks")
+                ]
+                if not same_report(*reports):
+                    report_diffs.append(mode)
+
+    return {
+        "ok": not mismatches and not report_diffs,
+        "mismatches": mismatches,
+        "report_diffs": report_diffs,
+    }
@@ -1,40 +1,62 @@
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
 
-from db import get_session
+from cache import cached, invalidate
+from db import get_read_session, get_session
+from metrics import instrumented
 from models import Subject
 
 
+@cached("subjects")
+@instrumented
 def get_all_subjects() -> list[dict]:
-    with get_session() as session:
+    with get_read_session() as session:
         stmt = select(Subject).order_by(Subject.name)
         subjects = session.scalars(stmt).all()
 
     return [{"id": s.id, "name": s.name} for s in subjects]
 
 
-def create_subject(name: str):
+@instrumented
+def create_subject(name: str) -> int:
     with get_session() as session:
-        subj = Subject(name=name)
-        session.add(subj)
+        subject_id = session.execute(
+            insert(Subject).values(name=name).returning(Subject.id)
+        ).scalar_one()
         session.commit()
 
+    invalidate("subjects")
+    return subject_id
+
 
+@instrumented
 def update_subject(subject_id: int, new_name: str):
     with get_session() as session:
-        subj = session.get(Subject, subject_id)
-        if subj is None:
+        found = session.execute(
+            update(Subject)
+            .where(Subject.id == subject_id)
+            .values(name=new_name)
+            .returning(Subject.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Предмет id={subject_id} не найден")
-
-        subj.name = new_name
         session.commit()
 
+    invalidate("subjects")
 
+
+@instrumented
 def delete_subject(subject_id: int):
     with get_session() as session:
-        subj = session.get(Subject, subject_id)
-        if subj is None:
+        found = session.execute(
+            delete(Subject)
+            .where(Subject.id == subject_id)
+            .returning(Subject.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if found is None:
             raise ValueError(f"Предмет id={subject_id} не найден")
-
-        session.delete(subj)
         session.commit()
+
+    invalidate("subjects")
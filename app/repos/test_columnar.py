@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import Column, Date, Integer, MetaData, Table, Text, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from repos.columnar import fetch_frame, fetch_keyset_frame
+from repos.paging import fetch_keyset_page
+
+metadata = MetaData()
+marks = Table(
+    "marks",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("value", Integer),
+    Column("student_name", Text),
+    Column("mark_date", Date),
+)
+
+
+@pytest.fixture()
+def session():
+    # SQLite вместо PostgreSQL: сравнивается сборка результата, а не SQL
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(marks), [
+            {"id": i, "value": 2 + i % 4, "student_name": f"Студент {i % 7}" if i % 5 else None,
+             "mark_date": date(2024, 9, 1) + timedelta(days=i % 11)}
+            for i in range(1, 26)
+        ])
+    with Session(engine) as s:
+        yield s
+
+
+STMT = select(marks.c.id, marks.c.value, marks.c.student_name, marks.c.mark_date)
+
+
+def test_fetch_frame_matches_dict_rows(session):
+    expected = pd.DataFrame([dict(r) for r in session.execute(STMT.order_by(marks.c.id)).mappings()])
+
+    frame = fetch_frame(session, STMT.order_by(marks.c.id))
+
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+@pytest.mark.parametrize("sort_keys, descending", [
+    ([marks.c.id], False),
+    ([marks.c.mark_date, marks.c.id], True),
+    ([marks.c.value, marks.c.id], False),
+])
+def test_keyset_frame_pages_match_dict_pages(session, sort_keys, descending):
+    cursor, pages = None, 0
+    while True:
+        page = fetch_keyset_page(session, STMT, sort_keys, cursor, 10, descending)
+        framed = fetch_keyset_frame(session, STMT, sort_keys, cursor, 10, descending)
+
+        pd.testing.assert_frame_equal(framed["rows"], pd.DataFrame(page["rows"]))
+        assert framed["next_cursor"] == page["next_cursor"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+
+
+def test_keyset_frame_empty_page_keeps_columns(session):
+    page = fetch_keyset_frame(session, STMT.where(marks.c.id < 0), [marks.c.id], None, 10)
+
+    assert list(page["rows"].columns) == ["id", "value", "student_name", "mark_date"]
+    assert page["rows"].empty
+    assert page["next_cursor"] is None
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import column, select, table
+from sqlalchemy.dialects import postgresql
+
+from repos.paging import build_keyset_stmt, keyset_result
+
+t = table("marks", column("id"), column("mark_date"), column("value"))
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_first_page_has_no_cursor_predicate():
+    stmt, labels = build_keyset_stmt(select(t.c.value), [t.c.mark_date, t.c.id], None, 50)
+    sql = _sql(stmt)
+    assert labels == ["_sort_0", "_sort_1"]
+    assert "WHERE" not in sql
+    assert "ORDER BY marks.mark_date ASC, marks.id ASC" in sql
+    # лишняя строка — признак следующей страницы
+    assert "LIMIT 51" in sql
+
+
+def test_cursor_compares_tuples_and_bounds_first_key():
+    stmt, _ = build_keyset_stmt(select(t.c.value), [t.c.mark_date, t.c.id], ("2024-09-01", 10), 20)
+    sql = _sql(stmt)
+    assert "(marks.mark_date, marks.id) > ('2024-09-01', 10)" in sql
+    assert "marks.mark_date >= '2024-09-01'" in sql
+
+
+def test_descending_flips_comparisons_and_order():
+    stmt, _ = build_keyset_stmt(select(t.c.value), [t.c.value, t.c.id], (4, 7), 20, descending=True)
+    sql = _sql(stmt)
+    assert "(marks.value, marks.id) < (4, 7)" in sql
+    assert "marks.value <= 4" in sql
+    assert "ORDER BY marks.value DESC, marks.id DESC" in sql
+
+
+def test_keyset_result_cuts_extra_row_and_builds_cursor():
+    labels = ["_sort_0", "_sort_1"]
+    rows = [{"value": v, "_sort_0": v, "_sort_1": i} for i, v in enumerate([5, 4, 3], start=1)]
+
+    page = keyset_result(rows, labels, limit=2)
+    assert page["rows"] == [{"value": 5}, {"value": 4}]
+    assert page["next_cursor"] == (4, 2)
+
+
+def test_keyset_result_last_page_has_no_cursor():
+    rows = [{"value": 5, "_sort_0": 1}]
+    page = keyset_result(rows, ["_sort_0"], limit=2)
+    assert page == {"rows": [{"value": 5}], "next_cursor": None}
+
+
+def test_cursor_of_other_sort_is_rejected():
+    with pytest.raises(ValueError, match="2 values"):
+        build_keyset_stmt(select(t.c.value), [t.c.mark_date, t.c.id], ("2024-09-01", "Иванов", 10), 20)
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from repos.reports import MAX_SERIES_POINTS, _multi_rows, series_bucket
+
+DIMS = ("group", "subject")
+
+
+def _row(mask, avg, cnt, **keys):
+    # как Row из SQLAlchemy: значения читаются через _mapping
+    mapping = {"group_id": None, "group_name": None, "subject_id": None, "subject_name": None}
+    mapping.update(keys, grouping_mask=mask, avg_value=avg, cnt=cnt)
+    return SimpleNamespace(_mapping=mapping)
+
+
+def test_multi_rows_decodes_grouping_mask():
+    rows = [
+        _row(0b00, 4.5, 2, group_id=1, group_name="IT_2024", subject_id=10, subject_name="Физика"),
+        _row(0b01, 4.0, 5, group_id=1, group_name="IT_2024"),
+        _row(0b10, 3.5, 4, subject_id=10, subject_name="Физика"),
+        _row(0b11, 4.0, 9),
+    ]
+
+    result = _multi_rows(rows, DIMS)
+
+    assert set(result) == {("group", "subject"), ("group",), ("subject",), ()}
+    assert result[("subject",)] == [{"subject_id": 10, "subject_name": "Физика", "avg": 3.5, "count": 4}]
+    assert result[()] == [{"avg": 4.0, "count": 9}]
+
+
+def test_multi_rows_keeps_null_keys():
+    # NULL в самом ключе (студент без группы) не путается с итогом: уровень задаёт маска
+    result = _multi_rows([_row(0b01, None, 3)], DIMS)
+
+    assert result == {("group",): [{"group_id": None, "group_name": "—", "avg": 0.0, "count": 3}]}
+
+
+@pytest.mark.parametrize(
+    "days, bucket, expected",
+    [
+        (30, "auto", "day"),
+        (MAX_SERIES_POINTS, "auto", "day"),
+        (MAX_SERIES_POINTS + 1, "auto", "week"),
+        (365 * 5, "auto", "week"),
+        (365 * 20, "auto", "month"),
+        (365 * 40, "auto", "term"),
+        (30, "month", "month"),
+        (30, "term", "term"),
+        # запрошенный шаг укрупняется, если точек слишком много
+        (365 * 2, "day", "week"),
+    ],
+)
+def test_series_bucket(days, bucket, expected):
+    start = date(2020, 9, 1)
+    assert series_bucket(start, start + timedelta(days=days - 1), bucket) == expected
+
+
+def test_series_bucket_rejects_unknown():
+    with pytest.raises(ValueError, match="bucket must be one of"):
+        series_bucket(date(2024, 1, 1), date(2024, 2, 1), "year")
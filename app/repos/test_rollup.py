@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from repos import reports, rollup
+from repos.rollup import same_report
+
+
+def test_same_report_tolerates_rounding():
+    raw = [{"id": 1, "name": "IT_2024", "avg": 0.1 + 0.2, "count": 3}]
+    rollup = [{"id": 1, "name": "IT_2024", "avg": 0.3, "count": 3}]
+
+    assert same_report(raw, rollup)
+
+
+def test_same_report_detects_differences():
+    base = [{"key": 2024, "name": "2024", "avg": 4.0, "count": 3}]
+
+    assert not same_report(base, [{"key": 2024, "name": "2024", "avg": 4.01, "count": 3}])
+    assert not same_report(base, [{"key": 2024, "name": "2024", "avg": 4.0, "count": 4}])
+    assert not same_report(base, [{"key": 2023, "name": "2023", "avg": 4.0, "count": 3}])
+    assert not same_report(base + base, base)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def one(self):
+        return self.rows[0]
+
+
+class FakeSession:
+    def __init__(self):
+        self.options = None
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def connection(self, execution_options=None):
+        self.options = execution_options
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        if "min(" in str(stmt) and "GROUP BY" not in str(stmt):
+            return FakeResult([(date(2024, 9, 1), date(2025, 5, 31))])
+        return FakeResult([])
+
+
+def test_check_rollup_runs_in_one_primary_snapshot(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(rollup, "get_session", lambda: session)
+    monkeypatch.setattr(reports, "get_read_session", lambda: pytest.fail("сверка ушла мимо снимка"))
+
+    result = rollup.check_rollup()
+
+    assert result == {"ok": True, "mismatches": [], "report_diffs": []}
+    assert session.options == {"isolation_level": "REPEATABLE READ"}
+    # расхождения, границы и оба расчёта каждого разреза
+    assert len(session.statements) == 3 + 2 * len(rollup.GROUP_BY_MODES)
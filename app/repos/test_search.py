@@ -0,0 +1,73 @@
+from sqlalchemy.dialects import postgresql
+
+from repos import people
+from repos.groups import _groups_page_stmt
+from repos.people import _people_page_stmt
+
+
+def _compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_people_page_name_filter_escapes_wildcards():
+    compiled = _compiled(_people_page_stmt("name", None, None, " 50%_off "))
+
+    assert "people.last_name ILIKE" in str(compiled)
+    assert "ESCAPE '/'" in str(compiled)
+    assert "50/%/_off" in compiled.params.values()
+
+
+def test_groups_page_name_filter_escapes_wildcards():
+    compiled = _compiled(_groups_page_stmt("IT_"))
+
+    assert "groups.name ILIKE '%%' ||" in str(compiled)
+    assert "IT/_" in compiled.params.values()
+
+
+class CapturingSession:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return self
+
+    def all(self):
+        return []
+
+
+def _search(monkeypatch, query, **kwargs):
+    session = CapturingSession()
+    monkeypatch.setattr(people, "get_read_session", lambda: session)
+    people.search_people(query, **kwargs)
+    return _compiled(session.statements[0])
+
+
+def test_short_query_is_prefix_match(monkeypatch):
+    compiled = _search(monkeypatch, "  Ив ")
+
+    assert "person_name_match" not in str(compiled)
+    assert "ив" in compiled.params.values()
+
+
+def test_long_query_adds_fuzzy_match_and_similarity_order(monkeypatch):
+    compiled = _search(monkeypatch, "Иваноф  П", person_type="P", subject_id=3)
+
+    sql = str(compiled)
+    assert "person_name_match" in sql
+    assert "ORDER BY word_similarity" in sql
+    assert "EXISTS" in sql
+    assert "иваноф п" in compiled.params.values()
+
+
+def test_empty_query_lists_without_name_filter(monkeypatch):
+    sql = str(_search(monkeypatch, ""))
+
+    assert "LIKE" not in sql
+    assert "person_name_match" not in sql
@@ -3,6 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from db import get_session
+from metrics import instrumented
 from models import AppUser
 
 
@@ -10,6 +11,7 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
 
+@instrumented
 def check_credentials(username: str, password: str):
     with get_session() as session:
         stmt = select(AppUser).where(AppUser.username == username)
@@ -0,0 +1,29 @@
+from sqlalchemy import literal_column, select
+
+import db
+from db import WAL_LSN_EXPR, get_session, require_lsn
+from metrics import instrumented
+from models import DataVersion
+
+# таблицы, от которых зависят отчёты
+REPORT_TABLES = ("marks", "people", "groups", "subjects")
+
+
+@instrumented
+def data_version(tables: tuple[str, ...] = REPORT_TABLES) -> tuple:
+    # одно чтение по PK маленькой таблицы data_versions (миграция 0006), всегда с primary.
+    # С репликами заодно читается позиция WAL: отчёт, закэшированный под этой версией,
+    # считается только на реплике, которая её уже воспроизвела (db.get_read_session)
+    stmt = (
+        select(DataVersion.table_name, DataVersion.version)
+        .where(DataVersion.table_name.in_(tables))
+        .order_by(DataVersion.table_name)
+    )
+    if db.read_engines:
+        stmt = stmt.add_columns(literal_column(WAL_LSN_EXPR))
+
+    with get_session() as session:
+        rows = session.execute(stmt).all()
+    if db.read_engines and rows:
+        require_lsn(rows[0][2])
+    return tuple((r[0], r[1]) for r in rows)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from contextlib import nullcontext
+from datetime import date
+
+import pg8000.exceptions
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
+
+import api
+import repos.groups
+from api import _db_error, current_user, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_keeps_dates():
+    cursor = (date(2024, 9, 1), "Иванов", 42)
+
+    token = encode_cursor(cursor)
+
+    assert decode_cursor(token) == cursor
+
+
+def test_empty_cursor():
+    assert encode_cursor(None) is None
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("token", ["не base64", "bm90IGpzb24=", "W3siZGF0ZSI6ICJ4In1d"])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError, match="Некорректный cursor"):
+        decode_cursor(token)
+
+
+def test_cursor_length_must_match_sort(monkeypatch):
+    # курсор /people?sort_by=name (три ключа) не подходит к /groups (два ключа)
+    monkeypatch.setattr(repos.groups, "get_read_session", lambda: nullcontext(None))
+    api.app.dependency_overrides[current_user] = lambda: {"role": "user"}
+    try:
+        response = TestClient(api.app).get(
+            "/groups", params={"cursor": encode_cursor(("Иванов", "Иван", 7))}
+        )
+    finally:
+        api.app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    assert "2 values" in response.json()["detail"]
+
+
+def _status(exc: DBAPIError) -> tuple[int, str]:
+    response = asyncio.run(_db_error(None, exc))
+    return response.status_code, json.loads(response.body)["detail"]
+
+
+def _pg8000(code: str, message: str = "сообщение") -> pg8000.exceptions.DatabaseError:
+    return pg8000.exceptions.DatabaseError({"S": "ERROR", "C": code, "M": message})
+
+
+@pytest.mark.parametrize("orig, status", [
+    (_pg8000("23505"), 409),
+    (_pg8000("P0001"), 409),
+    (_pg8000("22007"), 400),
+    (_pg8000("57014"), 503),
+    (_pg8000("40P01"), 503),
+    (_pg8000("42P01"), 500),
+    (psycopg.errors.UniqueViolation("дубликат"), 409),
+    (psycopg.errors.RaiseException("триггер"), 409),
+    (psycopg.errors.QueryCanceled("statement timeout"), 503),
+    (psycopg.errors.UndefinedColumn("нет столбца"), 500),
+])
+def test_db_error_status_by_sqlstate(orig, status):
+    assert _status(DBAPIError("SELECT 1", {}, orig))[0] == status
+
+
+def test_db_error_detail():
+    # конфликт — текст ошибки сервера; остальное — без подробностей запроса
+    assert _status(IntegrityError("INSERT", {}, _pg8000("23505", "дубликат"))) == (409, "дубликат")
+    assert _status(DBAPIError("SELECT", {}, _pg8000("42703", "column x")))[1] == "Внутренняя ошибка базы данных"
+
+
+def test_db_error_disconnect_is_unavailable():
+    assert _status(OperationalError("SELECT 1", {}, psycopg.OperationalError("server closed")))[0] == 503
+    assert _status(DBAPIError("SELECT 1", {}, Exception("reset"), connection_invalidated=True))[0] == 503
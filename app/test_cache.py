@@ -0,0 +1,131 @@
+import pytest
+
+import cache
+from cache import cached, configure, invalidate
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_cached_returns_stored_value_until_invalidated():
+    calls = []
+
+    @cached("t_groups")
+    def load(group_id):
+        calls.append(group_id)
+        return {"id": group_id, "version": len(calls)}
+
+    assert load(1) == {"id": 1, "version": 1}
+    assert load(1) == {"id": 1, "version": 1}
+    assert load(2)["version"] == 2
+
+    invalidate("t_groups")
+
+    assert load(1)["version"] == 3
+    assert calls == [1, 2, 1]
+
+
+def test_invalidate_touches_only_its_namespace():
+    counts = {"a": 0, "b": 0}
+
+    @cached("t_a")
+    def load_a():
+        counts["a"] += 1
+        return counts["a"]
+
+    @cached("t_b")
+    def load_b():
+        counts["b"] += 1
+        return counts["b"]
+
+    load_a(), load_b()
+    invalidate("t_a")
+    load_a(), load_b()
+
+    assert counts == {"a": 2, "b": 1}
+
+
+def test_read_started_before_invalidate_is_not_stored():
+    # запись пришла, пока читалось старое: старое значение не должно попасть в кэш
+    values = iter(["stale", "fresh"])
+
+    @cached("t_race")
+    def load():
+        value = next(values)
+        if value == "stale":
+            invalidate("t_race")
+        return value
+
+    assert load() == "stale"
+    assert load() == "fresh"
+    assert load() == "fresh"
+
+
+def test_configure_with_same_settings_keeps_entries():
+    calls = []
+
+    @cached("t_conf")
+    def load():
+        calls.append(1)
+        return len(calls)
+
+    stats = cache.cache_stats()
+    load()
+    configure(ttl=stats["ttl"], maxsize=stats["maxsize"])
+    load()
+    assert calls == [1]
+
+    configure(ttl=stats["ttl"] + 1, maxsize=stats["maxsize"])
+    load()
+    assert calls == [1, 1]
+    configure(ttl=stats["ttl"], maxsize=stats["maxsize"])
+
+
+def test_load_cache_config_defaults(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("[cache]\nttl = 60\n")
+
+    assert cache.load_cache_config(str(path)) == {
+        "ttl": 60,
+        "maxsize": cache.DEFAULT_MAXSIZE,
+        "report_max_mb": cache.DEFAULT_REPORT_MAX_MB,
+    }
+    assert cache.load_cache_config(str(tmp_path / "missing.ini"))["ttl"] == cache.DEFAULT_TTL
+
+
+def test_versioned_key_follows_data_version():
+    version = {"v": 1}
+    calls = []
+
+    @cache.versioned("t_report", lambda: version["v"])
+    def report(date_from, group_by="group", ids=()):
+        calls.append((date_from, group_by))
+        return [len(calls)]
+
+    assert report(1) == [1]
+    # позиционные, именованные и значения по умолчанию — один ключ
+    assert report(1, "group") == [1]
+    assert report(date_from=1, group_by="group", ids=[]) == [1]
+    assert report(1, group_by="student") == [2]
+
+    version["v"] = 2
+    assert report(1) == [3]
+    assert cache.report_cache_stats()["hits"] >= 2
+
+
+def test_versioned_skips_results_larger_than_limit(monkeypatch):
+    monkeypatch.setattr(cache, "_reports", cache.LRUCache(maxsize=64, getsizeof=cache._value_size))
+
+    @cache.versioned("t_big", lambda: 1)
+    def big():
+        return "x" * 1000
+
+    before = cache.report_cache_stats()["too_large"]
+    big(), big()
+
+    assert cache.report_cache_stats()["too_large"] == before + 2
+    assert cache.report_cache_stats()["entries"] == 0
@@ -0,0 +1,47 @@
+import pandas as pd
+
+import charts
+from charts import OTHERS, slice_chart_spec, top_n
+
+
+def _report(rows):
+    return pd.DataFrame(rows, columns=["id", "name", "avg", "count"])
+
+
+def test_top_n_folds_tail_into_weighted_row():
+    df = _report([(i, f"G{i}", float(i % 5), i) for i in range(1, 11)])
+
+    data = top_n(df, n=3)
+
+    assert data["id"].tolist()[:3] == [10, 9, 8]
+    assert data.iloc[-1]["label"] == f"{OTHERS} (7)"
+    tail = df[df["id"] <= 7]
+    expected = (tail["avg"] * tail["count"]).sum() / tail["count"].sum()
+    assert data.iloc[-1]["avg"] == expected
+    assert data.iloc[-1]["count"] == tail["count"].sum()
+
+
+def test_slice_chart_keeps_namesakes_apart():
+    df = _report([(1, "Иванов Иван", 4.0, 3), (2, "Иванов Иван", 3.0, 5), (3, "Петров Пётр", 5.0, 1)])
+
+    spec = charts._slice_chart(df, "student", "t").to_dict()
+
+    assert spec["encoding"]["y"]["field"] == "label"
+    values = next(iter(spec["datasets"].values()))
+    assert [v["label"] for v in values] == ["Иванов Иван (id 1)", "Иванов Иван (id 2)", "Петров Пётр"]
+    assert spec["encoding"]["y"]["sort"] == ["Петров Пётр", "Иванов Иван (id 1)", "Иванов Иван (id 2)"]
+
+
+def test_slice_chart_spec_is_cached_by_data():
+    df = _report([(1, "A", 4.0, 3)])
+    before = charts.chart_cache_stats()
+
+    first = slice_chart_spec(df, "group", "t")
+    again = slice_chart_spec(df.copy(), "group", "t")
+    other = slice_chart_spec(df.assign(avg=[3.0]), "group", "t")
+
+    after = charts.chart_cache_stats()
+    assert first is again
+    assert other is not first
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 2
@@ -0,0 +1,237 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import PoolResetState, QueuePool
+
+import db
+
+
+class FakeReplica:
+    # движок реплики: connect() отдаёт её позицию воспроизведения WAL или падает
+    def __init__(self, lsn: int = 0, down: bool = False):
+        self.lsn = lsn
+        self.down = down
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        if self.down:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        return self
+
+    def scalar(self):
+        return self.lsn
+
+
+PRIMARY = object()
+
+
+@pytest.fixture()
+def routing(monkeypatch):
+    def setup(*replicas, floor: int = 0):
+        monkeypatch.setattr(db, "engine", PRIMARY)
+        monkeypatch.setattr(db, "read_engines", list(replicas))
+        state = db._ReadRouting(len(replicas))
+        state.floor_lsn = floor
+        monkeypatch.setattr(db, "_routing", state)
+        return state
+
+    return setup
+
+
+def test_caught_up_replicas_round_robin(routing):
+    first, second = FakeReplica(100), FakeReplica(100)
+    routing(first, second, floor=50)
+
+    assert [db.get_read_engine() for _ in range(4)] == [first, second, first, second]
+    # воспроизведённая позиция запоминается: пока floor не вырос, реплики не опрашиваются
+    assert (first.connects, second.connects) == (1, 1)
+
+
+def test_replica_behind_floor_falls_back_to_primary(routing):
+    replica = FakeReplica(100)
+    state = routing(replica, floor=200)
+
+    assert db.get_read_engine() is PRIMARY
+
+    replica.lsn = 250
+    assert db.get_read_engine() is replica
+    assert state.replayed == [250]
+
+
+def test_down_replica_is_skipped(routing):
+    down, up = FakeReplica(down=True), FakeReplica(100)
+    routing(down, up, floor=50)
+
+    assert db.get_read_engine() is up
+    assert db.get_read_engine() is up
+    assert down.connects == 1
+
+
+def test_note_write_only_with_replicas(routing):
+    conn = type("Conn", (), {"info": {}})()
+
+    routing()
+    db.note_write(conn)
+    assert conn.info == {}
+
+    routing(FakeReplica())
+    db.note_write(conn)
+    assert conn.info == {db.WROTE_KEY: True}
+
+
+class FakeDbapiConnection:
+    def __init__(self, lsn: int):
+        self.lsn = lsn
+        self.calls = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.calls.append(sql)
+
+    def fetchone(self):
+        return (self.lsn,)
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        self.calls.append("rollback")
+
+
+def _reset_state(transaction_was_reset=True):
+    return PoolResetState(transaction_was_reset=transaction_was_reset, terminate_only=False, asyncio_safe=True)
+
+
+def test_commit_lsn_read_on_returned_connection(routing):
+    state = routing(FakeReplica(), floor=10)
+    dbapi_conn = FakeDbapiConnection(300)
+    record = type("Record", (), {"info": {db.WROTE_KEY: True}})()
+
+    db._read_commit_lsn(dbapi_conn, record, _reset_state())
+
+    assert dbapi_conn.calls == ["SELECT " + db.WAL_LSN_EXPR, "rollback"]
+    assert state.floor_lsn == 300
+    assert record.info == {}
+
+    # без отметки о записи соединение не трогается
+    db._read_commit_lsn(dbapi_conn, record, _reset_state())
+    assert len(dbapi_conn.calls) == 2
+
+
+def test_commit_lsn_after_open_transaction_is_rolled_back(routing):
+    routing(FakeReplica())
+    dbapi_conn = FakeDbapiConnection(5)
+    record = type("Record", (), {"info": {db.WROTE_KEY: True}})()
+
+    db._read_commit_lsn(dbapi_conn, record, _reset_state(transaction_was_reset=False))
+
+    assert dbapi_conn.calls == ["rollback", "SELECT " + db.WAL_LSN_EXPR, "rollback"]
+
+
+@pytest.fixture()
+def sqlite_primary(routing, monkeypatch, tmp_path):
+    # настоящий пул и события SQLAlchemy; «позиция WAL» — число строк, видимое этому соединению
+    state = routing(FakeReplica())
+    monkeypatch.setattr(db, "WAL_LSN_EXPR", "(SELECT count(*) FROM t)")
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", poolclass=QueuePool)
+    event.listen(engine, "commit", db._on_commit)
+    event.listen(engine.pool, "reset", db._read_commit_lsn)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x integer)"))
+    state.floor_lsn = 0
+    yield engine, state
+    engine.dispose()
+
+
+def test_every_write_path_moves_floor(sqlite_primary):
+    engine, state = sqlite_primary
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    assert state.floor_lsn == 1
+
+    with Session(engine) as session:
+        session.execute(text("INSERT INTO t VALUES (2)"))
+        session.commit()
+    assert state.floor_lsn == 2
+
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().execute("INSERT INTO t VALUES (3)")
+        db.note_write(raw)
+        raw.commit()
+    finally:
+        raw.close()
+    assert state.floor_lsn == 3
+
+
+def test_read_without_commit_does_not_read_lsn(sqlite_primary):
+    engine, state = sqlite_primary
+
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+    assert state.floor_lsn == 0
+
+
+@pytest.fixture()
+def replicas(database):
+    # primary и реплика из docker-compose: в тестовом config.ini нужна секция [replicas]
+    if not db.read_engines:
+        pytest.skip("в тестовом config.ini нет [replicas]")
+
+
+def test_read_your_writes_through_replicas(replicas):
+    from repos.groups import create_group, delete_group
+
+    prefix = f"РЕПЛ_{uuid.uuid4().hex[:8]}"
+    ids = []
+    try:
+        for i in range(5):
+            ids.append(create_group(f"{prefix}_{i}"))
+            with db.get_read_session() as session:
+                name = session.execute(
+                    text("SELECT name FROM groups WHERE id = :id"), {"id": ids[-1]}
+                ).scalar()
+            assert name == f"{prefix}_{i}"
+    finally:
+        for group_id in ids:
+            delete_group(group_id)
+
+
+def test_caught_up_replica_serves_reads(replicas):
+    from repos.groups import create_group, delete_group
+
+    group_id = create_group(f"РЕПЛ_{uuid.uuid4().hex[:8]}")
+    try:
+        deadline = time.monotonic() + 10
+        while db._replayed_lsn(0) < db._routing.floor_lsn:
+            assert time.monotonic() < deadline, "реплика не догнала primary за 10 с"
+            time.sleep(0.1)
+
+        read_engine = db.get_read_engine()
+        assert read_engine in db.read_engines
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT pg_is_in_recovery()")).scalar() is True
+            assert conn.execute(
+                text("SELECT count(*) FROM groups WHERE id = :id"), {"id": group_id}
+            ).scalar() == 1
+    finally:
+        delete_group(group_id)
@@ -0,0 +1,29 @@
+import io
+
+from openpyxl import load_workbook
+
+import export
+from export import EXPORT_COLUMNS, _write_xlsx, xlsx_sheet_count
+
+
+def test_xlsx_continues_on_next_sheet(monkeypatch):
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 4)
+    rows = [tuple(range(i, i + len(EXPORT_COLUMNS))) for i in range(7)]
+    out = io.BytesIO()
+
+    total = _write_xlsx([rows[:5], rows[5:]], out)
+
+    wb = load_workbook(io.BytesIO(out.getvalue()))
+    assert total == 7
+    assert wb.sheetnames == ["marks", "marks_2", "marks_3"]
+    # каждый лист с заголовком, не длиннее XLSX_MAX_ROWS
+    assert [ws.max_row for ws in wb.worksheets] == [4, 4, 2]
+    assert all(next(ws.values) == tuple(EXPORT_COLUMNS) for ws in wb.worksheets)
+    assert len(wb.worksheets) == xlsx_sheet_count(total)
+
+
+def test_xlsx_sheet_count():
+    per_sheet = export.XLSX_MAX_ROWS - 1
+    assert xlsx_sheet_count(0) == 1
+    assert xlsx_sheet_count(per_sheet) == 1
+    assert xlsx_sheet_count(per_sheet + 1) == 2
@@ -0,0 +1,146 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+
+import importer
+from importer import _parse_date, _stage_file, _validate_group_name, iter_records
+
+
+class FakeCursor:
+    # как pg8000: COPY через execute(sql, stream=...)
+    def __init__(self):
+        self.chunks = []
+
+    def execute(self, sql, stream=None):
+        assert sql.startswith("COPY import_stage (row_no, ")
+        self.chunks.append(list(csv.reader(io.StringIO(stream.read()))))
+
+
+def _csv(text: str):
+    return iter_records(io.BytesIO(text.encode("utf-8")), "marks.csv")
+
+
+def test_iter_csv_sniffs_delimiter_and_skips_blank_rows():
+    records = list(_csv("Name;Extra\nIT_2024;x\n;\nMATH_2023;y\n"))
+    assert records == [
+        (2, {"name": "IT_2024", "extra": "x"}),
+        (4, {"name": "MATH_2023", "extra": "y"}),
+    ]
+
+
+def test_stage_file_collects_errors_with_row_numbers():
+    records = [
+        (2, {"name": "IT_2024"}),
+        (3, {"name": ""}),
+        (4, {"name": "IT-2024"}),
+        (5, {"name": "MATH_2023"}),
+    ]
+    cursor, errors = FakeCursor(), []
+
+    total = _stage_file(cursor, "groups", records, errors)
+
+    assert total == 4
+    assert errors == [
+        {"row": 3, "error": "Поле name не может быть пустым"},
+        {"row": 4, "error": "Имя группы должно оканчиваться годом _YYYY"},
+    ]
+    # в staging уходят только корректные строки, row_no — первая колонка
+    assert cursor.chunks == [[["2", "IT_2024"], ["5", "MATH_2023"]]]
+
+
+def test_stage_file_copies_in_chunks(monkeypatch):
+    monkeypatch.setattr(importer, "COPY_CHUNK_ROWS", 2)
+    records = [(i, {"name": f"G{i}_2024"}) for i in range(2, 7)]
+    cursor = FakeCursor()
+
+    _stage_file(cursor, "groups", records, [])
+
+    assert [len(c) for c in cursor.chunks] == [2, 2, 1]
+
+
+def test_stage_marks_validates_value_and_date():
+    errors = []
+    records = [
+        (2, {"student": "Иванов И.", "subject": "Физика", "teacher": "Петров П.", "value": "5", "mark_date": "01.09.2024"}),
+        (3, {"student": "Иванов И.", "subject": "Физика", "teacher": "Петров П.", "value": "7", "mark_date": "2024-09-01"}),
+        (4, {"student": "Иванов И.", "subject": "Физика", "teacher": "Петров П.", "value": "пять", "mark_date": "2024-09-01"}),
+        (5, {"student": "Иванов И.", "subject": "Физика", "teacher": "Петров П.", "value": 4, "mark_date": "вчера"}),
+    ]
+    cursor = FakeCursor()
+
+    _stage_file(cursor, "marks", records, errors)
+
+    assert [e["row"] for e in errors] == [3, 4, 5]
+    assert errors[2]["error"] == "Некорректная дата: вчера"
+    assert cursor.chunks[0][0][-2:] == ["5", "2024-09-01"]
+
+
+def test_stage_people_checks_group_by_type():
+    errors = []
+    records = [
+        (2, {"last_name": "Иванов", "first_name": "Иван", "type": "s", "group": "IT_2024"}),
+        (3, {"last_name": "Петров", "first_name": "Пётр", "type": "S"}),
+        (4, {"last_name": "Сидоров", "first_name": "Сидор", "type": "P", "group": "IT_2024"}),
+    ]
+
+    _stage_file(FakeCursor(), "people", records, errors)
+
+    assert [e["row"] for e in errors] == [3, 4]
+
+
+@pytest.mark.parametrize("value", ["2024-09-01", "01.09.2024", " 2024-09-01 ", date(2024, 9, 1)])
+def test_parse_date_formats(value):
+    assert _parse_date(value) == date(2024, 9, 1)
+
+
+def test_validate_group_name_rejects_short_name():
+    with pytest.raises(ValueError, match="слишком короткое"):
+        _validate_group_name("_2024")
+
+
+class RecordingConnection:
+    # соединение импорта: запоминает запросы, COPY принимает как pg8000
+    def __init__(self, log):
+        self.log = log
+        self.rowcount = 0
+        self._fetch = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, stream=None):
+        self.log.append(" ".join(sql.split()))
+        self._fetch = (date(2023, 10, 1), date(2024, 9, 2)) if "min(mark_date)" in sql else None
+
+    def fetchone(self):
+        return self._fetch
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+    def close(self):
+        pass
+
+
+def test_marks_partitions_are_ensured_before_import_locks(monkeypatch):
+    log = []
+    monkeypatch.setattr(importer, "get_raw_connection", lambda: RecordingConnection(log))
+    monkeypatch.setattr(importer, "note_write", lambda *a: None)
+    monkeypatch.setattr(importer, "ensure_partitions_for", lambda dates: log.append(("partitions", list(dates))))
+    data = "student;subject;teacher;value;mark_date\nИванов И.;Физика;Петров П.;5;2024-09-02\n"
+
+    importer.import_file("marks", io.BytesIO(data.encode()), "marks.csv")
+
+    partitions = log.index(("partitions", [date(2023, 10, 1), date(2024, 9, 2)]))
+    lock = log.index(f"SELECT pg_advisory_xact_lock({importer.IMPORT_LOCK_ID})")
+    first_marks = next(i for i, q in enumerate(log) if isinstance(q, str) and "marks" in q.split())
+    assert partitions < lock < first_marks < log.index("COMMIT")
+    assert not any("marks_ensure_partitions" in q for q in log if isinstance(q, str))
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import metrics
+from metrics import BUCKETS_MS, fingerprint, instrument_engine, instrumented, percentile
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.configure()
+    metrics.reset()
+
+
+def test_fingerprint_drops_values_and_keeps_casts():
+    a = fingerprint("SELECT * FROM marks WHERE id IN (1, 2, 3) AND name = 'O''Brien' AND d > $1::date")
+    b = fingerprint("SELECT *   FROM marks\nWHERE id IN (4, 5) AND name = 'x' AND d > $2::date")
+
+    assert a == b == "SELECT * FROM marks WHERE id IN (...) AND name = ? AND d > ?::date"
+
+
+def test_fingerprint_placeholders_of_every_driver():
+    expected = "SELECT ? FROM t WHERE a = ? AND b = ?"
+    assert fingerprint("SELECT 1 FROM t WHERE a = %s AND b = %(b)s") == expected
+    assert fingerprint("SELECT 1 FROM t WHERE a = :a AND b = ?") == expected
+
+
+def _stat(values):
+    stat = metrics._new_stat()
+    for ms in values:
+        metrics._observe(stat, ms, None, False)
+    return stat
+
+
+def test_percentile_interpolates_within_bucket():
+    # 100 вызовов: 90 в корзине (10, 20], 10 в корзине (100, 200]
+    stat = _stat([15.0] * 90 + [150.0] * 10)
+
+    assert 10 < percentile(stat, 0.50) <= 20
+    assert percentile(stat, 0.50) == pytest.approx(10 + 10 * 50 / 90)
+    assert 100 < percentile(stat, 0.95) <= 150
+    assert percentile(stat, 1.0) == 150.0
+
+
+def test_percentile_edge_cases():
+    assert percentile(metrics._new_stat(), 0.5) == 0.0
+    # дольше последней границы: корзина от неё до максимума
+    slow = _stat([BUCKETS_MS[-1] * 2])
+    assert BUCKETS_MS[-1] < percentile(slow, 0.5) < BUCKETS_MS[-1] * 2
+    assert percentile(slow, 1.0) == BUCKETS_MS[-1] * 2
+
+
+def test_instrumented_repo_counts_statements_rows_and_slow_log():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    metrics.configure(slow_ms=0)
+
+    @instrumented
+    def load():
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (v integer)"))
+            conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+            return conn.execute(text("SELECT v FROM t WHERE v > :v"), {"v": 1}).all()
+
+    load()
+
+    repo = next(r for r in metrics.repo_stats() if r["name"].endswith("load"))
+    assert repo["calls"] == 1
+    assert repo["statements"] == 3
+    assert repo["rows"] >= 3
+    assert any(s["name"] == "SELECT v FROM t WHERE v > ?" for s in metrics.statement_stats())
+    slow = metrics.slow_queries()
+    assert slow[0]["repo"] == repo["name"]
+    assert slow[0]["params"] == "(1,)"
+
+
+def test_instrumented_counts_errors():
+    @instrumented
+    def broken():
+        raise ValueError("нет")
+
+    with pytest.raises(ValueError):
+        broken()
+
+    repo = next(r for r in metrics.repo_stats() if r["name"].endswith("broken"))
+    assert repo["errors"] == 1
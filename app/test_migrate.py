@@ -0,0 +1,52 @@
+from migrate import MIGRATION_RE, list_migrations, split_sql
+
+
+def test_split_sql_on_semicolons_outside_literals_and_comments():
+    sql = """
+    -- комментарий; не оператор
+    CREATE TABLE t (name text DEFAULT 'a;b');
+    INSERT INTO t VALUES ('it''s; fine');
+
+    SELECT 1
+    """
+
+    assert split_sql(sql) == [
+        "CREATE TABLE t (name text DEFAULT 'a;b')",
+        "INSERT INTO t VALUES ('it''s; fine')",
+        "SELECT 1",
+    ]
+
+
+def test_split_sql_keeps_dollar_quoted_bodies():
+    sql = """
+    CREATE FUNCTION f() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        RAISE EXCEPTION 'нет; нельзя';
+        RETURN NEW;
+    END;
+    $$;
+    DO $body$ BEGIN PERFORM 1; END $body$;
+    """
+
+    statements = split_sql(sql)
+
+    assert len(statements) == 2
+    assert statements[0].startswith("CREATE FUNCTION f()")
+    assert statements[0].endswith("END;\n    $$")
+    assert statements[1] == "DO $body$ BEGIN PERFORM 1; END $body$"
+
+
+def test_split_sql_ignores_empty_statements():
+    assert split_sql(";;\n-- только комментарий\n;") == []
+
+
+def test_shipped_migrations_are_ordered_and_split():
+    migrations = list_migrations()
+    versions = [m["version"] for m in migrations]
+
+    assert versions == sorted(set(versions))
+    for m in migrations:
+        assert MIGRATION_RE.match(m["path"].name)
+        statements = split_sql(m["path"].read_text(encoding="utf-8"))
+        assert statements, m["path"].name
+        assert all(not s.startswith("--") for s in statements)
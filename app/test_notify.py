@@ -0,0 +1,103 @@
+import psycopg
+import pytest
+
+import cache
+import db
+import notify
+
+
+@pytest.fixture()
+def cleared(monkeypatch):
+    calls = []
+    monkeypatch.setattr(notify, "invalidate", lambda *ns: calls.append(("invalidate", ns)))
+    monkeypatch.setattr(notify, "clear_reports", lambda: calls.append(("clear_reports",)))
+    monkeypatch.setattr(db, "read_engines", [])
+    return calls
+
+
+def test_apply_invalidates_table_namespaces_and_reports(cleared):
+    notify._apply(None, "groups")
+    notify._apply(None, "marks")
+
+    assert cleared == [
+        ("invalidate", ("groups", "students")),
+        ("clear_reports",),
+        ("clear_reports",),
+    ]
+
+
+def test_apply_unknown_table_is_ignored(cleared):
+    notify._apply(None, "app_users")
+
+    assert cleared == []
+
+
+def test_apply_with_replicas_raises_lsn_floor(cleared, monkeypatch):
+    class Conn:
+        def execute(self, sql):
+            assert sql == "SELECT " + db.WAL_LSN_EXPR
+            return self
+
+        def fetchone(self):
+            return (777,)
+
+    floors = []
+    monkeypatch.setattr(db, "read_engines", [object()])
+    monkeypatch.setattr(notify, "require_lsn", floors.append)
+
+    notify._apply(Conn(), "subjects")
+
+    assert floors == [777]
+    assert cleared == [("invalidate", ("subjects",)), ("clear_reports",)]
+
+
+@pytest.mark.parametrize("error", [
+    psycopg.OperationalError("server closed the connection"),
+    KeyError("cache"),
+])
+def test_run_keeps_reconnecting_after_errors(monkeypatch, error):
+    attempts = []
+
+    def fake_listen(cfg):
+        attempts.append(cfg)
+        if len(attempts) == 3:
+            notify._stop.set()
+            return
+        raise error
+
+    monkeypatch.setattr(notify, "_listen", fake_listen)
+    monkeypatch.setattr(notify, "RECONNECT_S", 0)
+    notify._stop.clear()
+    try:
+        notify._run({"host": "db"})
+    finally:
+        notify._stop.clear()
+
+    assert len(attempts) == 3
+
+
+def test_load_notify_config(tmp_path):
+    path = tmp_path / "config.ini"
+
+    path.write_text("[db]\ndbname = x\n")
+    assert notify.load_notify_config(str(path)) is True
+
+    path.write_text("[cache]\nttl = 60\n")
+    assert notify.load_notify_config(str(path)) is True
+
+    path.write_text("[cache]\nlisten = false\n")
+    assert notify.load_notify_config(str(path)) is False
+
+
+def test_clear_drops_cached_values():
+    # после переподключения _listen сбрасывает всё закэшированное
+    calls = []
+
+    @cache.cached("test_notify")
+    def load():
+        calls.append(1)
+        return len(calls)
+
+    assert load() == 1
+    cache.clear()
+    assert load() == 2
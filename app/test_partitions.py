@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+import partitions
+from partitions import academic_year, ensure_partitions_for, year_bounds
+
+
+@pytest.mark.parametrize("d, year", [
+    (date(2024, 9, 1), 2024),
+    (date(2024, 12, 31), 2024),
+    (date(2025, 1, 1), 2024),
+    (date(2025, 8, 31), 2024),
+    (date(2025, 9, 1), 2025),
+])
+def test_academic_year_starts_in_september(d, year):
+    assert academic_year(d) == year
+
+
+def test_year_bounds_cover_whole_year():
+    d_from, d_to = year_bounds(2024)
+
+    assert (d_from, d_to) == (date(2024, 9, 1), date(2025, 9, 1))
+    assert academic_year(d_from) == 2024
+    assert academic_year(date.fromordinal(d_to.toordinal() - 1)) == 2024
+
+
+@pytest.fixture()
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(partitions, "_known_years", set())
+
+    def fake_ensure(d_from, d_to):
+        calls.append((d_from, d_to))
+        partitions._known_years.update(range(academic_year(d_from), academic_year(d_to) + 1))
+        return 0
+
+    monkeypatch.setattr(partitions, "ensure_partitions", fake_ensure)
+    return calls
+
+
+def test_ensure_partitions_for_creates_years_and_next_year_once(calls):
+    ensure_partitions_for([date(2023, 10, 1), date(2025, 2, 1)])
+    ensure_partitions_for([date(2024, 5, 1)])
+
+    # 2023 и 2024 из дат и следующий 2025: marks_ensure_partitions включает год d_to
+    assert calls == [(date(2023, 9, 1), date(2025, 9, 1))]
+
+
+def test_ensure_partitions_for_unknown_year_and_empty(calls):
+    ensure_partitions_for([])
+    ensure_partitions_for(d for d in [date(2019, 9, 1)])
+
+    assert calls == [(date(2019, 9, 1), date(2020, 9, 1))]
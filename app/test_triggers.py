@@ -0,0 +1,101 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+@pytest.fixture()
+def conn(database):
+    # всё внутри одной транзакции, которая откатывается: база остаётся как была
+    from db import get_engine
+
+    with get_engine().connect() as c:
+        tx = c.begin()
+        yield c
+        tx.rollback()
+
+
+def _one(conn, sql: str, **params):
+    return conn.execute(text(sql), params).scalar_one()
+
+
+def _fails(conn, sql: str, match: str, **params) -> None:
+    # ошибка триггера отменяет только точку сохранения, транзакция теста продолжается
+    savepoint = conn.begin_nested()
+    with pytest.raises(DBAPIError, match=match):
+        conn.execute(text(sql), params)
+    savepoint.rollback()
+
+
+@pytest.fixture()
+def refs(conn):
+    group = _one(conn, "INSERT INTO groups (name) VALUES ('ТРИГ_2024') RETURNING id")
+    empty_group = _one(conn, "INSERT INTO groups (name) VALUES ('ТРИГ_2025') RETURNING id")
+    student = _one(
+        conn,
+        "INSERT INTO people (last_name, first_name, type, group_id) VALUES ('Тест', 'Студент', 'S', :g) RETURNING id",
+        g=group,
+    )
+    teacher = _one(
+        conn, "INSERT INTO people (last_name, first_name, type) VALUES ('Тест', 'Преподаватель', 'P') RETURNING id"
+    )
+    subject = _one(conn, "INSERT INTO subjects (name) VALUES ('Тестовый предмет') RETURNING id")
+    unused_subject = _one(conn, "INSERT INTO subjects (name) VALUES ('Пустой предмет') RETURNING id")
+    mark = _one(
+        conn,
+        "INSERT INTO marks (student_id, subject_id, teacher_id, value, mark_date) "
+        "VALUES (:s, :sb, :t, 4, :d) RETURNING id",
+        s=student, sb=subject, t=teacher, d=date.today(),
+    )
+    return {
+        "group": group, "empty_group": empty_group, "student": student, "teacher": teacher,
+        "subject": subject, "unused_subject": unused_subject, "mark": mark,
+    }
+
+
+def test_people_statement_rejects_any_invalid_row(conn, refs):
+    # одна плохая строка многострочной вставки отменяет весь оператор
+    _fails(
+        conn,
+        "INSERT INTO people (last_name, first_name, type, group_id) "
+        "VALUES ('А', 'Б', 'S', :g), ('В', 'Г', 'S', NULL)",
+        "group_id обязателен",
+        g=refs["group"],
+    )
+    _fails(conn, "UPDATE people SET group_id = :g WHERE id = :t", "должен быть NULL", g=refs["group"], t=refs["teacher"])
+    _fails(conn, "INSERT INTO people (last_name, first_name, type) VALUES (' ', 'Б', 'P')", "Фамилия")
+    assert _one(conn, "SELECT count(*) FROM people WHERE last_name IN ('А', 'В', ' ')") == 0
+
+
+def test_marks_value_range(conn, refs):
+    _fails(
+        conn,
+        "INSERT INTO marks (student_id, subject_id, teacher_id, value, mark_date) "
+        "VALUES (:s, :sb, :t, 5, :d), (:s, :sb, :t, 7, :d)",
+        "между 1 и 5",
+        s=refs["student"], sb=refs["subject"], t=refs["teacher"], d=date.today(),
+    )
+    _fails(conn, "UPDATE marks SET value = 0 WHERE id = :m", "между 1 и 5", m=refs["mark"])
+    conn.execute(text("UPDATE marks SET value = 5 WHERE id = :m"), {"m": refs["mark"]})
+
+
+def test_delete_guards(conn, refs):
+    _fails(conn, "DELETE FROM people WHERE id = :p", "есть ссылки в marks", p=refs["student"])
+    _fails(conn, "DELETE FROM subjects WHERE id = :s", "по нему есть оценки", s=refs["subject"])
+    _fails(conn, "DELETE FROM groups WHERE id = :g", "в ней состоят студенты", g=refs["group"])
+
+    conn.execute(text("DELETE FROM subjects WHERE id = :s"), {"s": refs["unused_subject"]})
+    conn.execute(text("DELETE FROM groups WHERE id = :g"), {"g": refs["empty_group"]})
+
+
+def test_subject_rename_guard(conn, refs):
+    _fails(conn, "UPDATE subjects SET name = 'Другое' WHERE id = :s", "Нельзя изменить предмет", s=refs["subject"])
+    # то же имя и предмет без оценок — можно
+    conn.execute(text("UPDATE subjects SET name = name WHERE id = :s"), {"s": refs["subject"]})
+    conn.execute(text("UPDATE subjects SET name = 'Другое' WHERE id = :s"), {"s": refs["unused_subject"]})
+
+
+def test_group_name_rules(conn):
+    _fails(conn, "INSERT INTO groups (name) VALUES ('ТРИГ-2024')", "оканчиваться годом")
+    _fails(conn, "INSERT INTO groups (name) VALUES ('')", "не может быть пустым")
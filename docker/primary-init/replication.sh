@@ -0,0 +1,4 @@
+#!/bin/bash
+# выполняется только при инициализации пустого тома: разрешает реплике pg_basebackup и потоковую репликацию
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,10 @@
+#!/bin/bash
+# горячая реплика: при пустом томе — копия primary с standby.signal и primary_conninfo (-R)
+set -e
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+  until pg_isready -h db -p 5432 -U "$POSTGRES_USER"; do sleep 1; done
+  pg_basebackup -h db -p 5432 -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream
+fi
+chown -R postgres:postgres "$PGDATA"
+chmod 700 "$PGDATA"
+exec gosu postgres postgres